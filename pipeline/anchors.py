@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+anchors.py - Index of content and brief sections, for "§" references.
+
+The prose cites sections as "ITB-A10 §A10.3.2", "ITB-G §G6.4" or just
+"§D5.1" (a section of the module the text is in). A SectionIndex maps each
+module code (and brief ID) to its sections, keyed by every anchor a section
+answers to:
+
+- its id, unless it is a placeholder generated from a line number ("_L72");
+- the number its title starts with ("A10.3 SABOTAGE ..." -> "A10.3",
+  "SECTION 3: ..." -> "3");
+- that number without the module's own prefix ("A10.3.4" in ITB-A10 -> "3.4").
+
+Lookups are dictionary lookups. The index is built from the content header
+index (content_index.py), so section bodies are not parsed, and
+Corpus.invalidate() updates the entries of a single changed file.
+
+build.py renders an anchor into every content-module heading
+(heading_anchor) and turns the references that resolve into links to it
+(SectionLinks, the section_links template filter).
+
+Usage:
+    python anchors.py                     # anchors per module
+    python anchors.py ITB-A10             # anchors of one module
+    python anchors.py "ITB-A10 §3.4"      # resolve a reference
+"""
+
+import re
+import sys
+from collections import namedtuple
+
+import cache
+from content_index import LazyModule, build_header
+
+# A "§" reference, optionally qualified by a module code
+SECTION_REF = re.compile(
+    r"(?:\b(?P<module>[A-Z][A-Z0-9]+(?:-[A-Z0-9_]+)*|[A-Z](?:-[A-Z0-9_]+)+)\s+)?"
+    r"§\s?(?P<anchor>[A-Za-z]?\d+[A-Za-z]?(?:\.[0-9a-z]+)*)"
+)
+
+# The section number a title starts with
+TITLE_NUMBER = re.compile(r"^(?:SECTION\s+)?([A-Z]?\d+[A-Za-z]?(?:\.\d+[a-z]?)*)(?=[\s:.)]|$)")
+
+Section = namedtuple("Section", "owner path id title depth tags")
+
+
+def is_placeholder(section_id) -> bool:
+    """Ids like "_L72" only record the line a section was converted from."""
+    return section_id is None or str(section_id).startswith("_L")
+
+
+def section_anchors(owner: str, section_id, title) -> list:
+    """Every anchor a section can be cited by, most specific first."""
+    anchors = [] if is_placeholder(section_id) else [str(section_id)]
+    m = TITLE_NUMBER.match(title or "")
+    if m:
+        anchors.append(m.group(1))
+    prefix = owner.rsplit("-", 1)[-1] + "."
+    anchors.extend(a[len(prefix):] for a in list(anchors) if a.startswith(prefix))
+    return list(dict.fromkeys(anchors))
+
+
+def section_label(section_id, title) -> str:
+    """How a section is written after "§": its id, or its number if the id is a
+    placeholder ("" if it has neither)."""
+    if not is_placeholder(section_id):
+        return str(section_id)
+    m = TITLE_NUMBER.match(title or "")
+    return m.group(1) if m else ""
+
+
+def heading_anchor(owner: str, section_id, title) -> str:
+    """HTML id of a section's rendered heading (module_content.md.j2): the
+    module code and the section's label, e.g. "itb-a10-a10.3.4"."""
+    label = section_label(section_id, title) or str(section_id)
+    return re.sub(r"[^a-z0-9._]+", "-", f"{owner}-{label}".lower()).strip("-")
+
+
+# What may stand between a reference and an unqualified one that continues it
+CONTINUATION = re.compile(r"\s*(?:[+,/]|,?\s*and)?\s*")
+
+# A word right before "§" that qualifies it with something other than a module
+# code ("Module 2 §2", "Article §3"): the reference can't be placed
+OTHER_QUALIFIER = re.compile(r"(?:\b[A-Z][\w-]*|\b\d[\w.]*)\s*$")
+
+# The end of a sentence, after which an unqualified reference is local again
+SENTENCE_END = re.compile(r"[.;!?](?:\s|$)|\n")
+
+
+def _ref_matches(text: str):
+    """(match, module code or None) for the "§" references in text.
+
+    An unqualified reference right after a qualified one, separated only by
+    "+", ",", "/" or "and" ("ITB-F12 §2+§3.4"), belongs to the same module.
+    References that can't be placed are skipped: those after some other
+    qualifier ("Module 2 §2"), and unqualified ones later in the sentence of
+    a qualified one ("ITB-F §F5 (Russia) and §F6"). None means the module
+    the text is in.
+    """
+    if not isinstance(text, str) or "§" not in text:
+        return
+    module = None
+    last_end = 0
+    for m in SECTION_REF.finditer(text):
+        gap = text[last_end:m.start()]
+        last_end = m.end()
+        if m.group("module"):
+            module = m.group("module")
+        elif module and CONTINUATION.fullmatch(gap):
+            pass  # continues the previous reference
+        elif OTHER_QUALIFIER.search(text, 0, m.start()):
+            module = None
+            continue
+        elif module and not SENTENCE_END.search(gap):
+            continue
+        else:
+            module = None
+        yield m, module
+
+
+def section_refs(text: str) -> list:
+    """[(module code or None, anchor)] for the "§" references in text."""
+    return [(module, m.group("anchor")) for m, module in _ref_matches(text)]
+
+
+class SectionIndex:
+    """(module code or brief ID, anchor) -> Section, for every content module and brief."""
+
+    def __init__(self):
+        self.anchors = {}    # owner -> {anchor: Section}
+        self.owners = {}     # path -> owner
+        self.sections = {}   # owner -> number of sections
+
+    @classmethod
+    def from_corpus(cls, corpus) -> "SectionIndex":
+        index = cls()
+        for path, module in corpus.content.items():
+            index.update(path, module)
+        for path, brief in corpus.briefs.items():
+            index.update(path, brief, kind="brief")
+        return index
+
+    def update(self, path, doc, kind: str = "content"):
+        """(Re)index one file; doc None (or not a mapping) drops it."""
+        self.remove(path)
+        if isinstance(doc, LazyModule):
+            owner, outline = doc.module_code, doc.outline
+        elif isinstance(doc, dict):
+            owner = doc.get("module_code" if kind == "content" else "brief_id")
+            outline = build_header(doc)["outline"]
+        else:
+            return
+        owner = str(owner or path.stem)
+        anchors = {}
+        for section_id, title, _, depth, tags in outline:
+            section = Section(owner, path, section_id, title, depth, tags)
+            for anchor in section_anchors(owner, section_id, title):
+                anchors.setdefault(anchor, section)
+        self.anchors[owner] = anchors
+        self.owners[path] = owner
+        self.sections[owner] = len(outline)
+
+    def remove(self, path):
+        owner = self.owners.pop(path, None)
+        if owner is not None:
+            self.anchors.pop(owner, None)
+            self.sections.pop(owner, None)
+
+    def lookup(self, owner: str, anchor: str):
+        """Section cited as "<owner> §<anchor>", or None."""
+        return self.anchors.get(owner, {}).get(anchor)
+
+    def resolve(self, text: str, context: str = None):
+        """Section for the first reference in text ("ITB-A10 §3.4"); context is the
+        module an unqualified "§3.4" is read in."""
+        refs = section_refs(text)
+        if not refs:
+            return None
+        owner, anchor = refs[0]
+        return self.lookup(owner or context, anchor)
+
+
+class SectionLinks:
+    """Turns "§" references in rendered text into links to section headings.
+
+    files maps module codes to their output file; a reference into the
+    module being rendered links within the page. References that don't
+    resolve, and sections of briefs, are left as text.
+    """
+
+    def __init__(self, index: SectionIndex, files: dict):
+        self.index = index
+        self.files = files
+
+    def link(self, text, owner: str = None):
+        if not isinstance(text, str) or "§" not in text:
+            return text
+        parts = []
+        pos = 0
+        for m, module in _ref_matches(text):
+            section = self.index.lookup(module or owner, m.group("anchor"))
+            if section is None or section.owner not in self.files:
+                continue
+            target = "" if section.owner == owner else self.files[section.owner]
+            anchor = heading_anchor(section.owner, section.id, section.title)
+            parts.append(f"{text[pos:m.start()]}[{m.group(0)}]({target}#{anchor})")
+            pos = m.end()
+        return "".join(parts) + text[pos:]
+
+
+def run_anchors(args: list) -> int:
+    """CLI for `anchors.py` / `itp anchors`. Returns an exit code."""
+    from corpus import Corpus
+    index = SectionIndex.from_corpus(Corpus())
+    if not args:
+        for owner, anchors in index.anchors.items():
+            print(f"  {owner:<16} {index.sections[owner]:>4} sections  {len(anchors):>4} anchors")
+        print(f"\n✅ {sum(len(a) for a in index.anchors.values())} anchors in {len(index.anchors)} modules and briefs")
+        return 0
+    status = 0
+    for arg in args:
+        if "§" in arg:
+            section = index.resolve(arg)
+            if section is None:
+                print(f"❌ {arg}: no such section")
+                status = 1
+            else:
+                print(f"{arg} -> {section.path.name}: {section.id} {section.title}  (#{heading_anchor(section.owner, section.id, section.title)})")
+        elif arg in index.anchors:
+            for anchor, section in index.anchors[arg].items():
+                print(f"  §{anchor:<14} {section.id}  {section.title}")
+        else:
+            print(f"❌ Unknown module or brief: {arg}")
+            status = 1
+    return status
+
+
+def main():
+    sys.exit(run_anchors(cache.strip_cache_flag(sys.argv[1:])))
+
+
+if __name__ == "__main__":
+    main()
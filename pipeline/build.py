@@ -5,7 +5,11 @@ build.py - Render ITP YAML data into markdown reports via Jinja2 templates.
 Usage:
     python build.py                # build all outputs
     python build.py variables      # build one report
+    python build.py ITB-B ITB-C    # build selected content modules only
     python build.py --validate     # validate then build
+    python build.py --no-cache     # bypass the parsed-document cache
+    python build.py --jobs 4       # parse content/briefs with 4 processes
+    python build.py --report json  # also write reports/build.json (or junit: .xml)
 
 Output goes to output/ directory. These are the generated reports
 that replace hand-edited markdown files.
@@ -13,50 +17,24 @@ that replace hand-edited markdown files.
 
 import re
 import sys
-import yaml
+import time
 from pathlib import Path
 from datetime import date
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, TemplateNotFound
+
+import cache
+from corpus import Corpus, ENTITY_MAP
+from loader import strip_jobs_flag
+from content_index import materialize_all
+from anchors import SectionLinks, heading_anchor
+from report import Report, strip_report_flag
 
 BASE = Path(__file__).parent.parent
 DATA = BASE / "data"
-CONTENT = DATA / "content"
-BRIEFS = DATA / "briefs"
 TEMPLATES = BASE / "templates"
 OUTPUT = BASE / "output"
 
 
-def load_yaml(path: Path):
-    """Load YAML, return entries list."""
-    if not path.exists():
-        return []
-    with open(path, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
-    if data is None:
-        return []
-    if isinstance(data, dict):
-        return data  # return full dict for metadata access
-    return data
-
-
-def load_entries(path: Path) -> list:
-    """Load YAML, extract entries list."""
-    data = load_yaml(path)
-    if isinstance(data, dict) and "entries" in data:
-        return data["entries"]
-    if isinstance(data, list):
-        return data
-    return []
-
-
-def load_metadata(path: Path) -> dict:
-    """Load YAML, extract top-level metadata (everything except entries)."""
-    data = load_yaml(path)
-    if isinstance(data, dict):
-        return {k: v for k, v in data.items() if k != "entries"}
-    return {}
-
-
 # --- Brief building helpers (Phase 3) ---
 
 BRIEF_TEMPLATE_MAP = {
@@ -106,23 +84,73 @@ def format_date_display(date_str: str) -> str:
     return f"{month} {parts[0]}"
 
 
-def build_all(env, targets=None):
-    """Build all (or specified) output reports."""
-    # Load all data
+# Report map: target_name -> (template, output_file)
+REPORTS = {
+    "variables":    ("app_variables.md.j2",    "APPENDIX_VARIABLES.md"),
+    "gaps":         ("app_gaps.md.j2",         "APPENDIX_GAPS.md"),
+    "traps":        ("isa_traps.md.j2",        "ISA_TRAPS.md"),
+    "scenarios":    ("isa_scenarios.md.j2",     "ISA_SCENARIOS.md"),
+    "index":        ("master_index.md.j2",      "00_MASTER_INDEX.md"),
+}
+
+CONTENT_TEMPLATE = "module_content.md.j2"
+
+
+def make_env(loader=None) -> Environment:
+    """Jinja2 environment for entity reports and content modules.
+
+    loader defaults to templates/ in the working tree (see Corpus.template_loader).
+    """
+    env = Environment(
+        loader=loader or FileSystemLoader(str(TEMPLATES)),
+        trim_blocks=True,
+        lstrip_blocks=True,
+        keep_trailing_newline=True,
+    )
+
+    # Helpers for templates
+    def filter_by(items, key, value):
+        return [i for i in items if i.get(key) == value]
+
+    def sort_by(items, key, reverse=False):
+        return sorted(items, key=lambda x: x.get(key, ""), reverse=reverse)
+
+    def section_links(text, links, owner=None):
+        return links.link(text, owner) if links is not None else text
+
+    env.globals["filter_by"] = filter_by
+    env.globals["sort_by"] = sort_by
+    env.globals["heading_anchor"] = heading_anchor
+    env.filters["section_links"] = section_links
+    return env
+
+
+def make_brief_env(loader=None) -> Environment:
+    """Separate Jinja2 environment for briefs (different trim settings)."""
+    return Environment(
+        loader=loader or FileSystemLoader(str(TEMPLATES)),
+        keep_trailing_newline=True,
+        trim_blocks=False,
+        lstrip_blocks=False,
+    )
+
+
+def build_context(corpus: Corpus) -> dict:
+    """Template context shared by entity reports and content modules."""
     ctx = {
-        "variables": load_entries(DATA / "variables.yaml"),
-        "variables_meta": load_metadata(DATA / "variables.yaml"),
-        "gaps": load_entries(DATA / "gaps.yaml"),
-        "gaps_meta": load_metadata(DATA / "gaps.yaml"),
-        "traps": load_entries(DATA / "traps.yaml"),
-        "traps_meta": load_metadata(DATA / "traps.yaml"),
-        "observations": load_entries(DATA / "observations.yaml"),
-        "observations_meta": load_metadata(DATA / "observations.yaml"),
-        "scenarios": load_entries(DATA / "scenarios.yaml"),
-        "scenarios_meta": load_metadata(DATA / "scenarios.yaml"),
-        "sessions": load_entries(DATA / "sessions.yaml"),
-        "modules": load_entries(DATA / "modules.yaml"),
-        "index_meta": load_yaml(DATA / "index_meta.yaml") if (DATA / "index_meta.yaml").exists() else {},
+        "variables": corpus.models("variables"),
+        "variables_meta": corpus.metadata("variables"),
+        "gaps": corpus.models("gaps"),
+        "gaps_meta": corpus.metadata("gaps"),
+        "traps": corpus.models("traps"),
+        "traps_meta": corpus.metadata("traps"),
+        "observations": corpus.models("observations"),
+        "observations_meta": corpus.metadata("observations"),
+        "scenarios": corpus.models("scenarios"),
+        "scenarios_meta": corpus.metadata("scenarios"),
+        "sessions": corpus.models("sessions"),
+        "modules": corpus.models("modules"),
+        "index_meta": corpus.index_meta,
         "build_date": date.today().isoformat(),
     }
 
@@ -140,152 +168,217 @@ def build_all(env, targets=None):
         return (2, sid)
     ctx["scenarios"] = sorted(ctx["scenarios"], key=scenario_sort_key)
 
-    # Helpers for templates
-    def filter_by(items, key, value):
-        return [i for i in items if i.get(key) == value]
+    # "§" references link to the section headings of content modules (anchors.py)
+    modules_lookup = {m["code"]: m for m in ctx["modules"]}
+    files = {module.get("module_code", ""): content_output_filename(module, modules_lookup)
+             for module in corpus.content.values() if module is not None}
+    ctx["anchors"] = SectionLinks(corpus.sections, files)
+    return ctx
+
+
+def content_output_filename(module_data: dict, modules_lookup: dict) -> str:
+    """Output filename from the modules.yaml registry, or derived from the module code."""
+    mc = module_data.get("module_code", "")
+    if mc in modules_lookup:
+        return modules_lookup[mc].get("file", "").split("+")[0].strip().strip("`")
+    # Fallback: derive from module_code
+    return mc.replace("-", "_") + ".md"
+
+
+def render_brief(brief_env: Environment, brief_data: dict, source_name: str = "") -> tuple:
+    """Render one brief. Returns (output_filename, markdown)."""
+    btype = brief_data.get("type", "brief")
+    template_name = BRIEF_TEMPLATE_MAP.get(btype, "brief.md.j2")
+
+    try:
+        template = brief_env.get_template(template_name)
+    except Exception:
+        print(f"⚠️  Template '{template_name}' not found for {source_name}, "
+              f"falling back to brief.md.j2")
+        template = brief_env.get_template("brief.md.j2")
+
+    # Add display-formatted date if not already set (on a copy — the
+    # corpus document is shared with other stages)
+    if not brief_data.get("date_display"):
+        brief_data = dict(brief_data)
+        brief_data["date_display"] = format_date_display(
+            brief_data.get("date_published") or brief_data.get("date", "")
+        )
 
-    def sort_by(items, key, reverse=False):
-        return sorted(items, key=lambda x: x.get(key, ""), reverse=reverse)
+    rendered = template.render(brief=brief_data)
 
-    env.globals["filter_by"] = filter_by
-    env.globals["sort_by"] = sort_by
+    # Clean up excessive blank lines
+    rendered = re.sub(r'\n{3,}', '\n\n', rendered)
+    rendered = rendered.strip() + "\n"
 
-    # Report map: target_name -> (template, output_file)
-    reports = {
-        "variables":    ("app_variables.md.j2",    "APPENDIX_VARIABLES.md"),
-        "gaps":         ("app_gaps.md.j2",         "APPENDIX_GAPS.md"),
-        "traps":        ("isa_traps.md.j2",        "ISA_TRAPS.md"),
-        "scenarios":    ("isa_scenarios.md.j2",     "ISA_SCENARIOS.md"),
-        "index":        ("master_index.md.j2",      "00_MASTER_INDEX.md"),
-    }
+    return brief_output_filename(brief_data), rendered
 
-    if targets:
-        # Allow "content" and "briefs" as targets
-        build_content = "content" in targets
-        build_briefs = "briefs" in targets
-        reports = {k: v for k, v in reports.items() if k in targets}
-    else:
-        build_content = True
-        build_briefs = True
 
-    OUTPUT.mkdir(exist_ok=True)
+def write_output(output_file: str, rendered: str, output_dir: Path = OUTPUT):
+    out_path = output_dir / output_file
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write(rendered)
 
-    for name, (template_file, output_file) in reports.items():
-        tmpl_path = TEMPLATES / template_file
-        if not tmpl_path.exists():
-            print(f"⚠️  Template not found: {tmpl_path} — skipping {name}")
-            continue
 
-        template = env.get_template(template_file)
-        rendered = template.render(**ctx)
+def get_template(env, template_file: str):
+    """env.get_template(), or None if the template itself does not exist."""
+    try:
+        return env.get_template(template_file)
+    except TemplateNotFound as e:
+        if e.name != template_file:
+            raise
+        return None
 
-        out_path = OUTPUT / output_file
-        with open(out_path, "w", encoding="utf-8") as f:
-            f.write(rendered)
 
-        print(f"✅ Built {output_file} ({len(rendered)} chars)")
+def build_reports(env, ctx: dict, names=None, output_dir: Path = OUTPUT,
+                  report: Report = None) -> dict:
+    """Render the entity reports (all, or just names). Returns {filename: markdown}."""
+    built = {}
+    for name, (template_file, output_file) in REPORTS.items():
+        if names is not None and name not in names:
+            continue
+        template = get_template(env, template_file)
+        if template is None:
+            print(f"⚠️  Template not found: {TEMPLATES / template_file} — skipping {name}")
+            if report is not None:
+                report.add("report", output_file, warnings=[f"template not found: {template_file}"])
+            continue
 
-    # Build content modules (Phase 2)
-    if build_content and CONTENT.exists():
-        content_template_file = "module_content.md.j2"
-        tmpl_path = TEMPLATES / content_template_file
-        if not tmpl_path.exists():
-            print(f"⚠️  Content template not found: {tmpl_path} — skipping content modules")
-        else:
-            template = env.get_template(content_template_file)
-            # Find the output filename from modules.yaml registry
-            modules_lookup = {m["code"]: m for m in ctx["modules"]}
-
-            for yaml_file in sorted(CONTENT.glob("*.yaml")):
-                with open(yaml_file, "r", encoding="utf-8") as f:
-                    module_data = yaml.safe_load(f)
-                if module_data is None:
-                    continue
-
-                mc = module_data.get("module_code", "")
-                # Determine output filename from modules registry, or derive from code
-                if mc in modules_lookup:
-                    output_file = modules_lookup[mc].get("file", "").split("+")[0].strip().strip("`")
-                else:
-                    # Fallback: derive from module_code
-                    output_file = mc.replace("-", "_") + ".md"
-
-                rendered = template.render(module=module_data, **ctx)
-                out_path = OUTPUT / output_file
-                with open(out_path, "w", encoding="utf-8") as f:
-                    f.write(rendered)
-                print(f"✅ Built {output_file} ({len(rendered)} chars) [content: {mc}]")
+        started = time.perf_counter()
+        rendered = template.render(**ctx)
+        write_output(output_file, rendered, output_dir)
+        built[output_file] = rendered
+        if report is not None:
+            report.add("report", output_file, size=0, parse=0.0,
+                       render=time.perf_counter() - started, output_bytes=len(rendered.encode("utf-8")))
 
-    # Build briefs (Phase 3)
-    if build_briefs and BRIEFS.exists():
-        # Use a separate Jinja2 environment for briefs (different trim settings)
-        brief_env = Environment(
-            loader=FileSystemLoader(str(TEMPLATES)),
-            keep_trailing_newline=True,
-            trim_blocks=False,
-            lstrip_blocks=False,
-        )
+        print(f"✅ Built {output_file} ({len(rendered)} chars)")
+    return built
+
+
+def build_content_modules(env, ctx: dict, corpus: Corpus, paths=None,
+                          output_dir: Path = OUTPUT, report: Report = None) -> dict:
+    """Render content modules (all, or the given source paths)."""
+    built = {}
+    if not corpus.source.exists(corpus.content_dir):
+        return built
+    template = get_template(env, CONTENT_TEMPLATE)
+    if template is None:
+        print(f"⚠️  Content template not found: {TEMPLATES / CONTENT_TEMPLATE} — skipping content modules")
+        return built
+
+    # Find the output filename from modules.yaml registry
+    modules_lookup = {m["code"]: m for m in ctx["modules"]}
+    selected = {p: m for p, m in corpus.content.items() if paths is None or p in paths}
+    materialize_all(selected.values())
+
+    for yaml_file, module_data in selected.items():
+        if module_data is None:
+            continue
 
-        for yaml_file in sorted(BRIEFS.glob("*.yaml")):
-            with open(yaml_file, "r", encoding="utf-8") as f:
-                brief_data = yaml.safe_load(f)
-            if brief_data is None:
-                continue
+        mc = module_data.get("module_code", "")
+        output_file = content_output_filename(module_data, modules_lookup)
+        started = time.perf_counter()
+        rendered = template.render(module=module_data, **ctx)
+        write_output(output_file, rendered, output_dir)
+        built[output_file] = rendered
+        if report is not None:
+            report.add("content", output_file, paths=[yaml_file], render=time.perf_counter() - started,
+                       output_bytes=len(rendered.encode("utf-8")))
+        print(f"✅ Built {output_file} ({len(rendered)} chars) [content: {mc}]")
+    return built
+
+
+def build_brief_files(corpus: Corpus, paths=None, brief_env: Environment = None,
+                      output_dir: Path = OUTPUT, report: Report = None) -> dict:
+    """Render briefs (all, or the given source paths)."""
+    built = {}
+    if not corpus.source.exists(corpus.briefs_dir):
+        return built
+    brief_env = brief_env or make_brief_env(corpus.template_loader())
+
+    for yaml_file, brief_data in corpus.briefs.items():
+        if brief_data is None or (paths is not None and yaml_file not in paths):
+            continue
 
-            btype = brief_data.get("type", "brief")
-            template_name = BRIEF_TEMPLATE_MAP.get(btype, "brief.md.j2")
+        started = time.perf_counter()
+        fname, rendered = render_brief(brief_env, brief_data, yaml_file.name)
+        write_output(fname, rendered, output_dir)
+        built[fname] = rendered
+        if report is not None:
+            report.add("brief", fname, paths=[yaml_file], render=time.perf_counter() - started,
+                       output_bytes=len(rendered.encode("utf-8")))
+        print(f"✅ Built {fname} ({len(rendered)} chars) [brief: {brief_data.get('brief_id', '?')}]")
+    return built
+
+
+def build_all(env, targets=None, corpus: Corpus = None, output_dir: Path = OUTPUT,
+              report: Report = None) -> dict:
+    """Build all (or specified) output reports into output_dir.
+
+    Returns {output filename: rendered markdown} for everything built. With a
+    report, the template context (every entity file) and each output file are
+    recorded there (see report.py).
+    """
+    corpus = corpus or Corpus()
+    started = time.perf_counter()
+    ctx = build_context(corpus)
+    if report is not None:
+        entity_files = [p for t in ENTITY_MAP if corpus.exists(t) for p in corpus.files(t)]
+        report.add("context", "entities", paths=entity_files + [corpus.data_dir / "index_meta.yaml"],
+                   render=time.perf_counter() - started)
+    built = {}
+
+    report_names = None
+    content_paths = None
+    build_content = build_briefs = True
+    if targets:
+        # Allow "content" and "briefs" as targets, and module codes
+        # (e.g. ITB-B) to render just those content modules
+        report_names = [t for t in targets if t in REPORTS]
+        build_briefs = "briefs" in targets
+        if "content" not in targets:
+            module_codes = {t for t in targets if t not in REPORTS and t not in ("content", "briefs")}
+            content_paths = [p for p, m in corpus.content.items()
+                             if m is not None and m.get("module_code", "") in module_codes]
+            build_content = bool(content_paths)
 
-            try:
-                template = brief_env.get_template(template_name)
-            except Exception:
-                print(f"⚠️  Template '{template_name}' not found for {yaml_file.name}, "
-                      f"falling back to brief.md.j2")
-                template = brief_env.get_template("brief.md.j2")
+    output_dir.mkdir(parents=True, exist_ok=True)
 
-            # Add display-formatted date if not already set
-            if not brief_data.get("date_display"):
-                brief_data["date_display"] = format_date_display(
-                    brief_data.get("date_published") or brief_data.get("date", "")
-                )
+    built.update(build_reports(env, ctx, report_names, output_dir, report))
 
-            rendered = template.render(brief=brief_data)
+    # Build content modules (Phase 2)
+    if build_content:
+        built.update(build_content_modules(env, ctx, corpus, content_paths, output_dir, report))
 
-            # Clean up excessive blank lines
-            rendered = re.sub(r'\n{3,}', '\n\n', rendered)
-            rendered = rendered.strip() + "\n"
+    # Build briefs (Phase 3)
+    if build_briefs:
+        built.update(build_brief_files(corpus, output_dir=output_dir, report=report))
 
-            fname = brief_output_filename(brief_data)
-            out_path = OUTPUT / fname
-            with open(out_path, "w", encoding="utf-8") as f:
-                f.write(rendered)
-            print(f"✅ Built {fname} ({len(rendered)} chars) [brief: {brief_data.get('brief_id', '?')}]")
+    return built
 
 
 def main():
-    args = sys.argv[1:]
+    args, report_format = strip_report_flag(strip_jobs_flag(cache.strip_cache_flag(sys.argv[1:])))
+    report = Report("build") if report_format else None
 
     do_validate = "--validate" in args
     args = [a for a in args if a != "--validate"]
 
+    corpus = Corpus()
+
     if do_validate:
-        import subprocess
-        result = subprocess.run([sys.executable, str(BASE / "validate.py")],
-                                capture_output=True, text=True)
-        print(result.stdout)
-        if result.returncode != 0:
-            print(result.stderr)
-            print("Validation failed — aborting build.")
+        import validate
+        errors, _ = validate.run(corpus)
+        print()
+        if errors:
+            print(f"Validation failed ({len(errors)} error(s)) — aborting build.")
             sys.exit(1)
 
-    env = Environment(
-        loader=FileSystemLoader(str(TEMPLATES)),
-        trim_blocks=True,
-        lstrip_blocks=True,
-        keep_trailing_newline=True,
-    )
-
     targets = args if args else None
-    build_all(env, targets)
+    build_all(make_env(), targets, corpus, report=report)
+    if report is not None:
+        report.write(report_format)
     print(f"\n{'='*50}")
     print(f"Build complete. Output in: {OUTPUT}")
 
@@ -5,9 +5,10 @@ import re
 import sys
 from pathlib import Path
 
-import yaml
 import jinja2
 
+import cache
+from loader import load_yaml
 
 BASE = Path(__file__).resolve().parent.parent
 BRIEFS_DIR = BASE / "data" / "briefs"
@@ -65,8 +66,7 @@ def format_date_display(date_str: str) -> str:
 
 def build_brief(yaml_path: Path, env: jinja2.Environment) -> tuple[str, str]:
     """Build a single brief. Returns (output_filename, rendered_markdown)."""
-    with open(yaml_path, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
+    data = load_yaml(yaml_path)
 
     btype = data.get("type", "brief")
     template_name = TEMPLATE_MAP.get(btype, "brief.md.j2")
@@ -101,15 +101,17 @@ def main():
     parser = argparse.ArgumentParser(description="Build brief markdown from YAML")
     parser.add_argument("--validate", action="store_true",
                         help="Run validation before building")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the parsed-document cache")
     parser.add_argument("files", nargs="*",
                         help="Specific YAML files to build (default: all)")
     args = parser.parse_args()
+    if args.no_cache:
+        cache.disable()
 
     if args.validate:
-        import subprocess
-        result = subprocess.run([sys.executable,
-                                 str(BASE / "validate_briefs.py")])
-        if result.returncode != 0:
+        import validate_briefs
+        if validate_briefs.run() != 0:
             print("\nValidation failed. Fix errors before building.")
             sys.exit(1)
         print()
@@ -7,6 +7,7 @@ USAGE:
     python build_pdf.py --briefs-only      # Tier 1 (public briefs) only
     python build_pdf.py --full-only        # Tier 2 (full reference) only
     python build_pdf.py --date 2026-03-04  # override release date
+    python build_pdf.py --no-cache         # bypass the parsed-document cache
 
 OUTPUT:
     releases/ITP-Briefs-v{date}.pdf        # Tier 1: public briefs bundle
@@ -24,10 +25,12 @@ WORKFLOW:
 
 import sys
 import re
-import yaml
 import datetime
 from pathlib import Path
 
+import cache
+from corpus import Corpus
+
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
@@ -37,8 +40,6 @@ OUTPUT   = BASE / "output"
 DATA     = BASE / "data"
 RELEASES = BASE / "releases"
 
-RELEASES.mkdir(exist_ok=True)
-
 # ---------------------------------------------------------------------------
 # Release metadata
 # ---------------------------------------------------------------------------
@@ -52,13 +53,7 @@ def get_release_date(args):
 
 def load_project_meta():
     """Pull version/title from modules.yaml or fall back to defaults."""
-    modules_path = DATA / "modules.yaml"
-    if modules_path.exists():
-        with open(modules_path, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-        meta = data if isinstance(data, dict) else {}
-        return meta.get("metadata", {})
-    return {}
+    return Corpus().metadata("modules").get("metadata", {})
 
 
 # ---------------------------------------------------------------------------
@@ -107,8 +102,9 @@ def order_key(filename, patterns):
     return (len(patterns), 0, stem)
 
 
-def collect_briefs():
-    files = [f for f in OUTPUT.glob("*.md") if not f.stem.startswith("APPENDIX_VARIABLES")
+def collect_briefs(documents):
+    files = [Path(name) for name in documents]
+    files = [f for f in files if not f.stem.startswith("APPENDIX_VARIABLES")
              and not f.stem.startswith("APPENDIX_GAPS")]
     brief_files = [f for f in files if any(
         re.match(pat, f.stem, re.IGNORECASE) for pat in BRIEF_ORDER_PATTERNS
@@ -116,8 +112,8 @@ def collect_briefs():
     return sorted(brief_files, key=lambda f: order_key(f, BRIEF_ORDER_PATTERNS))
 
 
-def collect_content_modules():
-    files = list(OUTPUT.glob("*.md"))
+def collect_content_modules(documents):
+    files = [Path(name) for name in documents]
     content_files = [f for f in files if any(
         re.match(pat, f.stem, re.IGNORECASE) for pat in CONTENT_ORDER_PATTERNS
     )]
@@ -128,24 +124,13 @@ def collect_content_modules():
 # Appendix data from YAML
 # ---------------------------------------------------------------------------
 
-def load_entries(path):
-    if not path.exists():
-        return []
-    with open(path, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
-    if isinstance(data, dict) and "entries" in data:
-        return data["entries"]
-    if isinstance(data, list):
-        return data
-    return []
-
-
-def build_appendix_html():
+def build_appendix_html(corpus=None):
     """Render compact reference appendix tables from YAML data."""
+    corpus = corpus or Corpus()
     sections = []
 
     # --- Key Variables ---
-    variables = load_entries(DATA / "variables.yaml")
+    variables = corpus.entries("variables")
     if variables:
         rows = ""
         for v in variables:
@@ -162,7 +147,7 @@ def build_appendix_html():
 </table>""")
 
     # --- Analytical Gaps ---
-    gaps = load_entries(DATA / "gaps.yaml")
+    gaps = corpus.entries("gaps")
     if gaps:
         rows = ""
         for g in gaps:
@@ -179,7 +164,7 @@ def build_appendix_html():
 </table>""")
 
     # --- Traps ---
-    traps = load_entries(DATA / "traps.yaml")
+    traps = corpus.entries("traps")
     if traps:
         rows = ""
         for t in traps:
@@ -198,7 +183,7 @@ def build_appendix_html():
 </table>""")
 
     # --- Observations ---
-    observations = load_entries(DATA / "observations.yaml")
+    observations = corpus.entries("observations")
     if observations:
         rows = ""
         for o in observations:
@@ -229,23 +214,42 @@ def md_to_html(md_text):
     )
 
 
+# Links between output files ("§" references, see anchors.py)
+MD_LINK = re.compile(r'<a href="([^"#/:]+)\.md#([^"]+)">(.*?)</a>', re.S)
+
+
+def local_links(html, stems):
+    """Point links into bundled files at their anchor in this document; links
+    into files the bundle leaves out become plain text."""
+    def relink(m):
+        if m.group(1) in stems:
+            return f'<a href="#{m.group(2)}">{m.group(3)}</a>'
+        return m.group(3)
+    return MD_LINK.sub(relink, html)
+
+
 def read_md_file(path):
     with open(path, "r", encoding="utf-8") as f:
         return f.read()
 
 
+def load_output_documents():
+    """Read every rendered markdown file in output/ (filename -> markdown)."""
+    return {f.name: read_md_file(f) for f in sorted(OUTPUT.glob("*.md"))}
+
+
 # ---------------------------------------------------------------------------
 # TOC extraction
 # ---------------------------------------------------------------------------
 
-def extract_toc_entries(files):
+def extract_toc_entries(files, documents):
     """
     Extract (anchor_id, display_title, level) from the first H1 of each file.
     Returns list of dicts.
     """
     entries = []
     for f in files:
-        text = read_md_file(f)
+        text = documents[f.name]
         for line in text.splitlines():
             line = line.strip()
             if line.startswith("# "):
@@ -648,6 +652,7 @@ def assemble_html(cover_html, toc_html, body_sections, appendix_html, doc_title)
 def render_pdf(html_content, output_path):
     from weasyprint import HTML, CSS
     print(f"  Rendering PDF... this may take 30-60 seconds for large documents.")
+    output_path.parent.mkdir(exist_ok=True)
     doc = HTML(string=html_content, base_url=str(BASE))
     doc.write_pdf(str(output_path))
     size_mb = output_path.stat().st_size / (1024 * 1024)
@@ -658,11 +663,11 @@ def render_pdf(html_content, output_path):
 # Build tiers
 # ---------------------------------------------------------------------------
 
-def build_tier1(release_date, version_tag):
+def build_tier1(release_date, version_tag, documents, corpus=None):
     """Tier 1: Public briefs bundle."""
     print("\n--- Building Tier 1: Public Briefs Bundle ---")
 
-    brief_files = collect_briefs()
+    brief_files = collect_briefs(documents)
     if not brief_files:
         print("  ⚠️  No brief files found in output/. Run build.py first.")
         return
@@ -672,17 +677,18 @@ def build_tier1(release_date, version_tag):
         print(f"    {f.name}")
 
     # TOC
-    toc_entries = extract_toc_entries(brief_files)
+    toc_entries = extract_toc_entries(brief_files, documents)
     toc_html = build_toc_html(toc_entries)
 
     # Body
+    stems = {f.stem for f in brief_files}
     body_sections = []
     for f in brief_files:
-        md = read_md_file(f)
-        body_sections.append((md_to_html(md), f.stem))
+        md = documents[f.name]
+        body_sections.append((local_links(md_to_html(md), stems), f.stem))
 
     # Appendix
-    appendix_html = build_appendix_html()
+    appendix_html = build_appendix_html(corpus)
 
     # Cover
     cover_html = build_cover_html(
@@ -706,12 +712,12 @@ def build_tier1(release_date, version_tag):
     return out_path
 
 
-def build_tier2(release_date, version_tag):
+def build_tier2(release_date, version_tag, documents, corpus=None):
     """Tier 2: Full analytical reference bundle."""
     print("\n--- Building Tier 2: Full Reference Bundle ---")
 
-    brief_files  = collect_briefs()
-    module_files = collect_content_modules()
+    brief_files  = collect_briefs(documents)
+    module_files = collect_content_modules(documents)
 
     all_files = brief_files + module_files
     if not all_files:
@@ -723,8 +729,8 @@ def build_tier2(release_date, version_tag):
     print(f"  Total:   {len(all_files)} files")
 
     # TOC — two sections
-    brief_toc  = extract_toc_entries(brief_files)
-    module_toc = extract_toc_entries(module_files)
+    brief_toc  = extract_toc_entries(brief_files, documents)
+    module_toc = extract_toc_entries(module_files, documents)
 
     toc_items = ""
     if brief_toc:
@@ -744,13 +750,14 @@ def build_tier2(release_date, version_tag):
 </div>"""
 
     # Body
+    stems = {f.stem for f in all_files}
     body_sections = []
     for f in all_files:
-        md = read_md_file(f)
-        body_sections.append((md_to_html(md), f.stem))
+        md = documents[f.name]
+        body_sections.append((local_links(md_to_html(md), stems), f.stem))
 
     # Appendix
-    appendix_html = build_appendix_html()
+    appendix_html = build_appendix_html(corpus)
 
     # Cover
     cover_html = build_cover_html(
@@ -778,8 +785,34 @@ def build_tier2(release_date, version_tag):
 # Entry point
 # ---------------------------------------------------------------------------
 
+def build_release(documents, release_date, briefs_only=False, full_only=False, corpus=None):
+    """Build the requested tiers from rendered markdown (filename -> text)."""
+    version_tag = f"v{release_date}"
+    built = []
+
+    if not full_only:
+        p = build_tier1(release_date, version_tag, documents, corpus)
+        if p:
+            built.append(p)
+
+    if not briefs_only:
+        p = build_tier2(release_date, version_tag, documents, corpus)
+        if p:
+            built.append(p)
+
+    print(f"\n{'='*50}")
+    print(f"PDF release build complete.")
+    print(f"Files in releases/:")
+    for p in built:
+        size_mb = p.stat().st_size / (1024 * 1024)
+        print(f"  {p.name}  ({size_mb:.1f} MB)")
+    print(f"\nNext step: Create a GitHub Release tagged {version_tag}")
+    print(f"and attach the PDF files from releases/ as release assets.")
+    return built
+
+
 def main():
-    args = sys.argv[1:]
+    args = cache.strip_cache_flag(sys.argv[1:])
     release_date = get_release_date(args)
     version_tag  = f"v{release_date}"
 
@@ -795,33 +828,14 @@ def main():
         print("    Run `python build.py` first to generate markdown files.")
         sys.exit(1)
 
-    md_count = len(list(OUTPUT.glob("*.md")))
-    if md_count == 0:
+    documents = load_output_documents()
+    if not documents:
         print(f"\n❌  No .md files in output/. Run `python build.py` first.")
         sys.exit(1)
 
-    print(f"Found {md_count} markdown files in output/")
-
-    built = []
-
-    if not full_only:
-        p = build_tier1(release_date, version_tag)
-        if p:
-            built.append(p)
-
-    if not briefs_only:
-        p = build_tier2(release_date, version_tag)
-        if p:
-            built.append(p)
+    print(f"Found {len(documents)} markdown files in output/")
 
-    print(f"\n{'='*50}")
-    print(f"PDF release build complete.")
-    print(f"Files in releases/:")
-    for p in built:
-        size_mb = p.stat().st_size / (1024 * 1024)
-        print(f"  {p.name}  ({size_mb:.1f} MB)")
-    print(f"\nNext step: Create a GitHub Release tagged {version_tag}")
-    print(f"and attach the PDF files from releases/ as release assets.")
+    build_release(documents, release_date, briefs_only, full_only)
 
 
 if __name__ == "__main__":
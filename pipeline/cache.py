@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+cache.py - Content-hash keyed cache of parsed YAML documents.
+
+Every pipeline stage parses the same data files. This module keeps the parsed
+form of each file on disk under .cache/parsed/, keyed by the SHA-256 of the
+file contents plus the loader version (see loader.py), so an unchanged file
+is parsed at most once no matter how many stages (or runs) read it. Within a
+process, documents are also memoised in memory.
+
+Cached documents are stored pickled; every lookup returns a fresh copy, so
+callers may mutate what they get back without affecting other callers.
+
+Usage:
+    python cache.py stats               # cumulative hit/miss statistics
+    python cache.py clear               # delete all cached documents
+
+Set ITP_NO_CACHE=1 (or pass --no-cache to validate.py / build.py /
+build_pdf.py) to bypass the cache entirely. ITP_CACHE_DIR overrides the
+cache location (default: .cache/ in the repository root).
+"""
+
+import os
+import sys
+import json
+import atexit
+import pickle
+import hashlib
+import tempfile
+import contextlib
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+BASE = Path(__file__).parent.parent
+CACHE_DIR = Path(os.environ.get("ITP_CACHE_DIR", BASE / ".cache"))
+PARSED_DIR = CACHE_DIR / "parsed"
+STATS_FILE = CACHE_DIR / "stats.json"
+STATS_LOCK = CACHE_DIR / "stats.lock"
+
+_enabled = os.environ.get("ITP_NO_CACHE", "") in ("", "0")
+_memory = {}  # cache key -> pickled document
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+# Returned by lookup() when a document is not cached (None is a valid document).
+MISS = object()
+
+
+def disable():
+    """Bypass the cache for the rest of this process (--no-cache)."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def strip_cache_flag(args: list) -> list:
+    """Handle a --no-cache CLI flag; return args without it."""
+    if "--no-cache" in args:
+        disable()
+    return [a for a in args if a != "--no-cache"]
+
+
+def cache_key(raw: bytes, version: str) -> str:
+    """Key a document by loader version and file content."""
+    h = hashlib.sha256(version.encode("utf-8"))
+    h.update(b"\0")
+    h.update(raw)
+    return h.hexdigest()
+
+
+def write_atomic(path: Path, payload: bytes):
+    """Write via a temp file + rename so concurrent readers never see partial data."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def _disk_path(key: str) -> Path:
+    return PARSED_DIR / key[:2] / f"{key}.pickle"
+
+
+def lookup(raw: bytes, version: str):
+    """Cached document for raw under version, or MISS."""
+    if not _enabled:
+        return MISS
+    key = cache_key(raw, version)
+    payload = _memory.get(key)
+    if payload is not None:
+        _stats["memory_hits"] += 1
+        return pickle.loads(payload)
+
+    try:
+        with open(_disk_path(key), "rb") as f:
+            payload = f.read()
+        data = pickle.loads(payload)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        _stats["misses"] += 1
+        return MISS
+    _stats["disk_hits"] += 1
+    _memory[key] = payload
+    return data
+
+
+def store(raw: bytes, version: str, data):
+    """Cache data as the parsed form of raw under version."""
+    if not _enabled:
+        return
+    key = cache_key(raw, version)
+    payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+    _memory[key] = payload
+    write_atomic(_disk_path(key), payload)
+
+
+def load_document(path: Path, parse, version: str):
+    """Return parse(raw bytes of path), using the cache when possible.
+
+    version must change whenever parse() would produce a different result
+    for the same input.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    data = lookup(raw, version)
+    if data is MISS:
+        data = parse(raw)
+        store(raw, version, data)
+    return data
+
+
+def run_stats() -> dict:
+    """Hit/miss counters for the current process."""
+    return dict(_stats)
+
+
+def _read_totals() -> dict:
+    try:
+        with open(STATS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+@contextlib.contextmanager
+def _locked(path: Path):
+    """Hold an exclusive lock on path (created if missing) for the block."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@atexit.register
+def _flush_stats():
+    """Fold this process's counters into the cumulative stats file.
+
+    Worker processes flush at exit too, so the read-modify-write happens
+    under a lock; otherwise concurrent flushes would drop each other's counts.
+    """
+    if not _enabled or not any(_stats.values()):
+        return
+    with _locked(STATS_LOCK):
+        totals = _read_totals()
+        for k, v in _stats.items():
+            totals[k] = totals.get(k, 0) + v
+        totals["runs"] = totals.get("runs", 0) + 1
+        write_atomic(STATS_FILE, json.dumps(totals, indent=2).encode("utf-8"))
+    for k in _stats:
+        _stats[k] = 0
+
+
+def print_stats():
+    from loader import LOADER_VERSION
+    totals = _read_totals()
+    entries = list(PARSED_DIR.glob("*/*.pickle")) if PARSED_DIR.exists() else []
+    size = sum(p.stat().st_size for p in entries)
+    hits = totals.get("memory_hits", 0) + totals.get("disk_hits", 0)
+    lookups = hits + totals.get("misses", 0)
+    rate = f"{100 * hits / lookups:.1f}%" if lookups else "n/a"
+
+    print(f"Parse cache: {CACHE_DIR}")
+    print(f"  Loader version: {LOADER_VERSION}")
+    print(f"  Documents:      {len(entries)} ({size / 1024:.0f} KiB)")
+    print(f"  Runs recorded:  {totals.get('runs', 0)}")
+    print(f"  Memory hits:    {totals.get('memory_hits', 0)}")
+    print(f"  Disk hits:      {totals.get('disk_hits', 0)}")
+    print(f"  Misses:         {totals.get('misses', 0)}")
+    print(f"  Hit rate:       {rate}")
+
+
+def clear():
+    import shutil
+    if PARSED_DIR.exists():
+        shutil.rmtree(PARSED_DIR)
+    for path in (STATS_FILE, STATS_LOCK):
+        if path.exists():
+            path.unlink()
+    print(f"Cleared parse cache at {CACHE_DIR}")
+
+
+def main():
+    args = sys.argv[1:]
+    command = args[0] if args else "stats"
+    if command == "stats":
+        print_stats()
+    elif command == "clear":
+        clear()
+    else:
+        print(__doc__)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
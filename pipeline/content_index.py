@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+content_index.py - Header index and lazy loading for content modules.
+
+Most consumers of data/content/*.yaml only need a module's header — code,
+version, date, dependencies, section IDs and titles — not its prose. This
+module keeps a small header index (.cache/content_headers.pickle), refreshed
+per file by content hash (a file's stat is trusted only if it was last
+modified before the index was written, as in manifest.py), and wraps each module in a LazyModule whose section
+bodies are parsed only when something (a template, a validator, a query)
+actually touches them.
+
+Usage:
+    python content_index.py             # list modules from the header index
+    python content_index.py ITB-B       # section outline of one module
+    python itp.py modules [ITB-B ...]   # same, through the itp driver
+"""
+
+import os
+import sys
+import pickle
+import hashlib
+from pathlib import Path
+from collections.abc import Mapping
+
+import cache
+from loader import load_yaml, load_many
+
+BASE = Path(__file__).parent.parent
+CONTENT_DIR = BASE / "data" / "content"
+INDEX_PATH = cache.CACHE_DIR / "content_headers.pickle"
+
+# Bump whenever the header layout changes.
+INDEX_VERSION = 3
+
+# Top-level keys that hold prose; everything else is kept in the header.
+BODY_KEYS = ("sections", "preamble", "footer")
+
+
+def build_header(doc) -> dict:
+    """Header record for one parsed content document."""
+    if doc is None:
+        return {"kind": "empty"}
+    if not isinstance(doc, dict):
+        return {"kind": "other"}
+    outline = []
+
+    def walk(sections, depth):
+        for section in sections or []:
+            if isinstance(section, dict):
+                outline.append((section.get("id"), section.get("title"),
+                                section.get("level"), depth, section.get("tags")))
+                walk(section.get("subsections"), depth + 1)
+
+    walk(doc.get("sections"), 0)
+    return {
+        "kind": "mapping",
+        "fields": {k: v for k, v in doc.items() if k not in BODY_KEYS},
+        "keys": list(doc.keys()),
+        "outline": outline,
+    }
+
+
+class LazyModule(Mapping):
+    """Read-only view of a content module that parses its body on demand.
+
+    Header fields are answered from the index. Any other key materializes
+    the full document (through the parse cache) once and keeps it.
+    """
+
+    __slots__ = ("path", "_header", "_doc")
+
+    def __init__(self, path: Path, header: dict):
+        self.path = path
+        self._header = header
+        self._doc = None
+
+    @property
+    def module_code(self) -> str:
+        return self._header["fields"].get("module_code", "")
+
+    @property
+    def outline(self) -> list:
+        """(section_id, title, level, depth, tags) for every section, depth-first."""
+        return self._header["outline"]
+
+    @property
+    def section_ids(self) -> list:
+        return [sid for sid, *_ in self.outline if sid is not None]
+
+    @property
+    def materialized(self) -> bool:
+        return self._doc is not None
+
+    def document(self) -> dict:
+        """The full parsed document."""
+        if self._doc is None:
+            self._doc = load_yaml(self.path)
+        return self._doc
+
+    def __getitem__(self, key):
+        fields = self._header["fields"]
+        if key in fields:
+            return fields[key]
+        if key not in self._header["keys"]:
+            raise KeyError(key)
+        return self.document()[key]
+
+    def __contains__(self, key):
+        return key in self._header["keys"]
+
+    def __iter__(self):
+        return iter(self._header["keys"])
+
+    def __len__(self):
+        return len(self._header["keys"])
+
+    def __repr__(self):
+        state = "loaded" if self.materialized else "lazy"
+        return f"<LazyModule {self.module_code or self.path.name} ({state})>"
+
+
+def materialize(doc):
+    """Full document for a LazyModule; anything else is returned unchanged."""
+    return doc.document() if isinstance(doc, LazyModule) else doc
+
+
+def materialize_all(modules):
+    """Load the bodies of several LazyModules at once (see loader.load_many)."""
+    pending = {m.path: m for m in modules if isinstance(m, LazyModule) and not m.materialized}
+    for path, doc in load_many(pending).items():
+        pending[path]._doc = doc
+
+
+class HeaderIndex:
+    """Persistent content-hash keyed index of module headers."""
+
+    def __init__(self, path: Path = INDEX_PATH):
+        self.path = path
+        self.records = {}
+        self.dirty = False
+        self.written = 0     # mtime_ns of the index file when it was loaded or saved
+        try:
+            with open(path, "rb") as f:
+                stored = pickle.load(f)
+            if stored.get("version") == INDEX_VERSION:
+                self.records = stored["records"]
+                self.written = os.stat(path).st_mtime_ns
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+            pass
+
+    def lookup(self, path: Path):
+        """Indexed header for path, or None if the file's content changed."""
+        key = str(path.resolve())
+        st = os.stat(path)
+        record = self.records.get(key)
+        if not record:
+            return None
+        if (record["mtime_ns"] == st.st_mtime_ns and record["ctime_ns"] == st.st_ctime_ns
+                and record["size"] == st.st_size and st.st_mtime_ns < self.written):
+            return record["header"]
+        if record["sha256"] != _sha256(path):
+            return None
+        record.update(mtime_ns=st.st_mtime_ns, ctime_ns=st.st_ctime_ns, size=st.st_size)
+        self.dirty = True    # a save makes a racy record trusted next time
+        return record["header"]
+
+    def record(self, path: Path, doc) -> dict:
+        """Index the header of a freshly parsed document and return it."""
+        st = os.stat(path)
+        header = build_header(doc)
+        self.records[str(path.resolve())] = {"mtime_ns": st.st_mtime_ns, "ctime_ns": st.st_ctime_ns,
+                                             "size": st.st_size, "sha256": _sha256(path),
+                                             "header": header}
+        self.dirty = True
+        return header
+
+    def save(self):
+        if not self.dirty or not cache.is_enabled():
+            return
+        payload = pickle.dumps({"version": INDEX_VERSION, "records": self.records},
+                               protocol=pickle.HIGHEST_PROTOCOL)
+        cache.write_atomic(self.path, payload)
+        self.written = os.stat(self.path).st_mtime_ns
+        self.dirty = False
+
+
+def load_module(path: Path):
+    """One content module, parsed now (for reloading a single changed file)."""
+    doc = load_yaml(path)
+    header = build_header(doc)
+    if header["kind"] != "mapping":
+        return doc
+    module = LazyModule(path, header)
+    module._doc = doc
+    return module
+
+
+def _sha256(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_modules(directory: Path = CONTENT_DIR) -> dict:
+    """Content modules in sorted filename order, keyed by path.
+
+    Values are LazyModule objects; empty files map to None, and documents
+    that are not mappings are loaded eagerly so validation can report them.
+    """
+    if not directory.exists():
+        return {}
+    index = HeaderIndex()
+    paths = sorted(directory.glob("*.yaml"))
+    headers = {p: index.lookup(p) if cache.is_enabled() else None for p in paths}
+    # Files without a current header are parsed together; their documents
+    # are kept so the modules start out materialized.
+    parsed = load_many([p for p, header in headers.items() if header is None])
+
+    modules = {}
+    for path in paths:
+        header = headers[path] or index.record(path, parsed[path])
+        if header["kind"] == "empty":
+            modules[path] = None
+        elif header["kind"] == "other":
+            modules[path] = parsed[path] if path in parsed else load_yaml(path)
+        else:
+            modules[path] = LazyModule(path, header)
+            if path in parsed:
+                modules[path]._doc = parsed[path]
+    index.save()
+    return modules
+
+
+def run_modules(args: list) -> int:
+    """CLI for `content_index.py` / `itp modules`. Returns an exit code."""
+    modules = load_modules()
+    if args:
+        wanted = set(args)
+        found = set()
+        for module in modules.values():
+            if isinstance(module, LazyModule) and module.module_code in wanted:
+                found.add(module.module_code)
+                print(f"{module.module_code} v{module.get('version', '?')} — {module.get('title', '')}")
+                for sid, title, _, depth, _ in module.outline:
+                    print(f"  {'  ' * depth}§{sid} {title}")
+        missing = wanted - found
+        if missing:
+            print(f"❌ Unknown module code(s): {', '.join(sorted(missing))}")
+            return 1
+        return 0
+    for path, module in modules.items():
+        if not isinstance(module, LazyModule):
+            print(f"{path.name:<24} (unindexed)")
+            continue
+        print(f"{module.module_code:<12} v{str(module.get('version', '?')):<6} "
+              f"{str(module.get('date', '')):<12} {len(module.outline):>3} sections  {path.name}")
+    return 0
+
+
+def main():
+    sys.exit(run_modules(cache.strip_cache_flag(sys.argv[1:])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+corpus.py - In-memory view of everything the pipeline reads from data/.
+
+A Corpus is created once per pipeline run and handed to validation, markdown
+rendering and PDF assembly, so each file is parsed at most once per process.
+Parts are loaded lazily on first access and then kept, which lets the
+single-purpose scripts (validate.py, build.py, build_pdf.py) share the same
+object without paying for data they never touch.
+
+Files are read through a source: the working tree (loader.FILES) by
+default, or the blobs of any commit (gitstore.GitSource), so validation and
+rendering can run against a past revision without checking it out.
+
+Documents returned by the corpus are shared. Callers that need to modify one
+(e.g. to add display-only fields before rendering) must copy it first.
+"""
+
+from pathlib import Path
+
+from loader import iter_entries, FILES
+from content_index import load_modules, load_module
+from anchors import SectionIndex
+from models import to_models
+import shards
+
+BASE = Path(__file__).parent.parent
+DATA = BASE / "data"
+
+# Map entity type -> (data file, schema file, id field)
+ENTITY_MAP = {
+    "variables":    ("variables.yaml",    "variable.schema.json",    "id"),
+    "gaps":         ("gaps.yaml",         "gap.schema.json",         "id"),
+    "traps":        ("traps.yaml",        "trap.schema.json",        "id"),
+    "observations": ("observations.yaml", "observation.schema.json", "id"),
+    "scenarios":    ("scenarios.yaml",    "scenario.schema.json",    "id"),
+    "sessions":     ("sessions.yaml",     "session.schema.json",     "number"),
+    "modules":      ("modules.yaml",      "module.schema.json",      "code"),
+}
+
+
+class Corpus:
+    """Entities, metadata, content modules and briefs, loaded once."""
+
+    def __init__(self, data_dir: Path = DATA, source=FILES):
+        self.data_dir = data_dir
+        self.content_dir = data_dir / "content"
+        self.briefs_dir = data_dir / "briefs"
+        self.schemas_dir = data_dir.parent / "schemas"
+        self.templates_dir = data_dir.parent / "templates"
+        self.source = source
+        self._documents = {}
+        self._models = {}
+        self._content = None
+        self._briefs = None
+        self._sections = None
+
+    @classmethod
+    def load(cls, data_dir: Path = DATA, source=FILES) -> "Corpus":
+        """Eagerly load the whole data tree."""
+        corpus = cls(data_dir, source)
+        for entity_type in ENTITY_MAP:
+            corpus.document(entity_type)
+        corpus.index_meta
+        corpus.content
+        corpus.briefs
+        return corpus
+
+    # --- Entity files -------------------------------------------------------
+
+    def path(self, entity_type: str) -> Path:
+        return self.data_dir / ENTITY_MAP[entity_type][0]
+
+    def shard_dir(self, entity_type: str) -> Path:
+        """Directory form of an entity file (see shards.py)."""
+        return shards.shard_dir(self.data_dir, ENTITY_MAP[entity_type][0])
+
+    def is_sharded(self, entity_type: str) -> bool:
+        return shards.is_sharded(self.shard_dir(entity_type), self.source)
+
+    def exists(self, entity_type: str) -> bool:
+        return self.is_sharded(entity_type) or self.source.exists(self.path(entity_type))
+
+    def files(self, entity_type: str) -> list:
+        """The files an entity type is read from (one file, or _meta.yaml and its shards)."""
+        if self.is_sharded(entity_type):
+            directory = self.shard_dir(entity_type)
+            return [directory / shards.META_FILE] + shards.shard_paths(directory, self.source)
+        return [self.path(entity_type)]
+
+    def document(self, entity_type: str):
+        """Full parsed document for an entity file (None if missing or empty).
+
+        Sharded entity types are assembled from their directory.
+        """
+        if entity_type not in self._documents:
+            if self.is_sharded(entity_type):
+                self._documents[entity_type] = shards.load_sharded(self.shard_dir(entity_type),
+                                                                   self.source)
+            else:
+                self._documents[entity_type] = self.source.load(self.path(entity_type))
+        return self._documents[entity_type]
+
+    def entries(self, entity_type: str) -> list:
+        """The entries list of an entity file."""
+        data = self.document(entity_type)
+        if isinstance(data, dict) and "entries" in data:
+            return data["entries"]
+        if isinstance(data, list):
+            return data
+        return []
+
+    def models(self, entity_type: str) -> list:
+        """The entries of an entity file as typed models (see models.py)."""
+        if entity_type not in self._models:
+            self._models[entity_type] = to_models(entity_type, self.entries(entity_type))
+        return self._models[entity_type]
+
+    def iter_entries(self, entity_type: str):
+        """Walk the entries of an entity file once.
+
+        Uses the loaded document if there is one; otherwise streams the file
+        entry by entry without keeping it, so single-pass callers (validation,
+        cross-reference checks) don't hold the whole file in memory.
+        Other sources load the document.
+        """
+        if entity_type in self._documents:
+            return iter(self.entries(entity_type))
+        if self.is_sharded(entity_type):
+            return shards.iter_sharded(self.shard_dir(entity_type), self.source)
+        if self.source is not FILES:
+            return iter(self.entries(entity_type))
+        return iter_entries(self.path(entity_type))
+
+    def metadata(self, entity_type: str) -> dict:
+        """Top-level metadata of an entity file (everything except entries)."""
+        data = self.document(entity_type)
+        if isinstance(data, dict):
+            return {k: v for k, v in data.items() if k != "entries"}
+        return {}
+
+    @property
+    def index_meta(self) -> dict:
+        if "index_meta" not in self._documents:
+            self._documents["index_meta"] = self.source.load(self.data_dir / "index_meta.yaml") or {}
+        return self._documents["index_meta"]
+
+    # --- Content modules and briefs ----------------------------------------
+
+    @property
+    def content(self) -> dict:
+        """Content modules keyed by path, in sorted filename order.
+
+        Values are content_index.LazyModule objects: header fields are
+        served from the header index, section bodies are parsed on first use.
+        Other sources return plain documents.
+        """
+        if self._content is None:
+            if self.source is FILES:
+                self._content = load_modules(self.content_dir)
+            else:
+                self._content = self.source.load_many(self.source.glob(self.content_dir))
+        return self._content
+
+    @property
+    def briefs(self) -> dict:
+        """Brief documents keyed by path, in sorted filename order.
+
+        Files missing from the parse cache are parsed in parallel.
+        """
+        if self._briefs is None:
+            self._briefs = self.source.load_many(self.source.glob(self.briefs_dir))
+        return self._briefs
+
+    @property
+    def sections(self) -> SectionIndex:
+        """Section anchors of every content module and brief (see anchors.py)."""
+        if self._sections is None:
+            self._sections = SectionIndex.from_corpus(self)
+        return self._sections
+
+    # --- Schemas and templates ------------------------------------------------
+
+    def schema(self, filename: str):
+        """Parsed schemas/<filename> (None if missing)."""
+        path = self.schemas_dir / filename
+        return self.source.load_json(path) if self.source.exists(path) else None
+
+    def template_loader(self):
+        """Jinja2 loader for templates/ as this corpus's source sees it."""
+        return self.source.template_loader(self.templates_dir)
+
+
+    # --- Reloading -----------------------------------------------------------
+
+    def invalidate(self, path: Path):
+        """Drop whatever was loaded from path so the next access re-reads it.
+
+        Returns what the file feeds — ("entity", type), ("content", path),
+        ("brief", path) or ("index_meta", None) — or None if the corpus
+        does not read it.
+        """
+        path = Path(path).resolve()
+        try:
+            rel = path.relative_to(self.data_dir.resolve())
+        except ValueError:
+            return None
+        if rel.suffix != ".yaml":
+            return None
+        parts = rel.parts
+
+        if parts == ("index_meta.yaml",):
+            self._documents.pop("index_meta", None)
+            return ("index_meta", None)
+
+        for entity_type, (filename, _, _) in ENTITY_MAP.items():
+            if parts == (filename,) or (len(parts) == 2 and parts[0] == Path(filename).stem):
+                self._documents.pop(entity_type, None)
+                self._models.pop(entity_type, None)
+                return ("entity", entity_type)
+
+        if len(parts) == 2 and parts[0] in ("content", "briefs"):
+            kind = parts[0]
+            key = (self.content_dir if kind == "content" else self.briefs_dir) / parts[1]
+            loaded = self._content if kind == "content" else self._briefs
+            if loaded is not None:
+                if key.exists():
+                    loaded[key] = load_module(key) if kind == "content" else self.source.load(key)
+                else:
+                    loaded.pop(key, None)
+                ordered = dict(sorted(loaded.items()))
+                loaded.clear()
+                loaded.update(ordered)
+            if self._sections is not None:
+                self._sections.update(key, (loaded or {}).get(key),
+                                      kind="content" if kind == "content" else "brief")
+            return ("content" if kind == "content" else "brief", key)
+        return None
+
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+depgraph.py - Module dependency graph: symmetry, cycles, orphans, build order.
+
+Modules declare what they build on in two places: the `dependencies` of their
+entry in data/modules.yaml, and the `dependencies` / `referenced_by` of their
+content file (data/content/). Content lists are free text ("ITB-A (IRGC
+institutional structure)", "ISA-TRAPS Trap 9+10"); the module code an item
+starts with is what counts, and items that name no module ("All ITB
+pillars", "Brief candidates") are skipped.
+
+The graph is built once, with an edge A -> B for every "A depends on B",
+and checked in O(V+E):
+
+- symmetry: a content file lists B in `dependencies` but B's content file
+  doesn't list it in `referenced_by`, or the other way round;
+- cycles: strongly connected components of more than one module (Tarjan);
+- unregistered codes: declared dependencies on modules not in modules.yaml;
+- orphans: registered modules nothing depends on and that depend on nothing.
+
+Findings are warnings: validate.py prints a one-line summary of them after
+the cross-reference check, without failing the run; `itp deps` lists them.
+topological_order() gives a build order with every module after the modules
+it depends on (a cycle's members together).
+
+Usage:
+    python depgraph.py                  # report
+    python depgraph.py order            # modules in dependency order
+    python depgraph.py ITB-A10          # dependencies and dependents of one module
+"""
+
+import re
+import sys
+from collections import defaultdict
+
+import cache
+from corpus import Corpus
+
+# The module code a dependency item starts with
+MODULE_CODE = re.compile(r"([A-Z0-9]+(?:-[A-Z0-9]+)*)(?![\w-])")
+
+
+def item_code(item, registered) -> str:
+    """Module code a dependency item names, or None.
+
+    Codes without a hyphen ("INDEX") count only when registered, so words such
+    as "All" or "None" are not taken for modules.
+    """
+    if not isinstance(item, str):
+        return None
+    m = MODULE_CODE.match(item.strip())
+    if not m:
+        return None
+    code = m.group(1)
+    return code if "-" in code or code in registered else None
+
+
+def declared_codes(items, registered) -> list:
+    """Module codes named by a dependencies / referenced_by list, in order, once each."""
+    codes = (item_code(item, registered) for item in items or [] if isinstance(items, list))
+    return list(dict.fromkeys(code for code in codes if code))
+
+
+class ModuleGraph:
+    """Modules and the dependencies between them, with adjacency in both directions."""
+
+    def __init__(self, registered):
+        self.registered = list(registered)
+        self.nodes = dict.fromkeys(self.registered)    # every code seen, in first-seen order
+        self.deps = defaultdict(dict)       # code -> {dependency: source}
+        self.dependents = defaultdict(dict)  # code -> {dependent: source}
+        self.content = {}                    # code -> (dependencies, referenced_by) of its content file
+
+    @classmethod
+    def build(cls, corpus: Corpus = None) -> "ModuleGraph":
+        corpus = corpus or Corpus()
+        registry = list(corpus.iter_entries("modules"))
+        graph = cls(str(entry.get("code", "")) for entry in registry)
+        registered = set(graph.registered)
+        for entry in registry:
+            code = str(entry.get("code", ""))
+            for dep in declared_codes(entry.get("dependencies"), registered):
+                graph.add(code, dep, "modules.yaml")
+        for path, module in corpus.content.items():
+            if not isinstance(module, dict) and not hasattr(module, "module_code"):
+                continue
+            code = str(module.get("module_code") or path.stem)
+            deps = declared_codes(module.get("dependencies"), registered)
+            users = declared_codes(module.get("referenced_by"), registered)
+            graph.content[code] = (deps, users)
+            for dep in deps:
+                graph.add(code, dep, path.name)
+            for user in users:
+                graph.add(user, code, path.name)
+        return graph
+
+    def add(self, code: str, dependency: str, source: str):
+        """code depends on dependency, as declared in source."""
+        if code == dependency:
+            return
+        self.nodes.setdefault(code)
+        self.nodes.setdefault(dependency)
+        self.deps[code].setdefault(dependency, source)
+        self.dependents[dependency].setdefault(code, source)
+
+    # --- Checks -----------------------------------------------------------------
+
+    def asymmetric(self) -> list:
+        """(code, field, other) where code's content file lists other but other's doesn't list code back."""
+        found = []
+        for code, (deps, users) in self.content.items():
+            for dep in deps:
+                if dep in self.content and code not in self.content[dep][1]:
+                    found.append((code, "dependencies", dep))
+            for user in users:
+                if user in self.content and code not in self.content[user][0]:
+                    found.append((code, "referenced_by", user))
+        return found
+
+    def unregistered(self) -> list:
+        """(code, source) for every module named in a declaration but missing from modules.yaml."""
+        registered = set(self.registered)
+        found = {}
+        for code in self.nodes:
+            if code in registered:
+                continue
+            sources = list(self.deps.get(code, {}).values()) + list(self.dependents.get(code, {}).values())
+            found[code] = sources[0] if sources else "?"
+        return list(found.items())
+
+    def orphans(self) -> list:
+        """Registered modules with no dependencies and no dependents."""
+        return [code for code in self.registered
+                if not self.deps.get(code) and not self.dependents.get(code)]
+
+    def components(self) -> list:
+        """Strongly connected components (Tarjan), each listed dependencies first.
+
+        Iterative, so deep chains don't hit the recursion limit. Components
+        come out in reverse topological order of the dependency edges: every
+        component after all the components it depends on.
+        """
+        index = {}
+        low = {}
+        on_stack = set()
+        stack = []
+        result = []
+        counter = 0
+        for root in self.nodes:
+            if root in index:
+                continue
+            work = [(root, iter(self.deps.get(root, ())))]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                for child in children:
+                    if child not in index:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.deps.get(child, ()))))
+                        break
+                    if child in on_stack:
+                        low[node] = min(low[node], index[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        low[parent] = min(low[parent], low[node])
+                    if low[node] == index[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node:
+                                break
+                        result.append(component[::-1])
+        return result
+
+    def cycles(self) -> list:
+        """Components of more than one module."""
+        return [component for component in self.components() if len(component) > 1]
+
+    def topological_order(self) -> list:
+        """Every module after the modules it depends on; a cycle's members are adjacent."""
+        return [code for component in self.components() for code in component]
+
+    def findings(self) -> dict:
+        """Every finding as report lines, by check."""
+        found = {"asymmetric": [], "cycles": [], "unregistered": [], "orphans": []}
+        for code, field, other in self.asymmetric():
+            back = "referenced_by" if field == "dependencies" else "dependencies"
+            found["asymmetric"].append(f"  [deps] {code}: {field} lists {other}, but {other} {back} doesn't list {code}")
+        for component in self.cycles():
+            found["cycles"].append(f"  [deps] cycle: {' -> '.join(component + component[:1])}")
+        for code, source in self.unregistered():
+            found["unregistered"].append(f"  [deps] {code} (in {source}) is not in modules.yaml")
+        for code in self.orphans():
+            found["orphans"].append(f"  [deps] {code}: no dependencies and no dependents")
+        return found
+
+
+def check_module_graph(corpus: Corpus, verbose: bool = False, graph: ModuleGraph = None) -> list:
+    """validate.py's pass: print a one-line summary of the findings (all of
+    them if verbose). Returns them as report lines.
+
+    graph, if given, is used instead of building one from corpus.
+    """
+    found = (graph or ModuleGraph.build(corpus)).findings()
+    lines = [line for check in found.values() for line in check]
+    if not lines:
+        print("✅ module dependencies: OK")
+        return lines
+    counts = ", ".join(f"{len(v)} {k}" for k, v in found.items() if v)
+    print(f"⚠️  module dependencies: {counts}" + ("" if verbose else " (details: itp deps)"))
+    if verbose:
+        for line in lines:
+            print(line)
+    return lines
+
+
+def run_deps(args: list) -> int:
+    """CLI for `depgraph.py` / `itp deps`. Returns an exit code."""
+    graph = ModuleGraph.build()
+    if not args:
+        edges = sum(len(deps) for deps in graph.deps.values())
+        print(f"  {len(graph.nodes)} modules, {len(graph.registered)} registered, {edges} dependencies")
+        check_module_graph(None, verbose=True, graph=graph)
+        return 0
+    if args == ["order"]:
+        for code in graph.topological_order():
+            print(f"  {code}")
+        return 0
+    status = 0
+    for code in args:
+        if code not in graph.nodes:
+            print(f"❌ Unknown module: {code}")
+            status = 1
+            continue
+        print(f"{code}")
+        for dep, source in graph.deps.get(code, {}).items():
+            print(f"  depends on   {dep:<16} ({source})")
+        for user, source in graph.dependents.get(code, {}).items():
+            print(f"  needed by    {user:<16} ({source})")
+    return status
+
+
+def main():
+    sys.exit(run_deps(cache.strip_cache_flag(sys.argv[1:])))
+
+
+if __name__ == "__main__":
+    main()
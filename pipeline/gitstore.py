@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+gitstore.py - Read data/, schemas/ and templates/ at any git revision.
+
+A GitStore keeps one `git cat-file --batch` process open and streams commits,
+trees and blobs through it, so reading a past revision needs neither a
+checkout nor a subprocess per file. Everything is cached by object ID: a tree
+that did not change between two revisions is listed once, and a YAML blob is
+parsed once however many revisions contain it (and not at all if the parse
+cache has seen the same bytes before). Loading 30 revisions therefore costs
+little more than parsing the blobs that actually differ between them.
+
+GitSource presents one revision with the same methods as loader.FILES, so
+Corpus(source=GitSource(store, rev)) validates and renders that revision
+with the ordinary pipeline code.
+
+Usage:
+    python gitstore.py ls REV                   # files read at REV
+    python gitstore.py validate REV             # validate the corpus as of REV
+    python gitstore.py build REV [targets]      # render REV into output/rev-<commit>/
+    python gitstore.py build REV --out DIR      # ... into DIR
+    python gitstore.py bench [REV ...]          # load revisions, report parse reuse
+                                                # (default: the last 30 commits)
+"""
+
+import sys
+import json
+import fnmatch
+import time
+import subprocess
+from pathlib import Path
+
+import cache
+from loader import parse_yaml, intern_strings, strip_jobs_flag, LOADER_VERSION
+
+BASE = Path(__file__).parent.parent
+OUTPUT = BASE / "output"
+
+# Top-level directories (relative to BASE) a revision is read from
+TRACKED = ("data", "schemas", "templates")
+
+TREE_MODE = "40000"
+BLOB_MODES = ("100644", "100755")
+
+BENCH_REVISIONS = 30
+
+
+class GitError(Exception):
+    pass
+
+
+class GitStore:
+    """Object reader over one long-lived `git cat-file --batch` process."""
+
+    def __init__(self, base: Path = BASE):
+        self.base = base
+        # Where base sits inside the repository ("" when it is the top level)
+        self.prefix = self.git("rev-parse", "--show-prefix").strip()
+        self._proc = None
+        self._trees = {}     # tree oid -> {relative path: blob oid}
+        self._docs = {}      # blob oid -> parsed YAML
+        self._texts = {}     # blob oid -> decoded text
+        self._json = {}      # blob oid -> parsed JSON
+        self.parsed = 0      # YAML blobs parsed
+        self.cached = 0      # YAML blobs served by the parse cache
+        self.shared = 0      # loads served by a blob already read
+
+    def git(self, *args) -> str:
+        result = subprocess.run(["git", "-C", str(self.base), *args],
+                                capture_output=True, text=True)
+        if result.returncode != 0:
+            raise GitError(result.stderr.strip() or f"git {args[0]} failed")
+        return result.stdout
+
+    def read(self, name: str) -> tuple:
+        """(type, oid, content) of an object: an oid, or any name like REV^{tree}."""
+        if self._proc is None:
+            self._proc = subprocess.Popen(["git", "-C", str(self.base), "cat-file", "--batch"],
+                                          stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self._proc.stdin.write(name.encode("utf-8") + b"\n")
+        self._proc.stdin.flush()
+        header = self._proc.stdout.readline().decode("utf-8").split()
+        if len(header) != 3:  # "<name> missing" / "<name> ambiguous"
+            raise GitError(f"{name}: {header[-1] if header else 'no such object'}")
+        oid, kind, size = header
+        content = self._proc.stdout.read(int(size))
+        self._proc.stdout.read(1)  # trailing newline
+        return kind, oid, content
+
+    def close(self):
+        if self._proc is not None:
+            self._proc.stdin.close()
+            self._proc.wait()
+            self._proc = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Trees ----------------------------------------------------------------
+
+    def is_ancestor(self, ancestor: str, rev: str) -> bool:
+        result = subprocess.run(["git", "-C", str(self.base), "merge-base", "--is-ancestor",
+                                 ancestor, rev], capture_output=True)
+        return result.returncode == 0
+
+    def resolve(self, rev: str) -> str:
+        """Commit oid for a revision name (branch, tag, hash, HEAD~3, ...)."""
+        _, oid, _ = self.read(f"{rev}^{{commit}}")
+        return oid
+
+    def tree(self, oid: str) -> dict:
+        """Every blob under a tree, as {relative path: blob oid}."""
+        if oid not in self._trees:
+            _, _, content = self.read(oid)
+            width = len(oid) // 2  # raw object ID length (SHA-1 or SHA-256)
+            files = {}
+            i = 0
+            while i < len(content):
+                space = content.index(b" ", i)
+                nul = content.index(b"\0", space)
+                mode = content[i:space].decode("ascii")
+                name = content[space + 1:nul].decode("utf-8", "surrogateescape")
+                child = content[nul + 1:nul + 1 + width].hex()
+                i = nul + 1 + width
+                if mode == TREE_MODE:
+                    for path, blob in self.tree(child).items():
+                        files[f"{name}/{path}"] = blob
+                elif mode in BLOB_MODES:
+                    files[name] = child
+            self._trees[oid] = files
+        return self._trees[oid]
+
+    def files(self, commit: str, roots=TRACKED) -> dict:
+        """{path relative to base: blob oid} for the files under roots at commit."""
+        files = {}
+        for root in roots:
+            try:
+                kind, oid, _ = self.read(f"{commit}:{self.prefix}{root}")
+            except GitError:
+                continue  # directory absent at this revision
+            if kind != "tree":
+                continue
+            for path, blob in self.tree(oid).items():
+                files[f"{root}/{path}"] = blob
+        return files
+
+    # --- Blobs ----------------------------------------------------------------
+
+    def text(self, oid: str) -> str:
+        if oid not in self._texts:
+            self._texts[oid] = self.read(oid)[2].decode("utf-8")
+        return self._texts[oid]
+
+    def load(self, oid: str):
+        """Parsed YAML blob (None if empty). Shared between revisions; don't modify."""
+        if oid in self._docs:
+            self.shared += 1
+            return self._docs[oid]
+        raw = self.read(oid)[2]
+        data = cache.lookup(raw, LOADER_VERSION)
+        if data is cache.MISS:
+            data = parse_yaml(raw)
+            cache.store(raw, LOADER_VERSION, data)
+            self.parsed += 1
+        else:
+            self.cached += 1
+        self._docs[oid] = intern_strings(data)
+        return self._docs[oid]
+
+    def load_json(self, oid: str):
+        if oid not in self._json:
+            self._json[oid] = json.loads(self.text(oid))
+        return self._json[oid]
+
+
+class GitSource:
+    """One revision, read through a GitStore, with the methods of loader.FileSource."""
+
+    def __init__(self, store: GitStore, rev: str = "HEAD", roots=TRACKED):
+        self.store = store
+        self.rev = rev
+        self.commit = store.resolve(rev)
+        self.files = store.files(self.commit, roots)
+        self.dirs = {parent.as_posix() for path in self.files for parent in Path(path).parents}
+
+    def _key(self, path: Path):
+        try:
+            return Path(path).relative_to(self.store.base).as_posix()
+        except ValueError:
+            return None
+
+    def exists(self, path: Path) -> bool:
+        key = self._key(path)
+        return key in self.files or key in self.dirs
+
+    def load(self, path: Path):
+        oid = self.files.get(self._key(path))
+        return None if oid is None else self.store.load(oid)
+
+    def load_many(self, paths) -> dict:
+        return {path: self.load(path) for path in sorted(paths)}
+
+    def glob(self, directory: Path, pattern: str = "*.yaml") -> list:
+        """Files directly inside directory matching pattern, sorted."""
+        prefix = f"{self._key(directory)}/"
+        return sorted(self.store.base / key for key in self.files
+                      if key.startswith(prefix) and "/" not in key[len(prefix):]
+                      and fnmatch.fnmatchcase(key[len(prefix):], pattern))
+
+    def load_json(self, path: Path):
+        return self.store.load_json(self.files[self._key(path)])
+
+    def template_loader(self, directory: Path):
+        from jinja2 import FunctionLoader
+
+        def load_template(name):
+            key = self._key(directory / name)
+            if key not in self.files:
+                return None
+            return self.store.text(self.files[key]), f"{self.rev}:{key}", lambda: True
+        return FunctionLoader(load_template)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _corpus(store: GitStore, rev: str):
+    from corpus import Corpus
+    return Corpus(source=GitSource(store, rev))
+
+
+def run_ls(store: GitStore, rev: str) -> int:
+    source = GitSource(store, rev)
+    for path, oid in sorted(source.files.items()):
+        print(f"{oid[:12]}  {path}")
+    print(f"\n{len(source.files)} files at {rev} ({source.commit[:12]})")
+    return 0
+
+
+def run_validate(store: GitStore, rev: str) -> int:
+    import validate
+    corpus = _corpus(store, rev)
+    print(f"Validating {rev} ({corpus.source.commit[:12]})\n")
+    errors, total_entries = validate.run(corpus)
+    print(f"\n{'='*50}")
+    if errors:
+        print(f"VALIDATION FAILED: {len(errors)} error(s) across {total_entries} entries")
+        return 1
+    print(f"VALIDATION PASSED: {total_entries} entries across {len(validate.ENTITY_MAP)} entity types")
+    return 0
+
+
+def run_build(store: GitStore, rev: str, args: list) -> int:
+    import build
+    output_dir = None
+    if "--out" in args:
+        i = args.index("--out")
+        if i + 1 >= len(args):
+            print("--out requires a directory")
+            return 2
+        output_dir = Path(args[i + 1])
+        args = args[:i] + args[i + 2:]
+    corpus = _corpus(store, rev)
+    output_dir = output_dir or OUTPUT / f"rev-{corpus.source.commit[:12]}"
+    print(f"Building {rev} ({corpus.source.commit[:12]})\n")
+    build.build_all(build.make_env(corpus.template_loader()), args or None, corpus, output_dir)
+    print(f"\n{'='*50}")
+    print(f"Build complete. Output in: {output_dir}")
+    return 0
+
+
+def bench(store: GitStore, revs: list) -> int:
+    """Load the whole corpus at each revision; report what had to be parsed."""
+    from corpus import Corpus
+    if not revs:
+        revs = store.git("rev-list", f"--max-count={BENCH_REVISIONS}", "HEAD").split()
+    print(f"{'revision':<14} {'files':>6} {'parsed':>7} {'cached':>7} {'shared':>7} {'ms':>8}")
+    start = time.perf_counter()
+    for rev in revs:
+        before = (store.parsed, store.cached, store.shared)
+        t0 = time.perf_counter()
+        source = GitSource(store, rev)
+        Corpus.load(source=source)
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"{source.commit[:12]:<14} {len(source.files):>6} {store.parsed - before[0]:>7} "
+              f"{store.cached - before[1]:>7} {store.shared - before[2]:>7} {ms:>8.1f}")
+    total = time.perf_counter() - start
+    print(f"\n{len(revs)} revisions in {total * 1000:.0f} ms: {store.parsed} blobs parsed, "
+          f"{store.cached} from the parse cache, {store.shared} shared between revisions")
+    return 0
+
+
+def run_rev(args: list) -> int:
+    """CLI for `gitstore.py` / `itp rev`. Returns an exit code."""
+    if not args or args[0] not in ("ls", "validate", "build", "bench"):
+        print(__doc__)
+        return 2
+    command, args = args[0], args[1:]
+    if command != "bench" and not args:
+        print(f"Usage: gitstore.py {command} REV")
+        return 2
+    try:
+        with GitStore() as store:
+            if command == "ls":
+                return run_ls(store, args[0])
+            if command == "validate":
+                return run_validate(store, args[0])
+            if command == "build":
+                return run_build(store, args[0], args[1:])
+            return bench(store, args)
+    except GitError as e:
+        print(f"❌ {e}")
+        return 1
+
+
+def main():
+    sys.exit(run_rev(strip_jobs_flag(cache.strip_cache_flag(sys.argv[1:]))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+history.py - Field-level history of every entity, built from git history.
+
+Walks the first-parent history of HEAD and records each distinct value of
+every entity field (variables, gaps, traps, ...) with the commit that
+introduced it, the commit date and the latest session number at that commit.
+The index lives in .cache/history.sqlite and is updated incrementally: only
+commits made since the last run are read, and within a commit only entity
+files whose blobs changed are parsed (see gitstore.py).
+
+Values are stored as JSON; a NULL value means the field (or the whole
+entity) was removed.
+
+Usage:
+    python history.py                             # update the index
+    python history.py SV-03                       # every change to SV-03
+    python history.py SV-03 current_value         # one field over time
+    python history.py --type gaps --field status --since 2026-03-01 --until 2026-03-31
+    python history.py --rebuild                   # re-index from scratch
+"""
+
+import sys
+import json
+import sqlite3
+from pathlib import Path
+
+import cache
+from corpus import Corpus, ENTITY_MAP
+from gitstore import GitStore, GitSource, GitError
+
+BASE = Path(__file__).parent.parent
+INDEX_PATH = cache.CACHE_DIR / "history.sqlite"
+
+# Bump whenever the recorded fields or row layout change.
+INDEX_VERSION = "1"
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS commits (
+    oid      TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    date     TEXT NOT NULL,
+    session  TEXT,
+    subject  TEXT
+);
+CREATE TABLE IF NOT EXISTS changes (
+    entity_type TEXT NOT NULL,
+    entity_id   TEXT NOT NULL,
+    field       TEXT NOT NULL,
+    value       TEXT,
+    previous    TEXT,
+    commit_oid  TEXT NOT NULL,
+    position    INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS changes_by_entity ON changes (entity_id, field, position);
+CREATE INDEX IF NOT EXISTS changes_by_field ON changes (entity_type, field, position);
+"""
+
+# Longest value shown when listing several fields or entities
+DISPLAY_WIDTH = 100
+
+
+def to_json(value) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+
+
+def file_signature(source: GitSource, entity_type: str) -> tuple:
+    """Blob IDs an entity type is read from at a revision (file or shards)."""
+    filename = ENTITY_MAP[entity_type][0]
+    single = f"data/{filename}"
+    shard_prefix = f"data/{Path(filename).stem}/"
+    return tuple(sorted((path, oid) for path, oid in source.files.items()
+                        if path == single or path.startswith(shard_prefix)))
+
+
+def field_values(corpus: Corpus, entity_type: str) -> dict:
+    """{(entity id, field): JSON value} for every entry of an entity type."""
+    id_field = ENTITY_MAP[entity_type][2]
+    values = {}
+    for entry in corpus.entries(entity_type):
+        if not isinstance(entry, dict):
+            continue
+        eid = str(entry.get(id_field, ""))
+        for field, value in entry.items():
+            values[(eid, field)] = to_json(value)
+    return values
+
+
+def current_session(corpus: Corpus):
+    numbers = [e.get("number") for e in corpus.entries("sessions") if isinstance(e, dict)]
+    return str(numbers[-1]) if numbers else None
+
+
+class HistoryIndex:
+    """Incrementally maintained field history over the first-parent chain of HEAD."""
+
+    def __init__(self, path: Path = INDEX_PATH, store: GitStore = None):
+        self.path = path
+        self.store = store or GitStore()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA_SQL)
+        version = self.conn.execute("SELECT value FROM meta WHERE key = 'index_version'").fetchone()
+        if version is None or version[0] != INDEX_VERSION:
+            self.clear()
+
+    def close(self):
+        self.conn.close()
+        self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM changes")
+            self.conn.execute("DELETE FROM commits")
+            self.conn.execute("DELETE FROM meta")
+            self.conn.execute("INSERT INTO meta VALUES ('index_version', ?)", (INDEX_VERSION,))
+
+    def _meta(self, key: str):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _state(self) -> dict:
+        """Latest recorded values: {entity_type: {(entity id, field): JSON}}."""
+        state = {entity_type: {} for entity_type in ENTITY_MAP}
+        rows = self.conn.execute("SELECT entity_type, entity_id, field, value FROM changes "
+                                 "ORDER BY position, rowid")
+        for entity_type, eid, field, value in rows:
+            if entity_type not in state:
+                continue
+            if value is None:
+                state[entity_type].pop((eid, field), None)
+            else:
+                state[entity_type][(eid, field)] = value
+        return state
+
+    def update(self) -> int:
+        """Index commits made since the last update. Returns how many were added."""
+        head = self.store.resolve("HEAD")
+        last = self._meta("head")
+        if last == head:
+            return 0
+        if last and not self.store.is_ancestor(last, head):
+            self.clear()  # history was rewritten
+            last = None
+
+        log = self.store.git("log", "--first-parent", "--reverse", "--format=%H%x1f%cI%x1f%s",
+                             f"{last}..{head}" if last else head)
+        commits = [line.split("\x1f", 2) for line in log.splitlines() if line]
+        position = self.conn.execute("SELECT COALESCE(MAX(position), -1) FROM commits").fetchone()[0]
+        state = self._state()
+        if last:
+            previous = GitSource(self.store, last, roots=("data",))
+            signatures = {t: file_signature(previous, t) for t in ENTITY_MAP}
+            session = self.conn.execute("SELECT session FROM commits WHERE oid = ?",
+                                        (last,)).fetchone()[0]
+        else:
+            signatures = {t: () for t in ENTITY_MAP}
+            session = None
+
+        with self.conn:
+            for oid, date, subject in commits:
+                position += 1
+                source = GitSource(self.store, oid, roots=("data",))
+                corpus = Corpus(source=source)
+                rows = []
+                for entity_type in ENTITY_MAP:
+                    signature = file_signature(source, entity_type)
+                    if signature == signatures[entity_type]:
+                        continue
+                    signatures[entity_type] = signature
+                    old = state[entity_type]
+                    new = field_values(corpus, entity_type)
+                    for key, value in new.items():
+                        if old.get(key) != value:
+                            rows.append((entity_type, *key, value, old.get(key), oid, position))
+                    for key in sorted(old.keys() - new.keys()):
+                        rows.append((entity_type, *key, None, old[key], oid, position))
+                    state[entity_type] = new
+                    if entity_type == "sessions":
+                        session = current_session(corpus)
+                self.conn.executemany("INSERT INTO changes VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self.conn.execute("INSERT INTO commits VALUES (?, ?, ?, ?, ?)",
+                                  (oid, position, date, session, subject))
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('head', ?)", (head,))
+        return len(commits)
+
+    def changes(self, entity_id: str = None, field: str = None, entity_type: str = None,
+                since: str = None, until: str = None) -> list:
+        """Matching changes in history order, as
+        (entity_type, entity_id, field, value, previous, date, commit, session) tuples."""
+        sql = ("SELECT c.entity_type, c.entity_id, c.field, c.value, c.previous, "
+               "m.date, m.oid, m.session FROM changes c JOIN commits m ON m.oid = c.commit_oid "
+               "WHERE 1 = 1")
+        params = []
+        for column, value in (("c.entity_id", entity_id), ("c.field", field),
+                              ("c.entity_type", entity_type)):
+            if value is not None:
+                sql += f" AND {column} = ?"
+                params.append(value)
+        if since:
+            sql += " AND substr(m.date, 1, 10) >= ?"
+            params.append(since)
+        if until:
+            sql += " AND substr(m.date, 1, 10) <= ?"
+            params.append(until)
+        sql += " ORDER BY c.position, c.entity_type, c.entity_id, c.field"
+        return self.conn.execute(sql, params).fetchall()
+
+
+def format_value(value, width: int = None) -> str:
+    if value is None:
+        return "(removed)"
+    value = json.loads(value)
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    text = " ".join(text.split())
+    if width and len(text) > width:
+        text = text[:width - 1] + "…"
+    return text
+
+
+def run_history(args: list) -> int:
+    """CLI for `history.py` / `itp history`. Returns an exit code."""
+    options = {}
+    rebuild = "--rebuild" in args
+    args = [a for a in args if a != "--rebuild"]
+    for flag in ("--type", "--field", "--since", "--until"):
+        if flag in args:
+            i = args.index(flag)
+            if i + 1 >= len(args):
+                print(f"{flag} requires a value")
+                return 2
+            options[flag[2:]] = args[i + 1]
+            del args[i:i + 2]
+    if len(args) > 2 or any(a.startswith("--") for a in args):
+        print(__doc__)
+        return 2
+    entity_id = args[0] if args else None
+    field = args[1] if len(args) > 1 else options.get("field")
+    if options.get("type") and options["type"] not in ENTITY_MAP:
+        print(f"❌ Unknown entity type: {options['type']}")
+        return 2
+
+    try:
+        with HistoryIndex() as index:
+            if rebuild:
+                index.clear()
+            added = index.update()
+            if not (entity_id or options):
+                commits = index.conn.execute("SELECT COUNT(*) FROM commits").fetchone()[0]
+                print(f"✅ {index.path.relative_to(BASE) if BASE in index.path.parents else index.path}: "
+                      f"{commits} commits ({added} new)")
+                return 0
+            rows = index.changes(entity_id, field, options.get("type"),
+                                 options.get("since"), options.get("until"))
+    except GitError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if not rows:
+        print("No recorded changes")
+        return 1
+    width = None if entity_id and field else DISPLAY_WIDTH
+    for entity_type, eid, fname, value, previous, date, oid, session in rows:
+        label = f"{entity_type}:{eid}"
+        when = f"{date[:10]}  {oid[:10]}  S{session or '?'}"
+        if previous is None:
+            print(f"{when}  {label} {fname} = {format_value(value, width)}")
+        else:
+            print(f"{when}  {label} {fname}: {format_value(previous, width)} → {format_value(value, width)}")
+    return 0
+
+
+def main():
+    sys.exit(run_history(cache.strip_cache_flag(sys.argv[1:])))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+itp.py - One-process driver for the validate → build → pdf pipeline.
+
+Loads the data tree once into a Corpus and passes it through validation,
+markdown rendering and PDF assembly in the same interpreter, so imports and
+YAML parsing are paid once per run. Rendered markdown is handed straight to
+the PDF stage instead of being re-read from output/.
+
+Usage:
+    python itp.py validate build pdf        # full pipeline
+    python itp.py validate build            # validate, then render markdown
+    python itp.py build variables content   # build selected targets (see build.py)
+    python itp.py build ITB-B               # render one content module
+    python itp.py pdf --briefs-only         # PDF from existing output/ files
+    python itp.py validate build pdf --date 2026-03-04
+    python itp.py validate --full           # recheck files unchanged since the last run
+    python itp.py ... --no-cache            # bypass the parsed-document cache
+    python itp.py ... --jobs N              # parser processes (default: one per core)
+
+Stages always run in pipeline order (validate, build, pdf). Validation
+failure aborts the run before anything is written.
+
+Tools (one per invocation):
+    python itp.py compile [--force]         # SQLite snapshot (snapshot.py)
+    python itp.py compile query "SQL"       # query the snapshot
+    python itp.py search "terms" [--limit N] [--kind content|briefs|traps|...]
+    python itp.py modules [ITB-B ...]       # content module headers / outlines
+    python itp.py watch [--poll]            # stay loaded, rebuild on file change
+    python itp.py rev validate|build REV    # run against a past revision (gitstore.py)
+    python itp.py history SV-03 [field]     # field values over git history (history.py)
+    python itp.py refs backlinks "Trap 8"   # reference graph queries (refgraph.py)
+    python itp.py prose                     # dangling entity references in prose (prose.py)
+    python itp.py anchors "ITB-A10 §3.4"    # resolve a section reference (anchors.py)
+    python itp.py deps [order|ITB-A10]      # module dependency graph checks (depgraph.py)
+"""
+
+import sys
+import importlib
+
+import cache
+from corpus import Corpus
+from loader import strip_jobs_flag
+
+STAGES = ("validate", "build", "pdf")
+
+PDF_FLAGS = ("--briefs-only", "--full-only")
+
+# Standalone tools: command -> (module, function taking the remaining args)
+COMMANDS = {
+    "compile": ("snapshot", "run_compile"),
+    "search": ("search", "run_search"),
+    "modules": ("content_index", "run_modules"),
+    "watch": ("watch", "run_watch"),
+    "rev": ("gitstore", "run_rev"),
+    "history": ("history", "run_history"),
+    "refs": ("refgraph", "run_refs"),
+    "prose": ("prose", "run_prose"),
+    "anchors": ("anchors", "run_anchors"),
+    "deps": ("depgraph", "run_deps"),
+}
+
+
+def run_pipeline(stages: list, targets: list = None, pdf_options: dict = None,
+                 full: bool = False) -> int:
+    """Run the requested stages against one Corpus. Returns an exit code.
+
+    Validation reuses results for files unchanged since the last run unless full.
+    """
+    pdf_options = pdf_options or {}
+    corpus = Corpus.load()
+    documents = None
+
+    if "validate" in stages:
+        import validate
+        errors, total_entries = validate.run(corpus, manifest=validate.open_manifest(corpus, full))
+        print(f"\n{'='*50}")
+        if errors:
+            print(f"VALIDATION FAILED: {len(errors)} error(s) across {total_entries} entries")
+            return 1
+        print(f"VALIDATION PASSED: {total_entries} entries across "
+              f"{len(validate.ENTITY_MAP)} entity types")
+
+    if "build" in stages:
+        import build
+        if "validate" in stages:
+            print()
+        documents = build.build_all(build.make_env(), targets or None, corpus)
+        print(f"\n{'='*50}")
+        print(f"Build complete. Output in: {build.OUTPUT}")
+        if targets:
+            # Partial build: the PDF stage needs the full set from output/
+            documents = None
+
+    if "pdf" in stages:
+        import build_pdf
+        if documents is None:
+            documents = build_pdf.load_output_documents()
+        if not documents:
+            print(f"\n❌  No markdown to bundle. Run `itp build` first.")
+            return 1
+        release_date = pdf_options.get("date") or build_pdf.get_release_date([])
+        print(f"\nITP PDF Release Builder")
+        print(f"Release: v{release_date}")
+        print(f"Output:  {build_pdf.RELEASES}/")
+        build_pdf.build_release(
+            documents, release_date,
+            briefs_only=pdf_options.get("briefs_only", False),
+            full_only=pdf_options.get("full_only", False),
+            corpus=corpus,
+        )
+
+    return 0
+
+
+def main():
+    args = strip_jobs_flag(cache.strip_cache_flag(sys.argv[1:]))
+
+    if args and args[0] in COMMANDS:
+        module_name, func_name = COMMANDS[args[0]]
+        func = getattr(importlib.import_module(module_name), func_name)
+        sys.exit(func(args[1:]))
+
+    pdf_options = {
+        "briefs_only": "--briefs-only" in args,
+        "full_only": "--full-only" in args,
+    }
+    if "--date" in args:
+        i = args.index("--date")
+        if i + 1 >= len(args):
+            print("--date requires a value (YYYY-MM-DD)")
+            sys.exit(2)
+        pdf_options["date"] = args[i + 1]
+        del args[i:i + 2]
+    full = "--full" in args
+    args = [a for a in args if a not in PDF_FLAGS and a != "--full"]
+
+    stages = [a for a in args if a in STAGES]
+    targets = [a for a in args if a not in STAGES]
+    if not stages:
+        print(__doc__)
+        sys.exit(2)
+    if targets and "build" not in stages:
+        print(f"Unknown arguments: {' '.join(targets)}")
+        sys.exit(2)
+
+    sys.exit(run_pipeline(stages, targets, pdf_options, full))
+
+
+if __name__ == "__main__":
+    main()
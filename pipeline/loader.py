@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+loader.py - Shared YAML loading for all pipeline scripts.
+
+Uses libyaml's CSafeLoader when PyYAML was built against libyaml, and falls
+back to the pure-Python SafeLoader otherwise. All reads go through the
+parsed-document cache (cache.py).
+
+load_many() reads a set of files (content modules, briefs) at once and parses
+the cache misses across a process pool (--jobs N, default one per core).
+
+Short strings (IDs, module codes, enum values, cross-references) are interned
+after loading, so each distinct value is stored once however many entities
+and documents repeat it.
+
+Entity files can also be read as a stream (EntryStream / iter_entries), which
+builds one entries[] item at a time from the parser's event stream instead of
+materializing the whole document.
+
+The time each file's last load took (a parse, or a parse-cache hit) is kept
+in PARSE_TIMES for the --report outputs (report.py).
+
+Usage:
+    python loader.py                    # show which loader is active
+    python loader.py bench              # compare C vs pure-Python over data/
+    python loader.py bench --repeat 5   # best of 5 runs per loader
+    python loader.py stream             # peak memory: full load vs streaming
+    python loader.py intern             # memory saved by interning over data/
+"""
+
+import os
+import json
+import sys
+import time
+import tracemalloc
+import yaml
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from yaml.composer import Composer
+from yaml.constructor import SafeConstructor
+from yaml.resolver import Resolver
+from yaml.events import (StreamEndEvent, MappingStartEvent, MappingEndEvent,
+                         SequenceStartEvent, SequenceEndEvent)
+
+import cache
+
+BASE = Path(__file__).parent.parent
+DATA = BASE / "data"
+
+YAMLError = yaml.YAMLError
+
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+LIBYAML = SafeLoader is not yaml.SafeLoader
+
+# Part of every cache key. Bump the leading number whenever the shape of
+# loaded documents changes.
+LOADER_VERSION = f"2:pyyaml-{yaml.__version__}"
+
+# Worker processes for load_many(); 0 means one per CPU core.
+_jobs = int(os.environ.get("ITP_JOBS", "0") or 0)
+
+# load_many() only starts a pool when the cache misses add up to at least
+# this much YAML; below that, process start-up and pickling the results back
+# cost more than parsing serially.
+PARALLEL_MIN_BYTES = (4096 if LIBYAML else 64) * 1024
+
+# Strings up to this length are interned; longer ones are prose and rarely repeat.
+INTERN_MAX_LEN = 48
+
+# path -> seconds the last load_yaml() / load_many() of it took
+PARSE_TIMES = {}
+
+
+def intern_strings(value):
+    """Intern short strings (values and keys) throughout a loaded document.
+
+    Mutates lists and dicts in place, which is safe because every load
+    returns a fresh document. Returns the (possibly replaced) value.
+    """
+    if isinstance(value, str):
+        return sys.intern(value) if len(value) <= INTERN_MAX_LEN else value
+    if isinstance(value, dict):
+        items = [(intern_strings(k), intern_strings(v)) for k, v in value.items()]
+        value.clear()
+        value.update(items)
+    elif isinstance(value, list):
+        value[:] = [intern_strings(v) for v in value]
+    return value
+
+if LIBYAML:
+    from yaml.cyaml import CParser
+
+    class _EventLoader(CParser, Composer, SafeConstructor, Resolver):
+        """libyaml event parser with PyYAML's composer, so nodes can be
+        composed one at a time instead of a whole document at once."""
+
+        def __init__(self, stream):
+            CParser.__init__(self, stream)
+            Composer.__init__(self)
+            SafeConstructor.__init__(self)
+            Resolver.__init__(self)
+else:
+    _EventLoader = yaml.SafeLoader
+
+
+def parse_yaml(raw, loader=None):
+    """Parse YAML text or bytes with the fastest available safe loader."""
+    return yaml.load(raw, Loader=loader or SafeLoader)
+
+
+def _parse_timed(raw) -> tuple:
+    """(parse_yaml(raw), seconds), for load_many()'s workers."""
+    started = time.perf_counter()
+    data = parse_yaml(raw)
+    return data, time.perf_counter() - started
+
+
+def load_yaml(path: Path):
+    """Load a YAML file, return the full document (None if missing or empty)."""
+    if not path.exists():
+        return None
+    started = time.perf_counter()
+    data = intern_strings(cache.load_document(path, parse_yaml, LOADER_VERSION))
+    PARSE_TIMES[path] = time.perf_counter() - started
+    return data
+
+
+def set_jobs(jobs: int):
+    """Set the worker count for load_many() (--jobs). 0 = one per core."""
+    global _jobs
+    _jobs = jobs
+
+
+def get_jobs() -> int:
+    return _jobs or os.cpu_count() or 1
+
+
+def strip_jobs_flag(args: list) -> list:
+    """Handle a --jobs N CLI flag; return args without it."""
+    if "--jobs" not in args:
+        return args
+    i = args.index("--jobs")
+    if i + 1 >= len(args) or not args[i + 1].isdigit():
+        print("--jobs requires a number")
+        sys.exit(2)
+    set_jobs(int(args[i + 1]))
+    return args[:i] + args[i + 2:]
+
+
+def load_many(paths, jobs: int = None) -> dict:
+    """Load several YAML files, parsing cache misses in worker processes.
+
+    Returns {path: document} in sorted path order, exactly as calling
+    load_yaml() on each path in turn would (None for missing or empty files).
+    """
+    paths = sorted(paths)
+    docs = {}
+    misses = []
+    for path in paths:
+        if not path.exists():
+            docs[path] = None
+            continue
+        started = time.perf_counter()
+        raw = path.read_bytes()
+        data = cache.lookup(raw, LOADER_VERSION)
+        PARSE_TIMES[path] = time.perf_counter() - started
+        if data is cache.MISS:
+            misses.append((path, raw))
+        else:
+            docs[path] = data
+
+    raws = [raw for _, raw in misses]
+    workers = min(jobs or get_jobs(), len(raws))
+    if workers > 1 and sum(len(raw) for raw in raws) >= PARALLEL_MIN_BYTES:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = list(pool.map(_parse_timed, raws))
+    else:
+        parsed = [_parse_timed(raw) for raw in raws]
+
+    for (path, raw), (data, seconds) in zip(misses, parsed):
+        cache.store(raw, LOADER_VERSION, data)
+        docs[path] = data
+        PARSE_TIMES[path] += seconds
+    return {path: intern_strings(docs[path]) for path in paths}
+
+
+def load_entries(path: Path) -> list:
+    """Load YAML, extract entries list."""
+    data = load_yaml(path)
+    if isinstance(data, dict) and "entries" in data:
+        return data["entries"]
+    if isinstance(data, list):
+        return data
+    return []
+
+
+def load_metadata(path: Path) -> dict:
+    """Load YAML, extract top-level metadata (everything except entries)."""
+    data = load_yaml(path)
+    if isinstance(data, dict):
+        return {k: v for k, v in data.items() if k != "entries"}
+    return {}
+
+
+class EntryStream:
+    """Entries of an entity file, parsed one item at a time.
+
+    Iterating yields each entries[] item (or each item of a top-level list)
+    as soon as it has been parsed, so peak memory is bounded by the largest
+    single entry rather than the whole file. Top-level keys other than
+    entries are collected in .metadata: keys that precede entries are there
+    once the first entry is yielded, the rest once iteration finishes.
+
+    Streams read the file directly and bypass the parse cache.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.metadata = {}
+
+    def __iter__(self):
+        if not self.path.exists():
+            return
+        with open(self.path, "rb") as f:
+            loader = _EventLoader(f)
+            try:
+                yield from self._entries(loader)
+            finally:
+                loader.dispose()
+
+    def _entries(self, loader):
+        def next_value():
+            return loader.construct_document(loader.compose_node(None, None))
+
+        loader.get_event()                          # StreamStart
+        if loader.check_event(StreamEndEvent):      # empty file
+            return
+        loader.get_event()                          # DocumentStart
+        if loader.check_event(SequenceStartEvent):  # bare list of entries
+            loader.get_event()
+            while not loader.check_event(SequenceEndEvent):
+                yield intern_strings(next_value())
+            return
+        if not loader.check_event(MappingStartEvent):
+            return
+        loader.get_event()
+        while not loader.check_event(MappingEndEvent):
+            key = next_value()
+            if key == "entries" and loader.check_event(SequenceStartEvent):
+                loader.get_event()
+                while not loader.check_event(SequenceEndEvent):
+                    yield intern_strings(next_value())
+                loader.get_event()
+            elif key == "entries":
+                next_value()                        # not a list: no entries
+            else:
+                self.metadata[key] = next_value()
+
+
+def iter_entries(path: Path):
+    """Yield the entries of an entity file one at a time (see EntryStream)."""
+    return iter(EntryStream(path))
+
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+
+class FileSource:
+    """Where a Corpus reads its files from: the working tree.
+
+    gitstore.GitSource implements the same methods over the blobs of a
+    commit, so the same pipeline code can read any past revision.
+    """
+
+    def __init__(self):
+        self._json = {}
+
+    def exists(self, path: Path) -> bool:
+        return path.exists()
+
+    def load(self, path: Path):
+        return load_yaml(path)
+
+    def load_many(self, paths) -> dict:
+        return load_many(paths)
+
+    def glob(self, directory: Path, pattern: str = "*.yaml") -> list:
+        """Files directly inside directory matching pattern, sorted."""
+        return sorted(directory.glob(pattern))
+
+    def load_json(self, path: Path):
+        """Parsed JSON file (e.g. a schema), reused while the file is unchanged."""
+        mtime = path.stat().st_mtime_ns
+        cached = self._json.get(path)
+        if cached is None or cached[0] != mtime:
+            with open(path, "r", encoding="utf-8") as f:
+                cached = self._json[path] = (mtime, json.load(f))
+        return cached[1]
+
+    def template_loader(self, directory: Path):
+        from jinja2 import FileSystemLoader
+        return FileSystemLoader(str(directory))
+
+
+# The working tree; the default source for every Corpus
+FILES = FileSource()
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+def bench(repeat: int = 3):
+    """Time both loaders over every YAML file under data/ (cache bypassed)."""
+    files = sorted(DATA.rglob("*.yaml"))
+    raws = [p.read_bytes() for p in files]
+    total_kib = sum(len(r) for r in raws) / 1024
+    print(f"Parsing {len(files)} files ({total_kib:.0f} KiB) under {DATA}, best of {repeat}")
+
+    loaders = [("SafeLoader (pure Python)", yaml.SafeLoader)]
+    if LIBYAML:
+        loaders.append(("CSafeLoader (libyaml)", yaml.CSafeLoader))
+    else:
+        print("⚠️  PyYAML is not built with libyaml — only the pure-Python loader is available")
+
+    results = {}
+    timings = {}
+    for name, loader in loaders:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            docs = [parse_yaml(raw, loader) for raw in raws]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = docs
+        timings[name] = best
+        print(f"  {name:<26} {best * 1000:8.1f} ms")
+
+    if len(timings) == 2:
+        (py_name, py_t), (c_name, c_t) = timings.items()
+        same = results[py_name] == results[c_name]
+        print(f"  Speed-up: {py_t / c_t:.1f}x  |  identical output: {'yes' if same else 'NO'}")
+        if not same:
+            sys.exit(1)
+
+
+def stream_report():
+    """Peak traced memory of a full parse vs. EntryStream, per entity file."""
+    files = [p for p in sorted(DATA.glob("*.yaml")) if p.name != "index_meta.yaml"]
+    print(f"{'file':<20} {'entries':>7} {'full load':>12} {'streamed':>12}  same")
+    mismatched = False
+    for path in files:
+        tracemalloc.start()
+        full = parse_yaml(path.read_bytes())
+        _, full_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        entries = full.get("entries", []) if isinstance(full, dict) else full or []
+        metadata = ({k: v for k, v in full.items() if k != "entries"}
+                    if isinstance(full, dict) else {})
+        del full
+
+        # Compare as we go instead of collecting the stream, so the measured
+        # peak is what a single-pass consumer would see.
+        tracemalloc.start()
+        stream = EntryStream(path)
+        same = True
+        count = 0
+        for i, entry in enumerate(stream):
+            same = same and i < len(entries) and entry == entries[i]
+            count += 1
+        _, stream_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        same = same and count == len(entries) and stream.metadata == metadata
+        mismatched = mismatched or not same
+        print(f"{path.name:<20} {count:>7} {full_peak / 1024:>9.0f} KiB {stream_peak / 1024:>9.0f} KiB"
+              f"  {'yes' if same else 'NO'}")
+    if mismatched:
+        sys.exit(1)
+
+
+def intern_report(snapshots: int = 3):
+    """Memory held by the documents under data/, with and without interning.
+
+    Measured for one corpus as parsed and for several copies loaded from the
+    parse cache, as when holding historical snapshots side by side.
+    """
+    import pickle
+    files = sorted(DATA.rglob("*.yaml"))
+    raws = [p.read_bytes() for p in files]
+    payloads = [pickle.dumps(parse_yaml(raw)) for raw in raws]
+
+    def measure(load, intern: bool, copies: int = 1):
+        tracemalloc.start()
+        held = []
+        for _ in range(copies):
+            docs = [load(x) for x in (raws if load is parse_yaml else payloads)]
+            held.append([intern_strings(doc) for doc in docs] if intern else docs)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return held[0], size
+
+    counts = {}
+
+    def walk(value):
+        if isinstance(value, str):
+            if len(value) <= INTERN_MAX_LEN:
+                counts[value] = counts.get(value, 0) + 1
+        elif isinstance(value, dict):
+            for k, v in value.items():
+                walk(k)
+                walk(v)
+        elif isinstance(value, list):
+            for v in value:
+                walk(v)
+
+    plain_docs, _ = measure(parse_yaml, False)
+    for doc in plain_docs:
+        walk(doc)
+    print(f"{len(files)} documents, {sum(counts.values())} short strings "
+          f"(<= {INTERN_MAX_LEN} chars), {len(counts)} distinct")
+    print("most repeated: " + ", ".join(
+        f"{s!r} x{n}" for s, n in sorted(counts.items(), key=lambda kv: -kv[1])[:6]))
+
+    for label, load, copies in [("parsed, 1 corpus", parse_yaml, 1),
+                                (f"cached, {snapshots} corpora", pickle.loads, snapshots)]:
+        docs, plain = measure(load, False, copies)
+        interned_docs, interned = measure(load, True, copies)
+        if docs != interned_docs:
+            print("❌ interned documents differ from the originals")
+            sys.exit(1)
+        print(f"  {label:<20} {plain / 1024:7.0f} KiB -> {interned / 1024:7.0f} KiB  "
+              f"(-{(plain - interned) / 1024:.0f} KiB, {100 * (plain - interned) / plain:.1f}%)")
+
+
+def main():
+    args = sys.argv[1:]
+    if args and args[0] == "bench":
+        repeat = 3
+        if "--repeat" in args:
+            repeat = int(args[args.index("--repeat") + 1])
+        bench(repeat)
+        return
+    if args and args[0] == "stream":
+        stream_report()
+        return
+    if args and args[0] == "intern":
+        intern_report()
+        return
+    name = "CSafeLoader (libyaml)" if LIBYAML else "SafeLoader (pure Python)"
+    print(f"YAML loader: {name}, PyYAML {yaml.__version__}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+manifest.py - Content-hash manifest of earlier validation results.
+
+validate.py records the result of each unit of work (one entity type, the
+IDs and references of one entity type, one content module, one brief)
+under a key made from the SHA-256 of every input it read: the data files,
+the schema, and the IDs it was checked against. On the next run a unit whose
+key is unchanged reuses its stored result instead of being re-parsed and
+re-checked, so output and exit code are exactly those of a full run.
+
+File hashes are reused while a file's size, mtime and ctime are unchanged,
+and only for files last modified strictly before the manifest was written
+(git's racy-clean rule): an edit within the same timestamp tick as the save
+could otherwise keep its old stat and hash. The manifest lives in
+.cache/validate_manifest.pickle; `validate.py --full` ignores it (and
+records fresh results), as does --no-cache. A manifest with no path is
+never read or saved; it only holds one run's results.
+"""
+
+import os
+import pickle
+import hashlib
+from pathlib import Path
+
+import cache
+
+MANIFEST_PATH = cache.CACHE_DIR / "validate_manifest.pickle"
+
+# Bump whenever validation rules or the shape of stored results change.
+MANIFEST_VERSION = 4
+
+
+def digest(*parts) -> str:
+    """SHA-256 over strings (or sorted string collections), order-sensitive."""
+    h = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, str):
+            part = "\x1e".join(sorted(str(p) for p in part))
+        h.update(part.encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+class ValidationManifest:
+    """Stored validation results, keyed by unit name and input hash."""
+
+    def __init__(self, path: Path = MANIFEST_PATH, full: bool = False):
+        """path=None gives an in-memory manifest for a single run."""
+        self.path = path
+        self.full = full
+        self.files = {}      # path -> (mtime_ns, ctime_ns, size, sha256)
+        self.written = 0     # mtime_ns of the manifest file at its last load or save
+        self.results = {}    # unit -> (key, result)
+        self.dirty = False
+        self.reused = 0
+        self.checked = 0
+        if path is None:
+            return
+        try:
+            with open(path, "rb") as f:
+                stored = pickle.load(f)
+            if stored.get("version") == MANIFEST_VERSION:
+                self.files = stored["files"]
+                self.results = {} if full else stored["results"]
+                self.written = os.stat(path).st_mtime_ns
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+            pass
+
+    def file_hash(self, path: Path) -> str:
+        """SHA-256 of a file's content ("missing" if absent)."""
+        key = str(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return "missing"
+        stat = (st.st_mtime_ns, st.st_ctime_ns, st.st_size)
+        known = self.files.get(key)
+        if known and known[:3] == stat and st.st_mtime_ns < self.written:
+            return known[3]
+        with open(path, "rb") as f:
+            sha = hashlib.sha256(f.read()).hexdigest()
+        self.files[key] = stat + (sha,)
+        self.dirty = True    # a save makes a racy entry trusted next time
+        return sha
+
+    def files_key(self, paths) -> str:
+        """One hash over several files, including their names."""
+        return digest(*(f"{p.name}:{self.file_hash(p)}" for p in paths))
+
+    def is_current(self, unit: str, key: str) -> bool:
+        stored = self.results.get(unit)
+        return stored is not None and stored[0] == key
+
+    def cached(self, unit: str, key: str, compute):
+        """Stored result for unit if its key matches, else compute() (and record it)."""
+        if self.is_current(unit, key):
+            self.reused += 1
+            return self.results[unit][1]
+        result = compute()
+        self.record(unit, key, result)
+        return result
+
+    def record(self, unit: str, key: str, result):
+        """Store a result computed elsewhere (e.g. in a worker process)."""
+        self.results[unit] = (key, result)
+        self.dirty = True
+        self.checked += 1
+
+    def save(self):
+        if not self.dirty or self.path is None or not cache.is_enabled():
+            return
+        payload = pickle.dumps({"version": MANIFEST_VERSION, "files": self.files,
+                                "results": self.results}, protocol=pickle.HIGHEST_PROTOCOL)
+        cache.write_atomic(self.path, payload)
+        self.written = os.stat(self.path).st_mtime_ns
+        self.dirty = False
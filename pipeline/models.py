@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+models.py - Typed, slot-based models for ITP entities and documents.
+
+Each model mirrors one schemas/*.schema.json file: one annotated field per
+schema property, stored in __slots__ instead of a per-object dict. Models are
+read-only mappings, so code and templates written against the plain dicts
+keep working — entry.get("status"), entry["id"], "level" in entry, Jinja's
+{{ entry.title }} and {% if entry.level is defined %} all behave the same.
+Fields missing from the source data stay unset rather than None.
+
+Nested values (lists, sub-objects) are kept as loaded.
+
+Usage:
+    python models.py check      # compare model fields/types with the schemas
+    python models.py bench      # memory: plain dicts vs. models over data/
+"""
+
+from __future__ import annotations
+
+import sys
+import json
+import tracemalloc
+from abc import ABCMeta
+from pathlib import Path
+from collections.abc import Mapping
+from typing import Optional, Union
+
+BASE = Path(__file__).parent.parent
+DATA = BASE / "data"
+SCHEMAS = BASE / "schemas"
+
+
+class ModelMeta(ABCMeta):
+    """Turns a model's field annotations into its __slots__."""
+
+    def __new__(mcs, name, bases, namespace):
+        fields = tuple(namespace.get("__annotations__", {}))
+        namespace.setdefault("__slots__", fields)
+        cls = super().__new__(mcs, name, bases, namespace)
+        if fields:
+            cls.FIELDS = fields
+            cls.FIELD_SET = frozenset(fields)
+        return cls
+
+
+class Model(Mapping, metaclass=ModelMeta):
+    """Read-only mapping over a model's slots."""
+
+    __slots__ = ("_extra",)
+
+    SCHEMA = None
+    FIELDS = ()
+    FIELD_SET = frozenset()
+
+    def __init__(self, data: dict = None):
+        extra = None
+        for key, value in (data or {}).items():
+            if key in self.FIELD_SET:
+                object.__setattr__(self, key, value)
+            else:
+                # Only reachable for schemas that allow additional properties
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        self._extra = extra
+
+    def __getitem__(self, key):
+        if key in self.FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        if self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in self.FIELD_SET:
+            return hasattr(self, key)
+        return bool(self._extra) and key in self._extra
+
+    def __iter__(self):
+        for field in self.FIELDS:
+            if hasattr(self, field):
+                yield field
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __setattr__(self, key, value):
+        if key != "_extra":
+            raise AttributeError(f"{type(self).__name__} is read-only")
+        object.__setattr__(self, key, value)
+
+    def __repr__(self):
+        ident = next((self[k] for k in ("id", "code", "number", "module_code", "brief_id")
+                      if k in self), "?")
+        return f"<{type(self).__name__} {ident}>"
+
+    def to_dict(self) -> dict:
+        """Plain dict copy (fields in schema order), e.g. for JSON or jsonschema."""
+        return {key: self[key] for key in self}
+
+
+# ---------------------------------------------------------------------------
+# Entities (ENTITY_MAP types)
+# ---------------------------------------------------------------------------
+
+class Variable(Model):
+    SCHEMA = "variable.schema.json"
+
+    id: str
+    name: str
+    table: str
+    current_value: str
+    trend: str
+    insight: str
+    confidence: str
+    version_added: str
+    session_added: Optional[int]
+    cross_refs: list
+    epistemic_tag: str
+    monitoring_note: str
+    nq_type: str
+    nq_threshold: str
+
+
+class Gap(Model):
+    SCHEMA = "gap.schema.json"
+
+    id: str
+    description: str
+    priority: int
+    status: str
+    modules: list
+    why_critical: str
+    blocking_for: list
+    session_identified: Optional[int]
+    session_filled: Optional[int]
+    fill_note: str
+    upgrades: str
+    cross_refs: list
+    session_added: int
+    sources: list
+
+
+class Trap(Model):
+    SCHEMA = "trap.schema.json"
+
+    id: int
+    title: str
+    mechanism: str
+    circular_structure: str
+    resolution_path: str
+    historical_parallels: list
+    detection_signal: str
+    extensions: list
+    actors: list
+    itb_anchors: list
+    confidence: str
+    cross_refs: list
+    session_added: int
+    category: str
+    wartime_status: str
+    version_added: str
+    historical_parallel: str
+
+
+class Observation(Model):
+    SCHEMA = "observation.schema.json"
+
+    id: int
+    title: str
+    diagnosis: str
+    strategic_implication: str
+    itb_anchors: list
+    scenario_impact: dict
+    corrections: list
+    leading_indicators: list
+    sources: list
+    cross_refs: list
+    version_added: str
+    session_added: int
+    confidence: str
+
+
+class Scenario(Model):
+    SCHEMA = "scenario.schema.json"
+
+    id: str
+    title: str
+    description: str
+    probability_current: str
+    probability_history: list
+    key_variables: list
+    planning_implication: str
+    traps_activated: list
+    cross_refs: list
+    parent_scenario: Optional[str]
+    status: str
+
+
+class Session(Model):
+    SCHEMA = "session.schema.json"
+
+    number: Union[int, str]
+    date: str
+    summary: str
+    modules_affected: list
+
+
+class Module(Model):
+    SCHEMA = "module.schema.json"
+
+    code: str
+    file: str
+    version: str
+    lines_approx: str
+    description: str
+    level: int
+    dependencies: list
+    referenced_by: list
+
+
+# ---------------------------------------------------------------------------
+# Documents
+# ---------------------------------------------------------------------------
+
+class ContentModule(Model):
+    SCHEMA = "content.schema.json"
+
+    module_code: str
+    version: str
+    date: str
+    source: str
+    dependencies: list
+    referenced_by: list
+    title: str
+    pillar: str
+    last_verified: str
+    confidence: str
+    preamble: str
+    sections: list
+    footer: str
+
+
+class Brief(Model):
+    SCHEMA = "brief.schema.json"
+
+    brief_id: str
+    number: Optional[int]
+    title: str
+    subtitle: Optional[str]
+    author: str
+    contact: str
+    series_link: Optional[str]
+    brief_link: Optional[str]
+    version: str
+    date: str
+    date_published: Optional[str]
+    status: str
+    type: str
+    core_thesis: str
+    itb_anchors: list
+    update_notes: list
+    preamble: Optional[str]
+    section_separators: bool
+    sections: list
+    source_summary: Optional[str]
+    footer_raw: Optional[str]
+    footer_attribution: Optional[str]
+    footer_extras: list
+    companion_briefs: list
+    author_bio: Optional[str]
+    byline_override: Optional[str]
+    separator: str
+    date_display: Optional[str]
+    changelog: list
+    governance: dict
+
+
+# Entity type / document kind -> model class
+MODELS = {
+    "variables": Variable,
+    "gaps": Gap,
+    "traps": Trap,
+    "observations": Observation,
+    "scenarios": Scenario,
+    "sessions": Session,
+    "modules": Module,
+    "content": ContentModule,
+    "briefs": Brief,
+}
+
+
+def to_models(kind: str, items) -> list:
+    """Wrap a list of entity dicts in the model class for kind."""
+    cls = MODELS[kind]
+    return [cls(item) if isinstance(item, dict) else item for item in items]
+
+
+# ---------------------------------------------------------------------------
+# Schema check
+# ---------------------------------------------------------------------------
+
+_JSON_TYPES = {"string": "str", "integer": "int", "number": "float", "boolean": "bool",
+               "array": "list", "object": "dict", "null": "None"}
+
+
+def schema_type(prop: dict) -> str:
+    """Annotation string a schema property maps to (e.g. "Optional[int]")."""
+    declared = prop.get("type")
+    if declared is None:
+        alternatives = prop.get("oneOf") or prop.get("anyOf")
+        if not alternatives:
+            return "Any"
+        types = [schema_type(alt) for alt in alternatives]
+    elif isinstance(declared, list):
+        types = [_JSON_TYPES[t] for t in declared]
+    else:
+        return _JSON_TYPES[declared]
+
+    types = list(dict.fromkeys(types))
+    if "Any" in types:
+        return "Any"
+    if "None" in types:
+        rest = [t for t in types if t != "None"]
+        inner = rest[0] if len(rest) == 1 else f"Union[{', '.join(rest)}]"
+        return f"Optional[{inner}]"
+    return types[0] if len(types) == 1 else f"Union[{', '.join(types)}]"
+
+
+def _read_schema(filename: str):
+    path = SCHEMAS / filename
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check_models(load_schema=_read_schema) -> list:
+    """Differences between the models and schemas/*.schema.json, as error strings.
+
+    load_schema(filename) returns a parsed schema or None; Corpus.schema
+    checks against the schemas the corpus reads instead.
+    """
+    errors = []
+    for kind, cls in MODELS.items():
+        schema = load_schema(cls.SCHEMA)
+        if schema is None:
+            errors.append(f"  [models] {cls.__name__}: schema not found: {cls.SCHEMA}")
+            continue
+        properties = schema.get("properties", {})
+        annotations = cls.__annotations__
+        for name in properties:
+            if name not in annotations:
+                errors.append(f"  [models] {cls.__name__}: missing field '{name}' ({cls.SCHEMA})")
+            elif annotations[name] != schema_type(properties[name]):
+                errors.append(f"  [models] {cls.__name__}.{name}: annotated {annotations[name]}, "
+                              f"schema says {schema_type(properties[name])}")
+        for name in annotations:
+            if name not in properties:
+                errors.append(f"  [models] {cls.__name__}: field '{name}' not in {cls.SCHEMA}")
+    return errors
+
+
+# ---------------------------------------------------------------------------
+# Memory benchmark
+# ---------------------------------------------------------------------------
+
+def _corpus_items():
+    """(kind, list of top-level dicts) for every entity file, module and brief."""
+    from corpus import ENTITY_MAP
+    from loader import parse_yaml
+    for kind, (filename, _, _) in ENTITY_MAP.items():
+        data = parse_yaml((DATA / filename).read_bytes())
+        yield kind, data.get("entries", []) if isinstance(data, dict) else data or []
+    for kind in ("content", "briefs"):
+        docs = [parse_yaml(p.read_bytes()) for p in sorted((DATA / kind).glob("*.yaml"))]
+        yield kind, [d for d in docs if isinstance(d, dict)]
+
+
+def bench():
+    """Traced memory held by the top-level objects: dicts vs. models.
+
+    Nested values are shared between the two representations, so the
+    difference is exactly the per-object overhead a corpus snapshot pays.
+    """
+    print(f"{'kind':<14} {'objects':>7} {'dicts':>10} {'models':>10} {'saved':>6}")
+    total_dicts = total_models = 0
+    for kind, items in _corpus_items():
+        tracemalloc.start()
+        dicts = [dict(item) for item in items]
+        dict_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        models = to_models(kind, items)
+        model_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        if [m.to_dict() for m in models] != dicts:
+            print(f"❌ {kind}: models do not round-trip")
+            sys.exit(1)
+        total_dicts += dict_bytes
+        total_models += model_bytes
+        saved = 100 * (1 - model_bytes / dict_bytes) if dict_bytes else 0
+        print(f"{kind:<14} {len(items):>7} {dict_bytes / 1024:>7.1f} KiB {model_bytes / 1024:>7.1f} KiB {saved:>5.0f}%")
+    saved = 100 * (1 - total_models / total_dicts) if total_dicts else 0
+    print(f"{'total':<14} {'':>7} {total_dicts / 1024:>7.1f} KiB {total_models / 1024:>7.1f} KiB {saved:>5.0f}%")
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+    if command == "check":
+        errors = check_models()
+        if errors:
+            print(f"❌ models: {len(errors)} difference(s) from schemas/")
+            for e in errors:
+                print(e)
+            sys.exit(1)
+        print(f"✅ models ({len(MODELS)} classes): match schemas/")
+    elif command == "bench":
+        bench()
+    else:
+        print(__doc__)
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+prose.py - Dangling entity references in prose.
+
+Module prose (data/content/), brief sections (data/briefs/) and the free-text
+fields of every entity mention "Trap 8", "Obs 22", "S1", "G27-02", "SV-01".
+This scans every text field once with refgraph.py's combined pattern and
+reports each reference to an entity that does not exist, with its file and
+location ("ITB-B §B1.1", "B05 §3.2", "Gap G20-01").
+
+"§" references to module sections ("ITB-A10 §3.4", or "§D5.1" inside a
+module) are looked up in the corpus SectionIndex (anchors.py); those that
+don't resolve are reported as warnings, since section numbering in the prose
+is looser than entity IDs. data/index_meta.yaml is scanned too.
+
+The cross-reference fields refgraph.py already checks, and identifier fields
+(section ids, module codes), are not scanned.
+
+Scan results are kept per file in .cache/prose_refs.pickle, keyed by the
+file's content hash, so only files that changed are read again; they are
+scanned in worker processes when there is enough YAML to pay for it.
+References are checked against the current IDs on every run.
+
+Usage:
+    python prose.py                 # report dangling references in prose
+    python prose.py --full          # rescan every file
+    python prose.py --jobs 4        # scan with 4 processes
+"""
+
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import cache
+import shards
+from corpus import Corpus, ENTITY_MAP
+from loader import load_yaml, strip_jobs_flag, get_jobs, PARALLEL_MIN_BYTES
+from manifest import ValidationManifest, digest
+from refgraph import RefGraph, REF_FIELDS, KINDS, LABELS, extract_refs
+from anchors import section_refs, section_label
+
+BASE = Path(__file__).parent.parent
+CACHE_PATH = cache.CACHE_DIR / "prose_refs.pickle"
+
+# Bump whenever what is scanned, or how, changes.
+SCANNER_VERSION = "3"
+
+# Identifier fields: their values name things, they don't refer to them
+ID_FIELDS = {"id", "code", "number", "module_code", "brief_id"}
+
+# Reference kind of "§" references; their id is (module code, anchor)
+SECTION = "section"
+
+
+def _walk(node, location: str, label: str, field: str = None):
+    """Yield (location, field, text) for every string under node.
+
+    field is the top-level field the text sits in; location moves to
+    "<label> §<id>" inside each section and subsection.
+    """
+    if isinstance(node, str):
+        yield location, field, node
+    elif isinstance(node, list):
+        for item in node:
+            yield from _walk(item, location, label, field)
+    elif isinstance(node, dict):
+        for key, value in node.items():
+            if key in ID_FIELDS:
+                continue
+            if key in ("sections", "subsections") and isinstance(value, list):
+                for i, section in enumerate(value, start=1):
+                    if isinstance(section, dict):
+                        sid = section_label(section.get("id"), section.get("title")) or i
+                    else:
+                        sid = i
+                    yield from _walk(section, f"{label} §{sid}", label)
+            else:
+                yield from _walk(value, location, label, field or key)
+
+
+def scan_document(data, kind: str, stem: str) -> list:
+    """[(location, field, ref kind, ref id)] for one parsed file, in document order.
+
+    kind is "content", "brief", "index_meta", an entity type (whole file) or
+    "shard:<entity type>" (one entry). Unqualified "§" references are read
+    as sections of the module itself, and skipped outside modules.
+    """
+    if data is None:
+        return []
+    texts = []
+    context = None
+    if kind in ("content", "brief"):
+        if isinstance(data, dict):
+            label = str(data.get("module_code" if kind == "content" else "brief_id") or stem)
+            texts = _walk(data, label, label)
+            context = label if kind == "content" else None
+    elif kind == "index_meta":
+        texts = _walk(data, stem, stem)
+    else:
+        entity_type = kind.split(":", 1)[-1]
+        entries = [data] if kind.startswith("shard:") else (
+            data.get("entries", []) if isinstance(data, dict) else data)
+        id_field = ENTITY_MAP[entity_type][2]
+        skip = REF_FIELDS.get(entity_type, {})
+        label = LABELS[KINDS[entity_type]]
+        texts = [text for entry in entries or [] if isinstance(entry, dict)
+                 for text in _walk({k: v for k, v in entry.items() if k not in skip},
+                                   f"{label} {entry.get(id_field, '?')}", label)]
+    refs = []
+    for location, field, text in texts:
+        refs.extend((location, field, ref_kind, ref_id) for ref_kind, ref_id in extract_refs(text))
+        refs.extend((location, field, SECTION, (module or context, anchor))
+                    for module, anchor in section_refs(text) if module or context)
+    return refs
+
+
+def scan_file(task: tuple) -> list:
+    path, kind = task
+    return scan_document(load_yaml(path), kind, path.stem)
+
+
+def prose_files(corpus: Corpus) -> list:
+    """(path, kind) for every file scanned, in report order."""
+    files = []
+    for entity_type in ENTITY_MAP:
+        if corpus.is_sharded(entity_type):
+            files.extend((path, f"shard:{entity_type}")
+                         for path in shards.shard_paths(corpus.shard_dir(entity_type)))
+        elif corpus.path(entity_type).exists():
+            files.append((corpus.path(entity_type), entity_type))
+    for directory, kind in ((corpus.content_dir, "content"), (corpus.briefs_dir, "brief")):
+        files.extend((path, kind) for path in sorted(directory.glob("*.yaml")))
+    index_meta = corpus.data_dir / "index_meta.yaml"
+    if index_meta.exists():
+        files.append((index_meta, "index_meta"))
+    return files
+
+
+def scan_corpus(corpus: Corpus, store: ValidationManifest) -> dict:
+    """{path: references} for every file, reusing stored scans of unchanged files."""
+    files = prose_files(corpus)
+    keys = {path: digest(SCANNER_VERSION, kind, store.file_hash(path)) for path, kind in files}
+    pending = [(path, kind) for path, kind in files if not store.is_current(f"prose:{path.name}:{kind}",
+                                                                            keys[path])]
+    workers = get_jobs()
+    if (workers > 1 and len(pending) > 1
+            and sum(path.stat().st_size for path, _ in pending) >= PARALLEL_MIN_BYTES):
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            for (path, kind), refs in zip(pending, pool.map(scan_file, pending)):
+                store.record(f"prose:{path.name}:{kind}", keys[path], refs)
+    return {path: store.cached(f"prose:{path.name}:{kind}", keys[path], lambda: scan_file((path, kind)))
+            for path, kind in files}
+
+
+def dangling_prose_refs(corpus: Corpus = None, full: bool = False) -> tuple:
+    """(errors, warnings) as report lines: prose references to missing
+    entities, and "§" references to sections that don't exist.
+
+    Section references to modules the corpus doesn't have are not reported.
+    """
+    corpus = corpus or Corpus()
+    graph = RefGraph.build(corpus)
+    sections = corpus.sections
+    store = ValidationManifest(CACHE_PATH if cache.is_enabled() else None, full=full)
+    scans = scan_corpus(corpus, store)
+    store.save()
+    errors, warnings = [], []
+    for path, refs in scans.items():
+        relpath = path.relative_to(corpus.data_dir).as_posix()
+        for location, field, kind, ref_id in refs:
+            if kind == SECTION:
+                owner, anchor = ref_id
+                if owner in sections.anchors and sections.lookup(owner, anchor) is None:
+                    warnings.append(f"  [prose] {relpath}: {location} [{field}]: "
+                                    f"{owner} §{anchor} does not resolve")
+            elif kind in graph.ids and ref_id not in graph.ids[kind]:
+                errors.append(f"  [prose] {relpath}: {location} [{field}]: "
+                              f"{LABELS[kind]} {ref_id} does not exist")
+    return errors, warnings
+
+
+def run_prose(args: list) -> int:
+    """CLI for `prose.py` / `itp prose`. Returns an exit code."""
+    full = "--full" in args
+    args = [a for a in args if a != "--full"]
+    if args:
+        print(__doc__)
+        return 2
+    errors, warnings = dangling_prose_refs(full=full)
+    if warnings:
+        print(f"⚠️  prose: {len(warnings)} section reference(s) that don't resolve")
+        for w in warnings:
+            print(w)
+    if errors:
+        print(f"❌ prose: {len(errors)} dangling reference(s)")
+        for e in errors:
+            print(e)
+        return 1
+    print("✅ prose: every entity reference resolves")
+    return 0
+
+
+def main():
+    sys.exit(run_prose(strip_jobs_flag(cache.strip_cache_flag(sys.argv[1:]))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+refgraph.py - Typed reference graph between entities.
+
+Every entity (variable, gap, trap, observation, scenario, session, module)
+is a node, written like "Trap 8", "Obs 10", "Scenario S1" or "Module ITB-A".
+Edges come from the reference fields of each entity type: free-text fields
+such as cross_refs are scanned with one combined, precompiled pattern for
+"Obs N", "Trap N", scenario IDs, gap IDs and variable IDs; list fields such as
+a gap's modules hold module codes directly.
+
+Each entity type is read once, into a fragment of (ids, edges); validate.py
+keeps fragments in its manifest, so an unchanged file is not even re-read.
+The graph keeps outgoing and incoming adjacency lists, so integrity checks,
+backlinks and impact (everything that transitively references a node) are
+linear in the number of edges.
+
+Usage:
+    python refgraph.py                      # nodes and edges per type
+    python refgraph.py backlinks "Trap 8"   # entities that reference Trap 8
+    python refgraph.py refs "Scenario S1"   # what Scenario S1 references
+    python refgraph.py impact "Obs 10"      # everything depending on Obs 10, transitively
+    python refgraph.py dangling             # references to entities that don't exist
+"""
+
+import re
+import sys
+from collections import defaultdict, deque
+
+import cache
+from corpus import Corpus, ENTITY_MAP
+
+# Node kind for each entity type, and how nodes of that kind are written
+KINDS = {
+    "variables": "variable",
+    "gaps": "gap",
+    "traps": "trap",
+    "observations": "obs",
+    "scenarios": "scenario",
+    "sessions": "session",
+    "modules": "module",
+}
+LABELS = {"variable": "Variable", "gap": "Gap", "trap": "Trap", "obs": "Obs",
+          "scenario": "Scenario", "session": "Session", "module": "Module"}
+
+# Free-text references, one alternative per kind. Obs and Trap numbers are
+# normalized (leading zeros stripped) to compare with integer IDs.
+REF_PATTERN = re.compile(
+    r"Obs\s+(?P<obs>\d+)"
+    r"|Trap\s+(?P<trap>\d+)"
+    r"|\b(?P<scenario>S\d+[A-Z]?|W\d+)\b"
+    r"|\b(?P<gap>G\d+-\d+)\b"
+    r"|\b(?P<variable>(?:SV|FV|TV|PO|NQ)-\d{2})\b"
+)
+NUMBERED = ("obs", "trap")
+
+# References are reported grouped by kind, in this order
+KIND_ORDER = {kind: i for i, kind in enumerate(("obs", "trap", "scenario", "gap", "variable"))}
+
+TEXT = "text"
+
+# Reference fields of each entity type -> TEXT (scan for references) or the
+# kind of node its list items name directly
+REF_FIELDS = {
+    "variables": {"cross_refs": TEXT},
+    "gaps": {"modules": "module", "blocking_for": TEXT, "cross_refs": TEXT},
+    "traps": {"cross_refs": TEXT},
+    "observations": {"cross_refs": TEXT},
+    "scenarios": {"cross_refs": TEXT, "traps_activated": TEXT},
+    "sessions": {"modules_affected": "module"},
+    "modules": {"dependencies": "module"},
+}
+
+# List values that stand for "every module" rather than naming one
+MODULE_WILDCARDS = {"All"}
+
+
+def extract_refs(text) -> list:
+    """[(kind, id)] for the references in a free-text string, grouped by kind."""
+    if not isinstance(text, str):
+        return []
+    refs = []
+    for m in REF_PATTERN.finditer(text):
+        kind = m.lastgroup
+        ref_id = m.group(kind)
+        refs.append((kind, str(int(ref_id)) if kind in NUMBERED else ref_id))
+    refs.sort(key=lambda ref: KIND_ORDER[ref[0]])
+    return refs
+
+
+def entity_refs(corpus: Corpus, entity_type: str) -> tuple:
+    """(ids, edges) of one entity type, from a single pass over its entries.
+
+    ids is the sorted list of entity IDs as strings; edges is a list of
+    (source id, field, target kind, target id) in entry and field order.
+    """
+    id_field = ENTITY_MAP[entity_type][2]
+    fields = REF_FIELDS.get(entity_type, {})
+    ids = set()
+    edges = []
+    for entry in corpus.iter_entries(entity_type):
+        ids.add(str(entry.get(id_field, "")))
+        source = str(entry.get(id_field, "?"))
+        for field, target in fields.items():
+            values = entry.get(field) or []
+            if not isinstance(values, list):
+                continue
+            for value in values:
+                if target == TEXT:
+                    edges.extend((source, field, kind, ref_id) for kind, ref_id in extract_refs(value))
+                elif isinstance(value, str) and value not in MODULE_WILDCARDS:
+                    edges.append((source, field, target, value))
+    return sorted(ids), edges
+
+
+class RefGraph:
+    """Entities and the references between them, with adjacency in both directions."""
+
+    def __init__(self):
+        self.ids = {}                    # kind -> set of IDs
+        self.edges = {}                  # entity type -> [(source id, field, kind, id)]
+        self.out = defaultdict(list)     # (kind, id) -> [(field, (kind, id))]
+        self.back = defaultdict(list)    # (kind, id) -> [(field, (kind, id))]
+
+    @classmethod
+    def build(cls, corpus: Corpus = None, fragment=None) -> "RefGraph":
+        """Graph over every entity type the corpus has.
+
+        fragment(corpus, entity_type) defaults to entity_refs; validate.py
+        passes one that reuses stored fragments.
+        """
+        corpus = corpus or Corpus()
+        fragment = fragment or entity_refs
+        graph = cls()
+        for entity_type in ENTITY_MAP:
+            if corpus.exists(entity_type):
+                graph.add(entity_type, *fragment(corpus, entity_type))
+        return graph
+
+    def add(self, entity_type: str, ids, edges: list):
+        source_kind = KINDS[entity_type]
+        self.ids[source_kind] = set(ids)
+        self.edges[entity_type] = edges
+        for source, field, kind, ref_id in edges:
+            self.out[(source_kind, source)].append((field, (kind, ref_id)))
+            self.back[(kind, ref_id)].append((field, (source_kind, source)))
+
+    def exists(self, node: tuple) -> bool:
+        return node[1] in self.ids.get(node[0], ())
+
+    def dangling(self, entity_type: str, checks: dict = None) -> list:
+        """Edges from an entity type whose target does not exist.
+
+        checks maps field -> the kinds to check (default: every field, every
+        kind the graph has IDs for).
+        """
+        missing = []
+        for edge in self.edges.get(entity_type, []):
+            _, field, kind, ref_id = edge
+            if checks is not None and kind not in checks.get(field, ()):
+                continue
+            if kind in self.ids and ref_id not in self.ids[kind]:
+                missing.append(edge)
+        return missing
+
+    def references(self, node: tuple) -> list:
+        """[(field, node)] that node refers to."""
+        return self.out.get(node, [])
+
+    def backlinks(self, node: tuple) -> list:
+        """[(field, node)] referring to node."""
+        return self.back.get(node, [])
+
+    def impact(self, node: tuple) -> list:
+        """Every node that references node, directly or through others, nearest first."""
+        seen = {node}
+        order = []
+        queue = deque([node])
+        while queue:
+            for _, source in self.back.get(queue.popleft(), []):
+                if source not in seen:
+                    seen.add(source)
+                    order.append(source)
+                    queue.append(source)
+        return order
+
+
+def label(node: tuple) -> str:
+    return f"{LABELS[node[0]]} {node[1]}"
+
+
+def parse_node(graph: RefGraph, text: str):
+    """A node from "Trap 8", "Obs 010", "S1", "Scenario S1", "G20-01", "ITB-A", ..."""
+    words = text.split(None, 1)
+    if len(words) == 2 and words[0].lower() in {l.lower() for l in LABELS.values()}:
+        kind = next(k for k, l in LABELS.items() if l.lower() == words[0].lower())
+        ref_id = words[1].strip()
+        return (kind, str(int(ref_id)) if kind in NUMBERED and ref_id.isdigit() else ref_id)
+    refs = extract_refs(text)
+    if len(refs) == 1:
+        return refs[0]
+    if text in graph.ids.get("module", ()):
+        return ("module", text)
+    return None
+
+
+def run_refs(args: list) -> int:
+    """CLI for `refgraph.py` / `itp refs`. Returns an exit code."""
+    graph = RefGraph.build()
+    if not args:
+        total = 0
+        for entity_type, edges in graph.edges.items():
+            total += len(edges)
+            print(f"  {entity_type:<14} {len(graph.ids[KINDS[entity_type]]):>4} entities  "
+                  f"{len(edges):>4} references")
+        dangling = sum(len(graph.dangling(t)) for t in graph.edges)
+        print(f"\n{'⚠️ ' if dangling else '✅'} {sum(len(ids) for ids in graph.ids.values())} entities, "
+              f"{total} references ({dangling} dangling)")
+        return 0
+
+    command, rest = args[0], args[1:]
+    if command == "dangling" and not rest:
+        count = 0
+        for entity_type in graph.edges:
+            source_kind = KINDS[entity_type]
+            for source, field, kind, ref_id in graph.dangling(entity_type):
+                count += 1
+                print(f"  {label((source_kind, source))} [{field}] -> {label((kind, ref_id))}")
+        print(f"\n{'❌' if count else '✅'} {count} dangling reference(s)")
+        return 1 if count else 0
+
+    if command not in ("backlinks", "refs", "impact") or len(rest) != 1:
+        print(__doc__)
+        return 2
+    node = parse_node(graph, rest[0])
+    if node is None:
+        print(f"❌ Not an entity reference: {rest[0]}")
+        return 2
+    if not graph.exists(node):
+        print(f"⚠️  {label(node)} does not exist")
+
+    if command == "impact":
+        nodes = graph.impact(node)
+        for other in nodes:
+            print(f"  {label(other)}")
+        print(f"\n{len(nodes)} entities depend on {label(node)}")
+        return 0
+    links = graph.backlinks(node) if command == "backlinks" else graph.references(node)
+    for field, other in links:
+        print(f"  {label(other):<24} [{field}]")
+    print(f"\n{len(links)} reference(s) {'to' if command == 'backlinks' else 'from'} {label(node)}")
+    return 0
+
+
+def main():
+    sys.exit(run_refs(cache.strip_cache_flag(sys.argv[1:])))
+
+
+if __name__ == "__main__":
+    main()
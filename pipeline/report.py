@@ -0,0 +1,170 @@
+"""
+report.py - Machine-readable reports of a validate or build run (--report).
+
+`validate.py --report json|junit` and `build.py --report json|junit` record
+one item per entity type, content module, brief and output file: its status,
+errors, bytes processed, and how long it took to parse, validate and render.
+The report is written to reports/<tool>.json or reports/<tool>.xml; the
+console output only gains a line naming it.
+
+Parse times are what loading the file cost in this run (loader.PARSE_TIMES):
+a YAML parse, or a parse-cache hit. With --report, validate.py loads every
+file up front so the parse and validate times of each item are separate;
+items whose result came from the manifest are marked cached.
+
+JSON: {"tool", "status", "duration_ms", "summary", "items": [...]}, with
+durations in milliseconds; build items also carry output_bytes. JUnit: one
+testsuite per item kind and one testcase per item, failures carrying the
+error lines; bytes and durations are testcase properties.
+"""
+
+import json
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from xml.etree import ElementTree as ET
+
+from loader import PARSE_TIMES
+
+BASE = Path(__file__).parent.parent
+REPORT_DIR = BASE / "reports"
+
+FORMATS = {"json": ".json", "junit": ".xml"}
+
+
+def strip_report_flag(args: list) -> tuple:
+    """Handle a --report json|junit CLI flag; return (args without it, format or None)."""
+    if "--report" not in args:
+        return args, None
+    i = args.index("--report")
+    if i + 1 >= len(args) or args[i + 1] not in FORMATS:
+        print(f"--report requires one of: {', '.join(FORMATS)}")
+        sys.exit(2)
+    return args[:i] + args[i + 2:], args[i + 1]
+
+
+def file_bytes(paths) -> int:
+    return sum(p.stat().st_size for p in paths if p.exists())
+
+
+def parse_seconds(paths) -> float:
+    """Time the last load of these files took, in this process."""
+    return sum(PARSE_TIMES.get(p, 0.0) for p in paths)
+
+
+class Report:
+    """Items of one validate or build run."""
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        self.items = []
+        self.started = time.perf_counter()
+        self.timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+    def add(self, kind: str, name: str, errors=(), warnings=(), paths=(), size: int = None,
+            parse: float = None, validate: float = None, render: float = None,
+            cached: bool = False, output_bytes: int = None) -> dict:
+        """Record one item. Durations are in seconds; parse defaults to the load
+        time of paths and size to their size on disk."""
+        paths = list(paths)
+        item = {
+            "kind": kind,
+            "name": name,
+            "status": "failed" if errors else ("warning" if warnings else "passed"),
+            "errors": [e.strip() for e in errors],
+            "warnings": [w.strip() for w in warnings],
+            "files": [_relative(p) for p in paths],
+            "bytes": file_bytes(paths) if size is None else size,
+            "parse_ms": _ms(parse_seconds(paths) if parse is None else parse),
+            "validate_ms": _ms(validate),
+            "render_ms": _ms(render),
+            "cached": cached,
+        }
+        if output_bytes is not None:
+            item["output_bytes"] = output_bytes
+        self.items.append(item)
+        return item
+
+    @property
+    def failed(self) -> bool:
+        return any(item["status"] == "failed" for item in self.items)
+
+    def to_dict(self) -> dict:
+        return {
+            "tool": self.tool,
+            "timestamp": self.timestamp,
+            "status": "failed" if self.failed else "passed",
+            "duration_ms": _ms(time.perf_counter() - self.started),
+            "summary": {
+                "items": len(self.items),
+                "failed": sum(item["status"] == "failed" for item in self.items),
+                "errors": sum(len(item["errors"]) for item in self.items),
+                "bytes": sum(item["bytes"] for item in self.items),
+                "parse_ms": _ms(sum(item["parse_ms"] for item in self.items) / 1000),
+                "validate_ms": _ms(sum(item["validate_ms"] for item in self.items) / 1000),
+                "render_ms": _ms(sum(item["render_ms"] for item in self.items) / 1000),
+            },
+            "items": self.items,
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2, ensure_ascii=False) + "\n"
+
+    def to_junit(self) -> str:
+        data = self.to_dict()
+        suites = ET.Element("testsuites", name=self.tool, tests=str(len(self.items)),
+                            failures=str(data["summary"]["failed"]),
+                            time=_seconds(data["duration_ms"]))
+        by_kind = {}
+        for item in self.items:
+            by_kind.setdefault(item["kind"], []).append(item)
+        for kind, items in by_kind.items():
+            suite = ET.SubElement(suites, "testsuite", name=f"{self.tool}.{kind}",
+                                  tests=str(len(items)),
+                                  failures=str(sum(i["status"] == "failed" for i in items)),
+                                  timestamp=self.timestamp,
+                                  time=_seconds(sum(_item_ms(i) for i in items)))
+            for item in items:
+                case = ET.SubElement(suite, "testcase", classname=f"{self.tool}.{kind}",
+                                     name=item["name"], time=_seconds(_item_ms(item)))
+                properties = ET.SubElement(case, "properties")
+                for key in ("bytes", "parse_ms", "validate_ms", "render_ms", "cached"):
+                    value = item[key]
+                    ET.SubElement(properties, "property", name=key,
+                                  value=str(value).lower() if isinstance(value, bool) else str(value))
+                if item["errors"]:
+                    failure = ET.SubElement(case, "failure",
+                                            message=f"{len(item['errors'])} error(s)")
+                    failure.text = "\n".join(item["errors"])
+                if item["warnings"]:
+                    ET.SubElement(case, "system-out").text = "\n".join(item["warnings"])
+        ET.indent(suites)
+        return '<?xml version="1.0" encoding="UTF-8"?>\n' + ET.tostring(suites, encoding="unicode") + "\n"
+
+    def write(self, fmt: str, path: Path = None) -> Path:
+        """Write the report in fmt ("json" or "junit"); returns the path written."""
+        path = path or REPORT_DIR / f"{self.tool}{FORMATS[fmt]}"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.to_json() if fmt == "json" else self.to_junit(), encoding="utf-8")
+        print(f"📄 Report: {_relative(path)}")
+        return path
+
+
+def _ms(seconds) -> float:
+    return round((seconds or 0.0) * 1000, 3)
+
+
+def _item_ms(item: dict) -> float:
+    return item["parse_ms"] + item["validate_ms"] + item["render_ms"]
+
+
+def _seconds(ms: float) -> str:
+    return f"{ms / 1000:.6f}"
+
+
+def _relative(path: Path) -> str:
+    try:
+        return Path(path).resolve().relative_to(BASE.resolve()).as_posix()
+    except ValueError:
+        return str(path)
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+schema_codegen.py - Plain-Python validators generated from the JSON schemas.
+
+Our schemas only use a handful of keywords (type, properties, required,
+additionalProperties, items, enum, pattern, min/max bounds and local $refs).
+For each schemas/*.schema.json this module writes a Python module of
+straight-line checks for exactly that schema into .cache/validators/, which
+validates an entry without interpreting the schema keyword by keyword.
+
+Generated checks report the same messages, at the same paths and in the same
+order, as the jsonschema validator they replace. Each module records the
+hash of the schema (plus the jsonschema version, whose messages it copies)
+it was generated from; when the schema changes the module is regenerated on
+first use. A stale module is never used: with the cache disabled it is left
+alone, and validation falls back to jsonschema. So does any schema using a
+keyword the generator does not know.
+
+Usage:
+    python schema_codegen.py            # (re)generate every schema's validator
+    python schema_codegen.py check      # compare generated and jsonschema results on data/
+"""
+
+import re
+import sys
+import json
+import hashlib
+from importlib.metadata import version
+from pathlib import Path
+from urllib.parse import unquote
+
+import cache
+
+GENERATED_DIR = cache.CACHE_DIR / "validators"
+
+# Bump whenever the generated code changes.
+CODEGEN_VERSION = 1
+
+HASH_LINE = re.compile(r'^SCHEMA_HASH = "([0-9a-f]+)"$', re.MULTILINE)
+
+# Keywords that never produce an error (format is only asserted with a
+# format checker, which our validators don't use)
+ANNOTATIONS = {"$schema", "$id", "$comment", "title", "description", "default", "examples",
+               "definitions", "format", "readOnly", "writeOnly"}
+
+TYPE_CHECKS = {
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "string": "isinstance({v}, str)",
+    "null": "{v} is None",
+    "boolean": "isinstance({v}, bool)",
+    "number": "(isinstance({v}, Number) and not isinstance({v}, bool))",
+    "integer": "(isinstance({v}, int) and not isinstance({v}, bool)"
+               " or isinstance({v}, float) and {v}.is_integer())",
+}
+
+PREAMBLE = '''\
+from numbers import Number
+import re
+
+from jsonschema._utils import equal
+
+
+def extras_msg(extras):
+    return ", ".join(repr(extra) for extra in extras), "was" if len(extras) == 1 else "were"
+'''
+
+
+class Unsupported(Exception):
+    """The schema uses something the generator cannot reproduce exactly."""
+
+
+def schema_hash(schema) -> str:
+    """Identity of a generated module: generator, jsonschema version and the schema itself."""
+    payload = json.dumps([CODEGEN_VERSION, version("jsonschema"), schema], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def module_path(filename: str) -> Path:
+    """gap.schema.json -> .cache/validators/gap_schema.py"""
+    return GENERATED_DIR / f"{filename.removesuffix('.json').replace('.', '_')}.py"
+
+
+class _Generator:
+    """Turns one schema (Draft 6/7 semantics) into the source of a module."""
+
+    def __init__(self, schema):
+        self.root = schema
+        self.constants = []
+        self.functions = {}   # id(subschema) -> function name
+        self.queue = []
+        self.count = 0
+
+    def name(self, prefix: str) -> str:
+        self.count += 1
+        return f"{prefix}{self.count}"
+
+    def constant(self, prefix: str, expr: str) -> str:
+        name = self.name(prefix)
+        self.constants.append(f"{name} = {expr}")
+        return name
+
+    def function(self, schema) -> str:
+        """Name of the function checking a (referenced) subschema."""
+        if id(schema) not in self.functions:
+            self.functions[id(schema)] = "check" if schema is self.root else self.name("check_")
+            self.queue.append(schema)
+        return self.functions[id(schema)]
+
+    def resolve(self, ref: str):
+        if not ref.startswith("#"):
+            raise Unsupported(f"non-local $ref {ref!r}")
+        target = self.root
+        for token in unquote(ref[1:]).split("/")[1:]:
+            token = token.replace("~1", "/").replace("~0", "~")
+            try:
+                target = target[int(token)] if isinstance(target, list) else target[token]
+            except (KeyError, IndexError, ValueError, TypeError):
+                raise Unsupported(f"unresolvable $ref {ref!r}") from None
+        return target
+
+    def source(self, key: str, filename: str) -> str:
+        self.function(self.root)
+        bodies = []
+        while self.queue:
+            schema = self.queue.pop(0)
+            body = self.node(schema, "instance", [], 1) or ["    pass"]
+            bodies.append(f"\n\ndef {self.functions[id(schema)]}(instance, path, errors):\n"
+                          + "\n".join(body) + "\n")
+        constants = "".join(f"{line}\n" for line in self.constants)
+        return (f"# Generated by schema_codegen.py from {filename}. Do not edit.\n"
+                f'SCHEMA_HASH = "{key}"\n\n' + PREAMBLE
+                + (f"\n\n{constants}" if constants else "") + "".join(bodies))
+
+    # --- Schemas --------------------------------------------------------------
+
+    def node(self, schema, var: str, parts: list, depth: int) -> list:
+        """Lines checking the value in var (at path + parts) against schema."""
+        pad = "    " * depth
+        if schema is True:
+            return []
+        if schema is False:
+            return [f"{pad}errors.append(({_path(parts)}, 'False schema does not allow ' + repr({var})))"]
+        if not isinstance(schema, dict):
+            raise Unsupported(f"schema {schema!r}")
+        if "$ref" in schema:  # Draft 6/7: siblings of $ref are ignored
+            target = self.resolve(schema["$ref"])
+            return [f"{pad}{self.function(target)}({var}, {_path(parts)}, errors)"]
+        if "$id" in schema and schema is not self.root:
+            raise Unsupported("nested $id")
+        lines = []
+        for keyword, value in schema.items():
+            if keyword in ANNOTATIONS:
+                continue
+            method = getattr(self, f"kw_{keyword}", None)
+            if method is None:
+                raise Unsupported(f"keyword {keyword!r}")
+            lines.extend(method(value, schema, var, parts, depth))
+        return lines
+
+    # --- Keywords -------------------------------------------------------------
+
+    def kw_type(self, value, schema, var, parts, depth):
+        pad = "    " * depth
+        types = [value] if isinstance(value, str) else list(value)
+        if any(t not in TYPE_CHECKS for t in types):
+            raise Unsupported(f"type {value!r}")
+        check = " or ".join(TYPE_CHECKS[t].format(v=var) for t in types)
+        message = " is not of type " + ", ".join(repr(t) for t in types)
+        return [f"{pad}if not ({check}):",
+                f"{pad}    errors.append(({_path(parts)}, repr({var}) + {message!r}))"]
+
+    def kw_enum(self, value, schema, var, parts, depth):
+        pad = "    " * depth
+        message = f" is not one of {value!r}"
+        if all(isinstance(each, str) for each in value):
+            values = self.constant("ENUM_", f"frozenset({sorted(value)!r})")
+            check = f"isinstance({var}, str) and {var} in {values}"
+        else:
+            values = self.constant("ENUM_", repr(tuple(value)))
+            check = f"any(equal(each, {var}) for each in {values})"
+        return [f"{pad}if not ({check}):",
+                f"{pad}    errors.append(({_path(parts)}, repr({var}) + {message!r}))"]
+
+    def kw_required(self, value, schema, var, parts, depth):
+        pad = "    " * depth
+        lines = [f"{pad}if isinstance({var}, dict):"]
+        for prop in value:
+            lines += [f"{pad}    if {prop!r} not in {var}:",
+                      f"{pad}        errors.append(({_path(parts)}, {f'{prop!r} is a required property'!r}))"]
+        return lines if value else []
+
+    def kw_properties(self, value, schema, var, parts, depth):
+        pad = "    " * depth
+        lines = []
+        for prop, subschema in value.items():
+            item = self.name("v")
+            inner = self.node(subschema, item, parts + [repr(prop)], depth + 2)
+            if inner:
+                lines += [f"{pad}    if {prop!r} in {var}:", f"{pad}        {item} = {var}[{prop!r}]"] + inner
+        return [f"{pad}if isinstance({var}, dict):"] + lines if lines else []
+
+    def kw_additionalProperties(self, value, schema, var, parts, depth):
+        pad = "    " * depth
+        if "patternProperties" in schema:
+            raise Unsupported("patternProperties")
+        if value is True:
+            return []
+        known = self.constant("PROPERTIES_", f"frozenset({sorted(schema.get('properties', {}))!r})")
+        extras = self.name("extras")
+        lines = [f"{pad}if isinstance({var}, dict):",
+                 f"{pad}    {extras} = [key for key in {var} if key not in {known}]"]
+        if value is False:
+            message = "Additional properties are not allowed (%s %s unexpected)"
+            return lines + [
+                f"{pad}    if {extras}:",
+                f"{pad}        errors.append(({_path(parts)}, {message!r} % extras_msg(sorted(set({extras}), key=str))))"]
+        key, item = self.name("k"), self.name("v")
+        inner = self.node(value, item, parts + [key], depth + 2)
+        if not inner:
+            return []
+        return lines + [f"{pad}    for {key} in set({extras}):",
+                        f"{pad}        {item} = {var}[{key}]"] + inner
+
+    def kw_items(self, value, schema, var, parts, depth):
+        pad = "    " * depth
+        if not isinstance(value, dict) and value is not True:
+            raise Unsupported("items other than a single schema")
+        index, item = self.name("i"), self.name("v")
+        inner = self.node(value, item, parts + [index], depth + 2)
+        if not inner:
+            return []
+        return [f"{pad}if isinstance({var}, list):",
+                f"{pad}    for {index}, {item} in enumerate({var}):"] + inner
+
+    def kw_pattern(self, value, schema, var, parts, depth):
+        pad = "    " * depth
+        regex = self.constant("PATTERN_", f"re.compile({value!r})")
+        message = f" does not match {value!r}"
+        return [f"{pad}if isinstance({var}, str) and not {regex}.search({var}):",
+                f"{pad}    errors.append(({_path(parts)}, repr({var}) + {message!r}))"]
+
+    def _bound(self, value, var, parts, pad, kind, op, message):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise Unsupported(f"bound {value!r}")
+        check = {"number": f"isinstance({var}, Number) and not isinstance({var}, bool)",
+                 "string": f"isinstance({var}, str)",
+                 "array": f"isinstance({var}, list)"}[kind]
+        measure = var if kind == "number" else f"len({var})"
+        return [f"{pad}if {check} and {measure} {op} {value!r}:",
+                f"{pad}    errors.append(({_path(parts)}, repr({var}) + {message!r}))"]
+
+    def kw_minimum(self, value, schema, var, parts, depth):
+        pad = "    " * depth
+        return self._bound(value, var, parts, pad, "number", "<",
+                           f" is less than the minimum of {value!r}")
+
+    def kw_maximum(self, value, schema, var, parts, depth):
+        pad = "    " * depth
+        return self._bound(value, var, parts, pad, "number", ">",
+                           f" is greater than the maximum of {value!r}")
+
+    def kw_minLength(self, value, schema, var, parts, depth):
+        pad = "    " * depth
+        return self._bound(value, var, parts, pad, "string", "<",
+                           " should be non-empty" if value == 1 else " is too short")
+
+    def kw_maxLength(self, value, schema, var, parts, depth):
+        pad = "    " * depth
+        return self._bound(value, var, parts, pad, "string", ">",
+                           " is expected to be empty" if value == 0 else " is too long")
+
+    def kw_minItems(self, value, schema, var, parts, depth):
+        pad = "    " * depth
+        return self._bound(value, var, parts, pad, "array", "<",
+                           " should be non-empty" if value == 1 else " is too short")
+
+    def kw_maxItems(self, value, schema, var, parts, depth):
+        pad = "    " * depth
+        return self._bound(value, var, parts, pad, "array", ">",
+                           " is expected to be empty" if value == 0 else " is too long")
+
+
+def _path(parts: list) -> str:
+    """Expression for the error path: path plus the parts below it."""
+    return f"path + ({', '.join(parts)},)" if parts else "path"
+
+
+def generate(schema, filename: str, key: str = None) -> str:
+    """Source of the validator module for a schema. Raises Unsupported."""
+    return _Generator(schema).source(key or schema_hash(schema), filename)
+
+
+class GeneratedValidator:
+    """A generated module's checks, with validate.schema_errors()' ordering."""
+
+    def __init__(self, filename: str, check):
+        self.filename = filename
+        self._check = check
+
+    def violations(self, instance) -> list:
+        """[(path tuple, message)] sorted by path, like sorted(iter_errors(), key=path)."""
+        errors = []
+        self._check(instance, (), errors)
+        errors.sort(key=lambda e: list(e[0]))
+        return errors
+
+
+def load_generated(filename: str, schema):
+    """GeneratedValidator for a schema, regenerating a stale module; None to use jsonschema."""
+    key = schema_hash(schema)
+    path = module_path(filename)
+    try:
+        source = path.read_text(encoding="utf-8")
+    except OSError:
+        source = None
+    current = HASH_LINE.search(source or "")
+    if current is None or current.group(1) != key:
+        if not cache.is_enabled():
+            return None  # stale, and the cache directory is off limits
+        try:
+            source = generate(schema, filename, key)
+        except Unsupported:
+            return None
+        cache.write_atomic(path, source.encode("utf-8"))
+    namespace = {}
+    exec(compile(source, str(path), "exec"), namespace)
+    return GeneratedValidator(filename, namespace["check"])
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def run_generate(registry) -> int:
+    for name, schema in registry.schemas.items():
+        try:
+            generate(schema, name)
+        except Unsupported as e:
+            print(f"⚠️  {name}: uses jsonschema ({e})")
+            continue
+        load_generated(name, schema)
+        print(f"✅ {name} -> {module_path(name).relative_to(cache.BASE) if cache.BASE in module_path(name).parents else module_path(name)}")
+    return 0
+
+
+def run_check(corpus, registry) -> int:
+    """Validate every entry, content module and brief both ways; report any difference."""
+    from corpus import ENTITY_MAP
+    from content_index import materialize
+    from schema_registry import SchemaRegistry
+    reference = SchemaRegistry(registry.schemas, corpus.schemas_dir, generated=False)
+
+    def instances():
+        for entity_type, (_, schema_file, _) in ENTITY_MAP.items():
+            if corpus.exists(entity_type):
+                for entry in corpus.iter_entries(entity_type):
+                    yield schema_file, entry
+        for data in corpus.content.values():
+            yield "content.schema.json", materialize(data)
+        for data in corpus.briefs.values():
+            yield "brief.schema.json", data
+
+    checked = differences = 0
+    for schema_file, instance in instances():
+        generated = registry.validator(schema_file)
+        if not hasattr(generated, "violations"):  # not generated (this may run as __main__)
+            continue
+        expected = [(tuple(e.absolute_path), e.message) for e in
+                    sorted(reference.validator(schema_file).iter_errors(instance), key=lambda e: list(e.path))]
+        checked += 1
+        if generated.violations(instance) != expected:
+            differences += 1
+            print(f"❌ {schema_file}: generated and jsonschema results differ for {str(instance)[:80]}")
+    if differences:
+        print(f"\n❌ {differences} of {checked} instances differ")
+        return 1
+    print(f"✅ {checked} instances: generated validators match jsonschema")
+    return 0
+
+
+def main():
+    from corpus import Corpus
+    from schema_registry import load_registry
+    args = cache.strip_cache_flag(sys.argv[1:])
+    if args not in ([], ["check"]):
+        print(__doc__)
+        sys.exit(2)
+    corpus = Corpus()
+    registry = load_registry(corpus)
+    sys.exit(run_check(corpus, registry) if args else run_generate(registry))
+
+
+if __name__ == "__main__":
+    main()
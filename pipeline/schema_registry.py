@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+schema_registry.py - All schemas/*.schema.json, loaded once, one ref registry.
+
+A SchemaRegistry holds every schema file a corpus reads, registered under
+its $id (or its file URI) in one `referencing` registry, so cross-file refs
+like "gap.schema.json#/properties/id" resolve as well as internal ones.
+
+Validators are compiled once per schema file and reused by every pass. Where
+schema_codegen.py can generate plain-Python checks for a schema, those are
+used instead; the jsonschema validator is the fallback.
+
+Usage:
+    python schema_registry.py           # list schemas and their validator classes
+"""
+
+import sys
+from pathlib import Path
+
+from jsonschema import Draft6Validator, Draft7Validator
+from jsonschema.validators import validator_for
+from referencing import Registry, Resource
+from referencing.jsonschema import DRAFT7
+
+from schema_codegen import load_generated
+
+# Drafts whose semantics schema_codegen.py reproduces
+CODEGEN_DRAFTS = (Draft6Validator, Draft7Validator)
+
+
+class SchemaRegistry:
+    """The schemas of one corpus, with a shared ref registry and compiled validators."""
+
+    def __init__(self, schemas: dict, base: Path, generated: bool = True):
+        """schemas maps file name -> parsed schema; base is the schemas/ directory.
+
+        generated=False always uses jsonschema validators.
+        """
+        self.schemas = schemas
+        self.generated = generated
+        self.uris = {name: schema.get("$id") or (base / name).absolute().as_uri()
+                     for name, schema in schemas.items()}
+        self.registry = Registry().with_resources(
+            (self.uris[name], Resource.from_contents(schema, default_specification=DRAFT7))
+            for name, schema in schemas.items()
+        ).crawl()
+        self._validators = {}
+
+    def validator(self, filename: str):
+        """Generated or compiled validator for a schema file (None if there is no such schema)."""
+        if filename not in self._validators:
+            schema = self.schemas.get(filename)
+            if schema is None:
+                return None
+            cls = validator_for(schema, default=Draft7Validator)
+            cls.check_schema(schema)
+            if self.generated and cls in CODEGEN_DRAFTS:
+                generated = load_generated(filename, schema)
+                if generated is not None:
+                    self._validators[filename] = generated
+                    return generated
+            self._validators[filename] = cls(schema, registry=self.registry)
+        return self._validators[filename]
+
+
+def load_registry(corpus, previous: SchemaRegistry = None) -> SchemaRegistry:
+    """Registry over every *.schema.json the corpus's source has.
+
+    Returns previous as is if it was built from the very same schema objects.
+    """
+    names = [path.name for path in corpus.source.glob(corpus.schemas_dir, "*.schema.json")]
+    schemas = {name: corpus.schema(name) for name in names}
+    if (previous is not None and previous.schemas.keys() == schemas.keys()
+            and all(previous.schemas[name] is schema for name, schema in schemas.items())):
+        return previous
+    return SchemaRegistry(schemas, corpus.schemas_dir)
+
+
+def main():
+    from corpus import Corpus
+    registry = load_registry(Corpus())
+    for name in registry.schemas:
+        validator = registry.validator(name)
+        print(f"{name:<28} {type(validator).__name__}")
+    print(f"\n✅ {len(registry.schemas)} schemas compiled")
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+search.py - Ranked full-text search over module prose, briefs and entity text.
+
+Indexes every section of data/content/*.yaml and data/briefs/*.yaml, plus the
+long-form text fields of traps, observations and gaps, into an SQLite FTS5
+index (.cache/search.sqlite). Results are ranked by BM25 and point to a
+location such as "ITB-B §B1.1", "B05 §3.2", "Trap 8" or "Gap G27-02".
+
+The index is maintained per source file: before each query, files whose
+size, mtime or ctime changed, or that were modified no earlier than the
+index was last written (as in manifest.py), are re-hashed, and only files
+whose content hash changed are re-parsed and re-indexed.
+
+Usage:
+    python search.py "interceptor depletion"          # top 10 hits
+    python search.py "succession" --limit 25
+    python search.py "Assembly of Experts" --kind briefs
+    python search.py 'NEAR(drone missile, 5)' --raw   # FTS5 query syntax
+    python search.py --reindex                        # rebuild from scratch
+"""
+
+import os
+import sys
+import sqlite3
+import hashlib
+from pathlib import Path
+
+import cache
+import shards
+from anchors import section_label
+from corpus import ENTITY_MAP
+from loader import load_yaml
+
+BASE = Path(__file__).parent.parent
+DATA = BASE / "data"
+INDEX_PATH = cache.CACHE_DIR / "search.sqlite"
+
+# Bump whenever the indexed fields or row layout change.
+INDEX_VERSION = "4"
+
+# Values of --kind: the data/ directory or entity type a row comes from
+KINDS = ("content", "briefs", "traps", "observations", "gaps")
+
+# Long-form text fields indexed for each entity type: (label, fields)
+ENTITY_TEXT = {
+    "traps": ("Trap", ["mechanism", "circular_structure", "resolution_path",
+                       "detection_signal", "wartime_status", "historical_parallel"]),
+    "observations": ("Obs", ["diagnosis", "strategic_implication", "confidence"]),
+    "gaps": ("Gap", ["description", "why_critical", "fill_note"]),
+}
+
+# Tables from an older INDEX_VERSION may have another layout
+DROP_SQL = """
+DROP TABLE IF EXISTS files;
+DROP TABLE IF EXISTS docs;
+"""
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path     TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    ctime_ns INTEGER NOT NULL,
+    size     INTEGER NOT NULL,
+    sha256   TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(
+    title,
+    body,
+    location,
+    kind UNINDEXED,
+    file UNINDEXED,
+    tokenize = 'porter unicode61'
+);
+"""
+
+
+def indexed_files(data_dir: Path = DATA) -> list:
+    """Source files covered by the index, as paths relative to data_dir."""
+    files = []
+    for entity_type in ENTITY_TEXT:
+        path = data_dir / ENTITY_MAP[entity_type][0]
+        directory = shards.shard_dir(data_dir, path.name)
+        if shards.is_sharded(directory):
+            files.extend(shards.shard_paths(directory))
+        elif path.exists():
+            files.append(path)
+    for sub in ("content", "briefs"):
+        if (data_dir / sub).exists():
+            files.extend(sorted((data_dir / sub).glob("*.yaml")))
+    return [p.relative_to(data_dir).as_posix() for p in files]
+
+
+# ---------------------------------------------------------------------------
+# Document extraction: one row per section / entity
+# ---------------------------------------------------------------------------
+
+def _section_rows(sections, parent=None):
+    """Yield (key, title, body) for every section, depth-first."""
+    for i, section in enumerate(sections or [], start=1):
+        if not isinstance(section, dict):
+            continue
+        key = (section_label(section.get("id"), section.get("title"))
+               or (f"{parent}.{i}" if parent else str(i)))
+        yield key, section.get("title") or "", section.get("content") or ""
+        yield from _section_rows(section.get("subsections"), key)
+
+
+def _join(*parts) -> str:
+    return "\n\n".join(p for p in parts if isinstance(p, str) and p)
+
+
+def extract_rows(relpath: str, data) -> list:
+    """(title, body, location, kind) rows for one parsed source file."""
+    if not isinstance(data, (dict, list)):
+        return []
+    rows = []
+
+    if relpath.startswith("content/") and isinstance(data, dict):
+        mc = data.get("module_code") or Path(relpath).stem
+        intro = _join(data.get("preamble"), data.get("footer"))
+        if intro:
+            rows.append((data.get("title") or mc, intro, mc, "content"))
+        for key, title, body in _section_rows(data.get("sections")):
+            rows.append((title, body, f"{mc} §{key}", "content"))
+        return rows
+
+    if relpath.startswith("briefs/") and isinstance(data, dict):
+        bid = data.get("brief_id") or Path(relpath).stem
+        intro = _join(data.get("core_thesis"), data.get("preamble"))
+        if intro:
+            rows.append((data.get("title") or bid, intro, bid, "briefs"))
+        for key, title, body in _section_rows(data.get("sections")):
+            rows.append((title, body, f"{bid} §{key}", "briefs"))
+        return rows
+
+    for entity_type, (label, fields) in ENTITY_TEXT.items():
+        filename = ENTITY_MAP[entity_type][0]
+        if relpath == filename:
+            entries = data.get("entries", []) if isinstance(data, dict) else data
+        elif relpath.startswith(f"{Path(filename).stem}/"):
+            entries = [data]  # one shard = one entry
+        else:
+            continue
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            parts = [entry.get(f) for f in fields]
+            for item in entry.get("historical_parallels") or []:
+                if isinstance(item, dict):
+                    parts.append(_join(item.get("case"), item.get("lesson")))
+            for item in entry.get("extensions") or []:
+                if isinstance(item, dict):
+                    parts.append(_join(item.get("title"), item.get("content")))
+            for item in entry.get("corrections") or []:
+                if isinstance(item, dict):
+                    parts.append(item.get("content"))
+            parts.extend(p for p in entry.get("leading_indicators") or [] if isinstance(p, str))
+            title = entry.get("title") or entry.get("name") or ""
+            rows.append((title, _join(*parts), f"{label} {entry.get('id', '?')}", entity_type))
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Index maintenance
+# ---------------------------------------------------------------------------
+
+class SearchIndex:
+    """Incrementally maintained FTS5 index over the corpus prose."""
+
+    def __init__(self, path: Path = INDEX_PATH, data_dir: Path = DATA):
+        self.path = path
+        self.data_dir = data_dir
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA_SQL)
+        version = self.conn.execute("SELECT value FROM meta WHERE key = 'index_version'").fetchone()
+        if version is None or version[0] != INDEX_VERSION:
+            self.conn.executescript(DROP_SQL + SCHEMA_SQL)
+            self.clear()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM docs")
+            self.conn.execute("DELETE FROM files")
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('index_version', ?)",
+                              (INDEX_VERSION,))
+
+    def update(self) -> list:
+        """Re-index files whose content changed. Returns the re-indexed paths."""
+        known = {row[0]: row[1:] for row in
+                 self.conn.execute("SELECT path, mtime_ns, ctime_ns, size, sha256 FROM files")}
+        written = os.stat(self.path).st_mtime_ns  # the index's last commit
+        current = indexed_files(self.data_dir)
+        changed = []
+
+        with self.conn:
+            for relpath in set(known) - set(current):
+                self.conn.execute("DELETE FROM docs WHERE file = ?", (relpath,))
+                self.conn.execute("DELETE FROM files WHERE path = ?", (relpath,))
+                changed.append(relpath)
+
+            for relpath in current:
+                path = self.data_dir / relpath
+                st = os.stat(path)
+                stat = (st.st_mtime_ns, st.st_ctime_ns, st.st_size)
+                old = known.get(relpath)
+                if old and old[:3] == stat and st.st_mtime_ns < written:
+                    continue
+                with open(path, "rb") as f:
+                    sha = hashlib.sha256(f.read()).hexdigest()
+                if old and old[3] == sha:
+                    self.conn.execute("UPDATE files SET mtime_ns = ?, ctime_ns = ?, size = ? WHERE path = ?",
+                                      stat + (relpath,))
+                    continue
+
+                self.conn.execute("DELETE FROM docs WHERE file = ?", (relpath,))
+                self.conn.executemany(
+                    "INSERT INTO docs (title, body, location, kind, file) VALUES (?, ?, ?, ?, ?)",
+                    [(title, body, location, kind, relpath)
+                     for title, body, location, kind in extract_rows(relpath, load_yaml(path))])
+                self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                                  (relpath,) + stat + (sha,))
+                changed.append(relpath)
+        return changed
+
+    def search(self, query: str, limit: int = 10, kind: str = None, raw: bool = False) -> list:
+        """Ranked hits as (location, title, snippet, file, score) tuples."""
+        match = query if raw else to_match_expression(query)
+        if not match:
+            return []
+        sql = ("SELECT location, title, snippet(docs, 1, '[', ']', '…', 16), file, "
+               "bm25(docs, 4.0, 1.0, 8.0) AS score FROM docs WHERE docs MATCH ?")
+        params = [match]
+        if kind:
+            sql += " AND kind = ?"
+            params.append(kind)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        return self.conn.execute(sql, params).fetchall()
+
+
+def to_match_expression(query: str) -> str:
+    """Turn plain words into an FTS5 AND-query, quoting each term.
+
+    Quoting keeps identifiers like G27-02 or ITB-A10 from being parsed as
+    FTS5 operators.
+    """
+    terms = [t.replace('"', '""') for t in query.split()]
+    return " ".join(f'"{t}"' for t in terms if t)
+
+
+def run_search(args: list) -> int:
+    """CLI for `search.py` / `itp search`. Returns an exit code."""
+    limit = 10
+    kind = None
+    raw = "--raw" in args
+    reindex = "--reindex" in args
+    args = [a for a in args if a not in ("--raw", "--reindex")]
+    for flag in ("--limit", "--kind"):
+        if flag in args:
+            i = args.index(flag)
+            if i + 1 >= len(args):
+                print(f"{flag} requires a value")
+                return 2
+            value = args[i + 1]
+            if flag == "--limit":
+                if not value.isdigit() or int(value) < 1:
+                    print(f"--limit requires a positive number, not {value!r}")
+                    return 2
+                limit = int(value)
+            else:
+                if value not in KINDS:
+                    print(f"--kind must be one of: {', '.join(KINDS)}")
+                    return 2
+                kind = value
+            del args[i:i + 2]
+    query = " ".join(args)
+
+    with SearchIndex() as index:
+        if reindex:
+            index.clear()
+        changed = index.update()
+        if reindex:
+            print(f"✅ Indexed {len(changed)} files into {index.path}")
+        if not query:
+            if not reindex:
+                print(__doc__)
+                return 2
+            return 0
+        try:
+            hits = index.search(query, limit=limit, kind=kind, raw=raw)
+        except sqlite3.OperationalError as e:
+            print(f"❌ Invalid search query: {e}")
+            return 2
+
+    if not hits:
+        print(f"No matches for: {query}")
+        return 1
+    for location, title, snippet, _, _ in hits:
+        print(f"{location} — {title}" if title else location)
+        print(f"    {' '.join(snippet.split())}")
+    return 0
+
+
+def main():
+    sys.exit(run_search(cache.strip_cache_flag(sys.argv[1:])))
+
+
+if __name__ == "__main__":
+    main()
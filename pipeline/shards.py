@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+shards.py - Per-entity directory layout for the entity files.
+
+Any entity file in ENTITY_MAP can live either as one document
+(data/variables.yaml) or as a directory of shards:
+
+    data/variables/_meta.yaml     # top-level metadata; entries: [shard names]
+    data/variables/SV-01.yaml     # one entry per file, named after its ID
+    data/variables/SV-02.yaml
+    ...
+
+_meta.yaml is the original document with every entry replaced by the name
+of its shard file, so metadata keys and entry order are preserved. Shards
+that exist but are not listed are appended in filename order, so a new entry
+can be added by dropping a file into the directory. Shards are read through
+the parse cache, so only shards whose content changed are re-parsed.
+
+Both forms are written in yaml.dump style (dump_yaml). split refuses a
+file that isn't already in that style, since join would write it back
+reformatted; with that, split + join gives back the file byte for byte.
+
+Usage:
+    python shards.py                    # show the layout of each entity type
+    python shards.py split variables    # variables.yaml -> variables/
+    python shards.py join variables     # variables/ -> variables.yaml
+    python shards.py split --all        # every entity type
+"""
+
+import re
+import sys
+import shutil
+from pathlib import Path
+
+import yaml
+
+from loader import load_yaml, FILES
+
+BASE = Path(__file__).parent.parent
+DATA = BASE / "data"
+
+META_FILE = "_meta.yaml"
+
+
+def dump_yaml(data) -> str:
+    """Serialise the way the entity files are written."""
+    return yaml.dump(data, Dumper=yaml.SafeDumper, sort_keys=False,
+                     allow_unicode=True, width=120, default_flow_style=False)
+
+
+def shard_dir(data_dir: Path, filename: str) -> Path:
+    """Directory form of an entity file (variables.yaml -> variables/)."""
+    return data_dir / Path(filename).stem
+
+
+def is_sharded(directory: Path, source=FILES) -> bool:
+    return source.exists(directory / META_FILE)
+
+
+def shard_name(entry, id_field: str) -> str:
+    """Shard file stem for an entry: its ID, made filename-safe."""
+    eid = entry.get(id_field) if isinstance(entry, dict) else None
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", str(eid)) if eid is not None else "_unnamed"
+
+
+def shard_paths(directory: Path, source=FILES) -> list:
+    """Shard files in entry order: as listed in _meta.yaml, then unlisted ones."""
+    meta = source.load(directory / META_FILE)
+    listed = meta.get("entries") if isinstance(meta, dict) else None
+    paths = [directory / f"{name}.yaml" for name in listed or []]
+    known = set(paths)
+    extra = [p for p in source.glob(directory)
+             if p.name != META_FILE and p not in known]
+    return [p for p in paths if source.exists(p)] + extra
+
+
+def iter_sharded(directory: Path, source=FILES):
+    """Yield the entries of a sharded entity type one shard at a time."""
+    for path in shard_paths(directory, source):
+        yield source.load(path)
+
+
+def load_sharded(directory: Path, source=FILES):
+    """The document a sharded entity type stands for (as if unsharded)."""
+    meta = source.load(directory / META_FILE)
+    if not isinstance(meta, dict):
+        return meta
+    entries = list(iter_sharded(directory, source))
+    if "entries" not in meta:
+        return {**meta, "entries": entries}
+    return {k: (entries if k == "entries" else v) for k, v in meta.items()}
+
+
+def check_shards(directory: Path, filename: str, id_field: str, source=FILES) -> list:
+    """Layout problems for one entity type, as error strings."""
+    errors = []
+    label = directory.name
+    if source.exists(directory.parent / filename):
+        errors.append(f"  [{label}] both {filename} and {label}/ exist — remove one")
+    meta = source.load(directory / META_FILE)
+    if not isinstance(meta, dict):
+        return errors + [f"  [{label}] {META_FILE} must be a mapping"]
+    for name in meta.get("entries") or []:
+        if not source.exists(directory / f"{name}.yaml"):
+            errors.append(f"  [{label}] {META_FILE} lists missing shard {name}.yaml")
+    for path in shard_paths(directory, source):
+        entry = source.load(path)
+        if not isinstance(entry, dict):
+            errors.append(f"  [{label}] {path.name}: shard must hold a single entry mapping")
+        elif path.stem.split("~")[0] != shard_name(entry, id_field):
+            errors.append(f"  [{label}] {path.name}: holds {id_field} "
+                          f"'{entry.get(id_field)}' (expected {shard_name(entry, id_field)}.yaml)")
+    return errors
+
+
+# ---------------------------------------------------------------------------
+# Conversion
+# ---------------------------------------------------------------------------
+
+def split(data_dir: Path, filename: str, id_field: str) -> Path:
+    """Convert data/<name>.yaml into data/<name>/ and remove the file."""
+    source = data_dir / filename
+    directory = shard_dir(data_dir, filename)
+    if directory.exists():
+        raise FileExistsError(f"{directory} already exists")
+    data = load_yaml(source)
+    if source.read_text(encoding="utf-8") != dump_yaml(data):
+        raise ValueError(f"{source} is not in yaml.dump style; join would write it back "
+                         f"reformatted, so it was left unchanged")
+    if isinstance(data, list):
+        meta, entries = {"entries": None}, data
+    elif isinstance(data, dict):
+        meta, entries = data, data.get("entries") or []
+    else:
+        raise ValueError(f"{source} has no entries to split")
+
+    names = []
+    for entry in entries:
+        name = shard_name(entry, id_field)
+        if name in names:  # duplicate ID: keep both, validation reports it
+            n = 2
+            while f"{name}~{n}" in names:
+                n += 1
+            name = f"{name}~{n}"
+        names.append(name)
+
+    staging = directory.with_name(f".{directory.name}.tmp")
+    if staging.exists():
+        shutil.rmtree(staging)
+    staging.mkdir()
+    for name, entry in zip(names, entries):
+        (staging / f"{name}.yaml").write_text(dump_yaml(entry), encoding="utf-8")
+    meta = {k: (names if k == "entries" else v) for k, v in meta.items()}
+    (staging / META_FILE).write_text(dump_yaml(meta), encoding="utf-8")
+
+    if load_sharded(staging) != (data if isinstance(data, dict) else {"entries": data}):
+        shutil.rmtree(staging)
+        raise ValueError(f"{source}: sharded form does not round-trip; left unchanged")
+    staging.rename(directory)
+    source.unlink()
+    return directory
+
+
+def join(data_dir: Path, filename: str) -> Path:
+    """Convert data/<name>/ back into data/<name>.yaml and remove the directory."""
+    target = data_dir / filename
+    directory = shard_dir(data_dir, filename)
+    if target.exists():
+        raise FileExistsError(f"{target} already exists")
+    if not is_sharded(directory):
+        raise FileNotFoundError(f"{directory / META_FILE} not found")
+    data = load_sharded(directory)
+    tmp = target.with_name(f".{target.name}.tmp")
+    tmp.write_text(dump_yaml(data), encoding="utf-8")
+    tmp.rename(target)
+    shutil.rmtree(directory)
+    return target
+
+
+def main():
+    from corpus import ENTITY_MAP
+    args = sys.argv[1:]
+    if not args:
+        for entity_type, (filename, _, _) in ENTITY_MAP.items():
+            directory = shard_dir(DATA, filename)
+            if is_sharded(directory):
+                print(f"{entity_type:<14} {directory.name}/ ({len(shard_paths(directory))} shards)")
+            else:
+                print(f"{entity_type:<14} {filename}")
+        return
+
+    command, names = args[0], args[1:]
+    if command not in ("split", "join") or not names:
+        print(__doc__)
+        sys.exit(2)
+    if names == ["--all"]:
+        names = list(ENTITY_MAP)
+    unknown = [n for n in names if n not in ENTITY_MAP]
+    if unknown:
+        print(f"❌ Unknown entity type(s): {', '.join(unknown)}")
+        sys.exit(2)
+
+    failed = False
+    for entity_type in names:
+        filename, _, id_field = ENTITY_MAP[entity_type]
+        try:
+            if command == "split":
+                directory = split(DATA, filename, id_field)
+                print(f"✅ {filename} -> {directory.name}/ ({len(shard_paths(directory))} shards)")
+            else:
+                target = join(DATA, filename)
+                print(f"✅ {shard_dir(DATA, filename).name}/ -> {target.name}")
+        except (OSError, ValueError) as e:
+            print(f"❌ {entity_type}: {e}")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+snapshot.py - Compile the data tree into an indexed SQLite snapshot.
+
+Writes every ENTITY_MAP entity, the per-file metadata blocks, content module
+sections and brief sections into output/corpus.sqlite. The snapshot records
+the SHA-256 of every source file and is only rebuilt when one of them (or the
+snapshot layout) changes, so tools that just need lookups can open it in
+milliseconds instead of parsing the YAML.
+
+Entity and document bodies are stored as JSON text; use SQLite's JSON
+functions for ad-hoc queries, e.g.
+
+    SELECT entity_id, json_extract(data, '$.current_value')
+      FROM entities WHERE entity_type = 'variables';
+
+Usage:
+    python snapshot.py                  # compile if any source changed
+    python snapshot.py --force          # recompile unconditionally
+    python snapshot.py query "SQL"      # run a read-only query, print rows
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import hashlib
+from pathlib import Path
+from collections.abc import Mapping
+
+import cache
+from corpus import Corpus, ENTITY_MAP
+
+BASE = Path(__file__).parent.parent
+DATA = BASE / "data"
+SNAPSHOT_PATH = BASE / "output" / "corpus.sqlite"
+
+# Bump whenever the table layout below changes.
+SNAPSHOT_VERSION = "1"
+
+SCHEMA_SQL = """
+CREATE TABLE meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE sources (
+    path   TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL
+);
+CREATE TABLE entities (
+    entity_type TEXT NOT NULL,
+    entity_id   TEXT NOT NULL,
+    position    INTEGER NOT NULL,
+    title       TEXT,
+    status      TEXT,
+    data        TEXT NOT NULL
+);
+CREATE INDEX entities_by_id ON entities (entity_type, entity_id);
+CREATE INDEX entities_by_status ON entities (entity_type, status);
+CREATE TABLE entity_metadata (
+    entity_type TEXT PRIMARY KEY,
+    data        TEXT NOT NULL
+);
+CREATE TABLE content_modules (
+    file        TEXT PRIMARY KEY,
+    module_code TEXT,
+    version     TEXT,
+    date        TEXT,
+    title       TEXT,
+    data        TEXT NOT NULL
+);
+CREATE INDEX content_modules_by_code ON content_modules (module_code);
+CREATE TABLE content_sections (
+    file        TEXT NOT NULL,
+    module_code TEXT,
+    section_id  TEXT,
+    parent_id   TEXT,
+    title       TEXT,
+    level       INTEGER,
+    depth       INTEGER NOT NULL,
+    position    INTEGER NOT NULL,
+    content     TEXT
+);
+CREATE INDEX content_sections_by_id ON content_sections (module_code, section_id);
+CREATE TABLE briefs (
+    file     TEXT PRIMARY KEY,
+    brief_id TEXT,
+    type     TEXT,
+    number   INTEGER,
+    title    TEXT,
+    version  TEXT,
+    date     TEXT,
+    status   TEXT,
+    data     TEXT NOT NULL
+);
+CREATE INDEX briefs_by_id ON briefs (brief_id);
+CREATE TABLE brief_sections (
+    file         TEXT NOT NULL,
+    brief_id     TEXT,
+    section_path TEXT NOT NULL,
+    parent_path  TEXT,
+    title        TEXT,
+    level        INTEGER,
+    depth        INTEGER NOT NULL,
+    position     INTEGER NOT NULL,
+    content      TEXT
+);
+CREATE INDEX brief_sections_by_id ON brief_sections (brief_id, section_path);
+"""
+
+
+def to_json(value) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def source_files(data_dir: Path = DATA) -> list:
+    """Every YAML file that feeds the snapshot, in a stable order."""
+    return sorted(data_dir.rglob("*.yaml"))
+
+
+def source_hashes(data_dir: Path = DATA) -> dict:
+    """Relative path -> SHA-256 for every source file."""
+    hashes = {}
+    for path in source_files(data_dir):
+        with open(path, "rb") as f:
+            hashes[path.relative_to(data_dir).as_posix()] = hashlib.sha256(f.read()).hexdigest()
+    return hashes
+
+
+def is_current(path: Path = SNAPSHOT_PATH, hashes: dict = None) -> bool:
+    """True if the snapshot at path was compiled from exactly these sources."""
+    if not path.exists():
+        return False
+    hashes = hashes if hashes is not None else source_hashes()
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            version = conn.execute("SELECT value FROM meta WHERE key = 'snapshot_version'").fetchone()
+            stored = dict(conn.execute("SELECT path, sha256 FROM sources"))
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+    return version is not None and version[0] == SNAPSHOT_VERSION and stored == hashes
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def _walk_sections(sections, parent=None, depth=0, counter=None):
+    """Yield (section, parent_key, depth, position, key) depth-first.
+
+    key is the section's id when it has one, otherwise its 1-based path
+    among its siblings (e.g. "3.2").
+    """
+    counter = counter if counter is not None else [0]
+    for i, section in enumerate(sections or [], start=1):
+        if not isinstance(section, dict):
+            continue
+        counter[0] += 1
+        key = section.get("id") or (f"{parent}.{i}" if parent else str(i))
+        yield section, parent, depth, counter[0], str(key)
+        yield from _walk_sections(section.get("subsections"), str(key), depth + 1, counter)
+
+
+def _without(doc: dict, key: str) -> dict:
+    return {k: v for k, v in doc.items() if k != key}
+
+
+def write_snapshot(conn: sqlite3.Connection, corpus: Corpus, hashes: dict):
+    conn.executescript(SCHEMA_SQL)
+    conn.execute("INSERT INTO meta VALUES ('snapshot_version', ?)", (SNAPSHOT_VERSION,))
+    conn.executemany("INSERT INTO sources VALUES (?, ?)", sorted(hashes.items()))
+
+    for entity_type, (_, _, id_field) in ENTITY_MAP.items():
+        rows = []
+        for position, entry in enumerate(corpus.entries(entity_type)):
+            rows.append((
+                entity_type,
+                str(entry.get(id_field, "")),
+                position,
+                entry.get("name") or entry.get("title") or entry.get("description"),
+                entry.get("status"),
+                to_json(entry),
+            ))
+        conn.executemany("INSERT INTO entities VALUES (?, ?, ?, ?, ?, ?)", rows)
+        conn.execute("INSERT INTO entity_metadata VALUES (?, ?)",
+                     (entity_type, to_json(corpus.metadata(entity_type))))
+    conn.execute("INSERT INTO entity_metadata VALUES ('index_meta', ?)",
+                 (to_json(corpus.index_meta),))
+
+    for path, doc in corpus.content.items():
+        if not isinstance(doc, Mapping):
+            continue
+        mc = doc.get("module_code")
+        conn.execute("INSERT INTO content_modules VALUES (?, ?, ?, ?, ?, ?)",
+                     (path.name, mc, doc.get("version"), doc.get("date"), doc.get("title"),
+                      to_json(_without(doc, "sections"))))
+        conn.executemany(
+            "INSERT INTO content_sections VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(path.name, mc, key, parent, s.get("title"), s.get("level"), depth, pos, s.get("content"))
+             for s, parent, depth, pos, key in _walk_sections(doc.get("sections"))])
+
+    for path, doc in corpus.briefs.items():
+        if not isinstance(doc, dict):
+            continue
+        bid = doc.get("brief_id")
+        conn.execute("INSERT INTO briefs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                     (path.name, bid, doc.get("type"), doc.get("number"), doc.get("title"),
+                      doc.get("version"), doc.get("date"), doc.get("status"),
+                      to_json(_without(doc, "sections"))))
+        conn.executemany(
+            "INSERT INTO brief_sections VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(path.name, bid, key, parent, s.get("title"), s.get("level"), depth, pos, s.get("content"))
+             for s, parent, depth, pos, key in _walk_sections(doc.get("sections"))])
+
+
+def compile_snapshot(corpus: Corpus = None, path: Path = SNAPSHOT_PATH, force: bool = False) -> bool:
+    """(Re)build the snapshot if its sources changed. Returns True if rebuilt."""
+    corpus = corpus or Corpus()
+    hashes = source_hashes(corpus.data_dir)
+    if not force and is_current(path, hashes):
+        return False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    if tmp.exists():
+        tmp.unlink()
+    conn = sqlite3.connect(tmp)
+    try:
+        with conn:
+            write_snapshot(conn, corpus, hashes)
+    finally:
+        conn.close()
+    os.replace(tmp, path)
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+class Snapshot:
+    """Read-only lookups against a compiled snapshot."""
+
+    def __init__(self, path: Path = SNAPSHOT_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def ids(self, entity_type: str) -> set:
+        rows = self.conn.execute("SELECT entity_id FROM entities WHERE entity_type = ?",
+                                 (entity_type,))
+        return {r[0] for r in rows}
+
+    def get(self, entity_type: str, entity_id) -> dict:
+        row = self.conn.execute(
+            "SELECT data FROM entities WHERE entity_type = ? AND entity_id = ? ORDER BY position",
+            (entity_type, str(entity_id))).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def entries(self, entity_type: str) -> list:
+        rows = self.conn.execute(
+            "SELECT data FROM entities WHERE entity_type = ? ORDER BY position", (entity_type,))
+        return [json.loads(r[0]) for r in rows]
+
+    def metadata(self, entity_type: str) -> dict:
+        row = self.conn.execute("SELECT data FROM entity_metadata WHERE entity_type = ?",
+                                (entity_type,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def query(self, sql: str, params=()) -> list:
+        return self.conn.execute(sql, params).fetchall()
+
+
+def run_compile(args: list) -> int:
+    """CLI for `snapshot.py` / `itp compile`. Returns an exit code."""
+    if args and args[0] == "query":
+        if len(args) < 2:
+            print('Usage: snapshot.py query "SELECT ..."')
+            return 2
+        if not SNAPSHOT_PATH.exists():
+            print(f"❌ No snapshot at {SNAPSHOT_PATH}. Run `itp compile` first.")
+            return 1
+        with Snapshot() as snap:
+            try:
+                for row in snap.query(args[1]):
+                    print("\t".join("" if v is None else str(v) for v in row))
+            except sqlite3.Error as e:
+                print(f"❌ {e}")
+                return 1
+        return 0
+
+    force = "--force" in args
+    if compile_snapshot(force=force):
+        size_kib = SNAPSHOT_PATH.stat().st_size / 1024
+        print(f"✅ Compiled {SNAPSHOT_PATH.relative_to(BASE)} ({size_kib:.0f} KiB)")
+    else:
+        print(f"✅ {SNAPSHOT_PATH.relative_to(BASE)} is up to date")
+    return 0
+
+
+def main():
+    sys.exit(run_compile(cache.strip_cache_flag(sys.argv[1:])))
+
+
+if __name__ == "__main__":
+    main()
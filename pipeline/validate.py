@@ -7,81 +7,56 @@ Usage:
     python validate.py                  # validate all
     python validate.py variables        # validate one entity type
     python validate.py --xref           # cross-reference check only
+    python validate.py --full           # recheck files unchanged since the last run
+    python validate.py --no-cache       # bypass the parsed-document cache
+    python validate.py --jobs 4         # parse and check with 4 processes
+    python validate.py --report json    # also write reports/validate.json (or junit: .xml)
 """
 
 import sys
-import json
-import yaml
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from jsonschema import validate, ValidationError
+
+import cache
+from corpus import Corpus, ENTITY_MAP
+from loader import strip_jobs_flag, get_jobs, FILES, YAMLError
+from content_index import materialize, materialize_all
+from schema_registry import load_registry
+from schema_codegen import GeneratedValidator
+from manifest import ValidationManifest, digest
+from refgraph import RefGraph, entity_refs, KINDS, LABELS
+from depgraph import check_module_graph
+from report import Report, strip_report_flag
+import shards
 
 BASE = Path(__file__).parent.parent
 DATA = BASE / "data"
-SCHEMAS = BASE / "schemas"
-
-# Map entity type -> (data file, schema file, id field)
-ENTITY_MAP = {
-    "variables":    ("variables.yaml",    "variable.schema.json",    "id"),
-    "gaps":         ("gaps.yaml",         "gap.schema.json",         "id"),
-    "traps":        ("traps.yaml",        "trap.schema.json",        "id"),
-    "observations": ("observations.yaml", "observation.schema.json", "id"),
-    "scenarios":    ("scenarios.yaml",    "scenario.schema.json",    "id"),
-    "sessions":     ("sessions.yaml",     "session.schema.json",     "number"),
-    "modules":      ("modules.yaml",      "module.schema.json",      "code"),
-}
-
-CONTENT_DIR = DATA / "content"
-BRIEFS_DIR = DATA / "briefs"
 
 
-def validate_brief_files() -> list:
+def validate_brief_files(corpus: Corpus = None, manifest: ValidationManifest = None,
+                         report: Report = None) -> list:
     """Validate all brief YAML files in data/briefs/ against brief schema."""
-    schema_path = SCHEMAS / "brief.schema.json"
-    if not schema_path.exists():
+    corpus = corpus or Corpus()
+    validator = schema_validator(corpus, "brief.schema.json")
+    if validator is None:
         return ["Brief schema not found: schemas/brief.schema.json"]
-    if not BRIEFS_DIR.exists():
+    if not corpus.source.exists(corpus.briefs_dir):
         return []  # No brief files yet — not an error
 
-    schema = load_schema(schema_path)
-    errors = []
-    count = 0
-
-    for yaml_file in sorted(BRIEFS_DIR.glob("*.yaml")):
-        count += 1
-        with open(yaml_file, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-        if data is None:
-            errors.append(f"  [brief] {yaml_file.name}: empty file")
-            continue
-        try:
-            validate(instance=data, schema=schema)
-        except ValidationError as e:
-            path_str = " -> ".join(str(p) for p in e.absolute_path) if e.absolute_path else "(root)"
-            errors.append(f"  [brief] {yaml_file.name}: {path_str}: {e.message}")
-
-        # Cross-validate brief_id against filename
-        stem = yaml_file.stem.lower()
-        bid = data.get("brief_id", "")
-        expected_id = None
-        if stem.startswith("b") and not stem.startswith("eb"):
-            expected_id = f"B{stem[1:].zfill(2)}"
-        elif stem.startswith("eb"):
-            expected_id = f"EB{stem[2:].zfill(2)}"
-        elif stem == "intro":
-            expected_id = "INTRO"
-        elif stem in ("es", "exec_summary"):
-            expected_id = "ES"
-        elif stem.startswith("supp_"):
-            expected_id = f"SUPP-{stem[5:].upper()}"
-
-        if expected_id and bid != expected_id:
-            errors.append(f"  [brief] {yaml_file.name}: brief_id '{bid}' does not match "
-                          f"filename (expected '{expected_id}')")
-
-        # Numbered briefs must have number field
-        if bid.startswith("B") and len(bid) == 3 and bid[1:].isdigit():
-            if data.get("number") is None:
-                errors.append(f"  [brief] {yaml_file.name}: numbered brief {bid} must have 'number' set")
+    times = None
+    if report is not None:
+        times = {}
+        load_briefs(corpus)  # parse up front, so every brief has a parse time
+    results = brief_results(corpus, validator, manifest, times)
+    errors = [f"  [brief] {yaml_file.name}: {problem}"
+              for yaml_file, problems in results.items() for problem in problems]
+    count = len(results)
+    if report is not None:
+        for yaml_file, problems in results.items():
+            seconds, cached = times[yaml_file]
+            report.add("brief", yaml_file.name, problems, paths=[yaml_file],
+                       validate=seconds, cached=cached)
 
     if errors:
         print(f"\n❌ briefs ({count} files): {len(errors)} error(s)")
@@ -93,40 +68,161 @@ def validate_brief_files() -> list:
     return errors
 
 
-def validate_content_files() -> list:
+def brief_results(corpus: Corpus, validator, manifest: ValidationManifest = None,
+                  times: dict = None) -> dict:
+    """{brief path: problems} for every brief in data/briefs/.
+
+    The one brief check: validate.py and validate_briefs.py both report from
+    it. Each brief is read from the corpus (parsed once, through the parse
+    cache) and checked once; with a manifest, briefs unchanged since any
+    earlier run of either script reuse the stored result. times, if given,
+    receives {brief path: (seconds, cached)}.
+
+    A brief that is not valid YAML is reported as a problem of that file;
+    the others are still checked.
+    """
+    loaded = []  # load_briefs(corpus), once and only if a brief has to be checked
+
+    def document(yaml_file):
+        if not loaded:
+            loaded.append(load_briefs(corpus))
+        return loaded[0][yaml_file]
+
+    def check(yaml_file):
+        return brief_file_problems(yaml_file, lambda: document(yaml_file), validator)
+
+    if manifest is None:
+        units = {yaml_file: (lambda yaml_file=yaml_file: check(yaml_file))
+                 for yaml_file in corpus.source.glob(corpus.briefs_dir)}
+    else:
+        units = {yaml_file: (lambda yaml_file=yaml_file, key=key: manifest.cached(
+                     f"brief:{yaml_file.name}", key, lambda: check(yaml_file)))
+                 for yaml_file, key in brief_keys(corpus, manifest).items()}
+    results = {}
+    for yaml_file, compute in units.items():
+        results[yaml_file], seconds, cached = timed(compute, manifest)
+        if times is not None:
+            times[yaml_file] = (seconds, cached)
+    return results
+
+
+def timed(compute, manifest: ValidationManifest = None) -> tuple:
+    """(compute(), seconds, whether the manifest supplied the result)."""
+    reused = manifest.reused if manifest is not None else 0
+    started = time.perf_counter()
+    result = compute()
+    seconds = time.perf_counter() - started
+    return result, seconds, manifest is not None and manifest.reused > reused
+
+
+def brief_keys(corpus: Corpus, manifest: ValidationManifest) -> dict:
+    """{brief path: manifest key} — the brief schema and the file's own content."""
+    schema_key = manifest.file_hash(corpus.schemas_dir / "brief.schema.json")
+    return {yaml_file: digest(schema_key, manifest.file_hash(yaml_file))
+            for yaml_file in corpus.source.glob(corpus.briefs_dir)}
+
+
+def load_briefs(corpus: Corpus) -> dict:
+    """{brief path: document, or the YAMLError parsing it raised}.
+
+    corpus.briefs loads every brief in one go and fails on the first
+    malformed one; in that case each brief is loaded on its own instead.
+    """
+    try:
+        return corpus.briefs
+    except YAMLError:
+        pass
+    briefs = {}
+    for yaml_file in corpus.source.glob(corpus.briefs_dir):
+        try:
+            briefs[yaml_file] = corpus.source.load(yaml_file)
+        except YAMLError as e:
+            briefs[yaml_file] = e
+    return briefs
+
+
+def brief_file_problems(yaml_file: Path, load, validator) -> list:
+    """brief_problems() for the document load() returns; a YAML error is a problem too."""
+    try:
+        data = load()
+        if isinstance(data, YAMLError):
+            raise data
+    except YAMLError as e:
+        return [f"YAML parse error: {e}"]
+    return brief_problems(yaml_file, data, validator)
+
+
+def brief_problems(yaml_file: Path, data, validator) -> list:
+    """Problems with one brief document, without the file name."""
+    if data is None:
+        return ["empty file"]
+    errors = schema_errors(data, validator)
+
+    # Cross-validate brief_id against filename
+    stem = yaml_file.stem.lower()
+    bid = data.get("brief_id", "")
+    expected_id = None
+    if stem.startswith("b") and not stem.startswith("eb"):
+        expected_id = f"B{stem[1:].zfill(2)}"
+    elif stem.startswith("eb"):
+        expected_id = f"EB{stem[2:].zfill(2)}"
+    elif stem == "intro":
+        expected_id = "INTRO"
+    elif stem in ("es", "exec_summary"):
+        expected_id = "ES"
+    elif stem.startswith("supp_"):
+        expected_id = f"SUPP-{stem[5:].upper()}"
+
+    if expected_id and bid != expected_id:
+        errors.append(f"brief_id '{bid}' does not match filename (expected '{expected_id}')")
+
+    # Numbered briefs must have number field
+    if bid.startswith("B") and len(bid) == 3 and bid[1:].isdigit():
+        if data.get("number") is None:
+            errors.append(f"numbered brief {bid} must have 'number' set")
+    return errors
+
+
+def validate_content_files(corpus: Corpus = None, manifest: ValidationManifest = None,
+                           report: Report = None) -> list:
     """Validate all content YAML files in data/content/ against content schema."""
-    schema_path = SCHEMAS / "content.schema.json"
-    if not schema_path.exists():
+    corpus = corpus or Corpus()
+    validator = schema_validator(corpus, "content.schema.json")
+    if validator is None:
         return ["Content schema not found: schemas/content.schema.json"]
-    if not CONTENT_DIR.exists():
+    if not corpus.source.exists(corpus.content_dir):
         return []  # No content files yet — not an error
 
-    schema = load_schema(schema_path)
     errors = []
     count = 0
 
-    # Load module codes for cross-reference validation
-    module_codes = set()
-    for entry in load_yaml(DATA / "modules.yaml"):
-        module_codes.add(entry.get("code", ""))
-
-    for yaml_file in sorted(CONTENT_DIR.glob("*.yaml")):
-        count += 1
-        with open(yaml_file, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-        if data is None:
-            errors.append(f"  [content] {yaml_file.name}: empty file")
-            continue
-        try:
-            validate(instance=data, schema=schema)
-        except ValidationError as e:
-            path_str = " -> ".join(str(p) for p in e.absolute_path) if e.absolute_path else "(root)"
-            errors.append(f"  [content] {yaml_file.name}: {path_str}: {e.message}")
-
-        # Check module_code matches a registered module
-        mc = data.get("module_code", "")
-        if mc and mc not in module_codes:
-            errors.append(f"  [content] {yaml_file.name}: module_code '{mc}' not in modules.yaml registry")
+    # Module codes for cross-reference validation
+    module_codes = entity_ids(corpus, "modules", manifest)
+
+    if manifest is None:
+        materialize_all(corpus.content.values())
+        for yaml_file, data in corpus.content.items():
+            count += 1
+            file_errors, seconds, cached = timed(
+                lambda: check_content_file(yaml_file, data, validator, module_codes))
+            errors.extend(file_errors)
+            if report is not None:
+                report.add("content", yaml_file.name, file_errors, paths=[yaml_file], validate=seconds)
+    else:
+        keys = content_keys(corpus, manifest, module_codes)
+        # Bodies are parsed only for the modules that have to be rechecked
+        # (all of them for a report, so every module has a parse time)
+        materialize_all(m for p, m in corpus.content.items()
+                        if report is not None or not manifest.is_current(f"content:{p.name}", keys[p]))
+        for yaml_file, data in corpus.content.items():
+            count += 1
+            file_errors, seconds, cached = timed(lambda: manifest.cached(
+                f"content:{yaml_file.name}", keys[yaml_file],
+                lambda: check_content_file(yaml_file, data, validator, module_codes)), manifest)
+            errors.extend(file_errors)
+            if report is not None:
+                report.add("content", yaml_file.name, file_errors, paths=[yaml_file],
+                           validate=seconds, cached=cached)
 
     if errors:
         print(f"\n❌ content ({count} files): {len(errors)} error(s)")
@@ -138,171 +234,156 @@ def validate_content_files() -> list:
     return errors
 
 
-def load_yaml(path: Path) -> list:
-    """Load a YAML file, return list of entities."""
-    if not path.exists():
-        return []
-    with open(path, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
+def content_keys(corpus: Corpus, manifest: ValidationManifest, module_codes: set) -> dict:
+    """{content path: manifest key} — the content schema, module codes and the file."""
+    schema_key = manifest.file_hash(corpus.schemas_dir / "content.schema.json")
+    codes_key = digest(module_codes)
+    return {p: digest(schema_key, codes_key, manifest.file_hash(p)) for p in corpus.content}
+
+
+def check_content_file(yaml_file: Path, data, validator, module_codes: set) -> list:
+    """Errors for one content module document."""
+    data = materialize(data)
     if data is None:
-        return []
-    if isinstance(data, dict) and "entries" in data:
-        return data["entries"]
-    if isinstance(data, list):
-        return data
-    return []
+        return [f"  [content] {yaml_file.name}: empty file"]
+    errors = [f"  [content] {yaml_file.name}: {e}" for e in schema_errors(data, validator)]
+
+    # Check module_code matches a registered module
+    mc = data.get("module_code", "")
+    if mc and mc not in module_codes:
+        errors.append(f"  [content] {yaml_file.name}: module_code '{mc}' not in modules.yaml registry")
+    return errors
 
 
-def load_schema(path: Path) -> dict:
-    """Load a JSON schema file."""
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+# Registry of the schemas last validated against; rebuilt when any schema
+# changes (Corpus.schema returns a new object after an edit).
+_registry = None
 
 
-def validate_entity_type(entity_type: str) -> list:
-    """Validate all entries for a given entity type. Returns list of errors."""
-    if entity_type not in ENTITY_MAP:
-        return [f"Unknown entity type: {entity_type}"]
+def schema_validator(corpus: Corpus, filename: str):
+    """Validator for schemas/<filename> as the corpus reads it (None if missing).
 
-    data_file, schema_file, id_field = ENTITY_MAP[entity_type]
-    data_path = DATA / data_file
-    schema_path = SCHEMAS / schema_file
+    Generated code where schema_codegen.py supports the schema, else jsonschema.
+    """
+    global _registry
+    _registry = load_registry(corpus, _registry)
+    return _registry.validator(filename)
 
-    if not data_path.exists():
-        return [f"Data file not found: {data_path}"]
-    if not schema_path.exists():
-        return [f"Schema file not found: {schema_path}"]
 
-    entries = load_yaml(data_path)
-    schema = load_schema(schema_path)
+def schema_errors(instance, validator) -> list:
+    """Every schema violation in instance, as "path: message" strings."""
+    if isinstance(validator, GeneratedValidator):
+        violations = validator.violations(instance)
+    else:
+        violations = [(e.absolute_path, e.message)
+                      for e in sorted(validator.iter_errors(instance), key=lambda e: list(e.path))]
     errors = []
+    for path, message in violations:
+        path_str = " -> ".join(str(p) for p in path) if path else "(root)"
+        errors.append(f"{path_str}: {message}")
+    return errors
+
+
+def validate_entity_type(entity_type: str, corpus: Corpus = None) -> list:
+    """Validate all entries for a given entity type. Returns list of errors."""
+    return check_entity_type(entity_type, corpus)[0]
+
+
+def check_entity_type(entity_type: str, corpus: Corpus = None) -> tuple:
+    """Validate an entity type in a single pass over its entries.
 
-    # Check for duplicate IDs
+    Returns (errors, entry_count).
+    """
+    if entity_type not in ENTITY_MAP:
+        return [f"Unknown entity type: {entity_type}"], 0
+
+    corpus = corpus or Corpus()
+    _, schema_file, id_field = ENTITY_MAP[entity_type]
+    data_path = corpus.path(entity_type)
+
+    if not corpus.exists(entity_type):
+        return [f"Data file not found: {data_path}"], 0
+    validator = schema_validator(corpus, schema_file)
+    if validator is None:
+        return [f"Schema file not found: {corpus.schemas_dir / schema_file}"], 0
+
+    layout_errors = []
+    if corpus.is_sharded(entity_type):
+        layout_errors = shards.check_shards(corpus.shard_dir(entity_type), data_path.name,
+                                            id_field, corpus.source)
+    duplicate_errors = []
+    entry_errors = []
     ids_seen = set()
-    for entry in entries:
+    count = 0
+
+    for i, entry in enumerate(corpus.iter_entries(entity_type)):
+        count += 1
+
+        # Check for duplicate IDs
         eid = entry.get(id_field, "UNKNOWN")
         if eid in ids_seen:
-            errors.append(f"  [{entity_type}] Duplicate ID: {eid}")
+            duplicate_errors.append(f"  [{entity_type}] Duplicate ID: {eid}")
         ids_seen.add(eid)
 
-    # Validate each entry against schema
-    for i, entry in enumerate(entries):
+        # Validate the entry against schema, reporting every violation
         eid = entry.get(id_field, f"index-{i}")
-        try:
-            validate(instance=entry, schema=schema)
-        except ValidationError as e:
-            # Shorten the path for readability
-            path_str = " -> ".join(str(p) for p in e.absolute_path) if e.absolute_path else "(root)"
-            errors.append(f"  [{entity_type}] {eid}: {path_str}: {e.message}")
+        entry_errors.extend(f"  [{entity_type}] {eid}: {e}" for e in schema_errors(entry, validator))
+
+    # Duplicates are reported ahead of schema errors
+    return layout_errors + duplicate_errors + entry_errors, count
+
+
+def entity_files(corpus: Corpus, entity_type: str) -> list:
+    """The files an entity type is read from (see Corpus.files)."""
+    return corpus.files(entity_type)
 
-    return errors
 
+def entity_fragment(corpus: Corpus, entity_type: str, manifest: ValidationManifest = None) -> tuple:
+    """refgraph.entity_refs(), reusing the stored (ids, edges) if the entity's files are unchanged."""
+    if manifest is None:
+        return entity_refs(corpus, entity_type)
+    key = manifest.files_key(entity_files(corpus, entity_type))
+    return manifest.cached(f"refs:{entity_type}", key, lambda: entity_refs(corpus, entity_type))
 
-def check_cross_references() -> list:
+
+def entity_ids(corpus: Corpus, entity_type: str, manifest: ValidationManifest = None) -> set:
+    """IDs of an entity type, as strings."""
+    return set(entity_fragment(corpus, entity_type, manifest)[0])
+
+
+# Reference fields checked for each entity type -> the kinds of reference checked
+XREF_CHECKS = {
+    "observations": {"cross_refs": ("obs", "trap", "scenario")},
+    "scenarios": {"cross_refs": ("obs", "trap"), "traps_activated": ("trap",)},
+    "traps": {"cross_refs": ("obs",)},
+}
+
+
+def check_cross_references(corpus: Corpus = None, manifest: ValidationManifest = None) -> list:
     """Check that cross-references between entities resolve."""
+    corpus = corpus or Corpus()
     errors = []
 
-    # Load all entity IDs
-    all_ids = {}
-    for entity_type, (data_file, _, id_field) in ENTITY_MAP.items():
-        entries = load_yaml(DATA / data_file)
-        for entry in entries:
-            eid = str(entry.get(id_field, ""))
-            all_ids[f"{entity_type}:{eid}"] = True
-
-    # Build quick lookup sets
-    trap_ids = set()
-    obs_ids = set()
-    scenario_ids = set()
-    module_codes = set()
-    gap_ids = set()
-    var_ids = set()
-
-    for entries_data in [(DATA / "traps.yaml", "id"),
-                         (DATA / "observations.yaml", "id"),
-                         (DATA / "scenarios.yaml", "id"),
-                         (DATA / "modules.yaml", "code"),
-                         (DATA / "gaps.yaml", "id"),
-                         (DATA / "variables.yaml", "id")]:
-        path, field = entries_data
-        for entry in load_yaml(path):
-            val = str(entry.get(field, ""))
-            if path.stem == "traps":
-                trap_ids.add(val)
-            elif path.stem == "observations":
-                obs_ids.add(val)
-            elif path.stem == "scenarios":
-                scenario_ids.add(val)
-            elif path.stem == "modules":
-                module_codes.add(val)
-            elif path.stem == "gaps":
-                gap_ids.add(val)
-            elif path.stem == "variables":
-                var_ids.add(val)
+    # One pass per entity type gives both its IDs and its outgoing references
+    graph = RefGraph.build(corpus, lambda corpus, t: entity_fragment(corpus, t, manifest))
+    ids = {entity_type: graph.ids.get(KINDS[entity_type], set())
+           for entity_type in ("traps", "observations", "scenarios", "modules", "gaps", "variables")}
 
     print(f"\n  Cross-reference inventory:")
-    print(f"    Traps:        {len(trap_ids)}")
-    print(f"    Observations: {len(obs_ids)}")
-    print(f"    Scenarios:    {len(scenario_ids)}")
-    print(f"    Modules:      {len(module_codes)}")
-    print(f"    Gaps:         {len(gap_ids)}")
-    print(f"    Variables:    {len(var_ids)}")
+    print(f"    Traps:        {len(ids['traps'])}")
+    print(f"    Observations: {len(ids['observations'])}")
+    print(f"    Scenarios:    {len(ids['scenarios'])}")
+    print(f"    Modules:      {len(ids['modules'])}")
+    print(f"    Gaps:         {len(ids['gaps'])}")
+    print(f"    Variables:    {len(ids['variables'])}")
 
     # --- Deep cross-reference validation ---
-    import re
-
-    def extract_refs(text):
-        """Extract entity references from free-text cross_refs strings."""
-        refs = []
-        if not isinstance(text, str):
-            return refs
-        # Obs NNN — normalize to strip leading zeros for integer ID comparison
-        for m in re.finditer(r'Obs\s+(\d+)', text):
-            refs.append(('obs', str(int(m.group(1)))))
-        # Trap NNN
-        for m in re.finditer(r'Trap\s+(\d+)', text):
-            refs.append(('trap', str(int(m.group(1)))))
-        # Scenario S1, S1A, W1 etc.
-        for m in re.finditer(r'\b(S\d+[A-Z]?|W\d+)\b', text):
-            refs.append(('scenario', m.group(1)))
-        # Gap G20-01 etc.
-        for m in re.finditer(r'\b(G\d+-\d+)\b', text):
-            refs.append(('gap', m.group(1)))
-        return refs
-
-    # Check cross_refs fields in observations
-    for entry in load_yaml(DATA / "observations.yaml"):
-        eid = entry.get("id", "?")
-        for ref_str in entry.get("cross_refs", []):
-            for ref_type, ref_id in extract_refs(ref_str):
-                if ref_type == 'obs' and ref_id not in obs_ids:
-                    errors.append(f"  [xref] Obs {eid}: references Obs {ref_id} which does not exist")
-                elif ref_type == 'trap' and ref_id not in trap_ids:
-                    errors.append(f"  [xref] Obs {eid}: references Trap {ref_id} which does not exist")
-                elif ref_type == 'scenario' and ref_id not in scenario_ids:
-                    errors.append(f"  [xref] Obs {eid}: references Scenario {ref_id} which does not exist")
-
-    # Check cross_refs and traps_activated in scenarios
-    for entry in load_yaml(DATA / "scenarios.yaml"):
-        sid = entry.get("id", "?")
-        for ref_str in entry.get("cross_refs", []):
-            for ref_type, ref_id in extract_refs(ref_str):
-                if ref_type == 'obs' and ref_id not in obs_ids:
-                    errors.append(f"  [xref] Scenario {sid}: references Obs {ref_id} which does not exist")
-                elif ref_type == 'trap' and ref_id not in trap_ids:
-                    errors.append(f"  [xref] Scenario {sid}: references Trap {ref_id} which does not exist")
-        for ref_str in entry.get("traps_activated", []):
-            for ref_type, ref_id in extract_refs(ref_str):
-                if ref_type == 'trap' and ref_id not in trap_ids:
-                    errors.append(f"  [xref] Scenario {sid}: activates Trap {ref_id} which does not exist")
-
-    # Check cross_refs in traps
-    for entry in load_yaml(DATA / "traps.yaml"):
-        tid = entry.get("id", "?")
-        for ref_str in entry.get("cross_refs", []):
-            for ref_type, ref_id in extract_refs(ref_str):
-                if ref_type == 'obs' and ref_id not in obs_ids:
-                    errors.append(f"  [xref] Trap {tid}: references Obs {ref_id} which does not exist")
+    for entity_type, checks in XREF_CHECKS.items():
+        source_label = LABELS[KINDS[entity_type]]
+        for source, field, kind, ref_id in graph.dangling(entity_type, checks):
+            verb = "activates" if field == "traps_activated" else "references"
+            errors.append(f"  [xref] {source_label} {source}: {verb} {LABELS[kind]} {ref_id} "
+                          f"which does not exist")
 
     if errors:
         print(f"\n  Cross-reference warnings: {len(errors)}")
@@ -312,24 +393,141 @@ def check_cross_references() -> list:
     return errors
 
 
-def main():
-    args = sys.argv[1:]
-    xref_only = "--xref" in args
-    args = [a for a in args if a != "--xref"]
+def entity_result(entity_type: str, corpus: Corpus, manifest: ValidationManifest = None) -> tuple:
+    """check_entity_type(), reusing the stored result if neither data nor schema changed."""
+    if manifest is None or entity_type not in ENTITY_MAP:
+        return check_entity_type(entity_type, corpus)
+    return manifest.cached(f"entity:{entity_type}", entity_key(corpus, entity_type, manifest),
+                           lambda: check_entity_type(entity_type, corpus))
 
-    types_to_check = args if args else list(ENTITY_MAP.keys())
+
+def entity_key(corpus: Corpus, entity_type: str, manifest: ValidationManifest) -> str:
+    """Manifest key of an entity type — its schema and every file it is read from."""
+    return digest(manifest.file_hash(corpus.schemas_dir / ENTITY_MAP[entity_type][1]),
+                  manifest.files_key(entity_files(corpus, entity_type)))
+
+
+# ---------------------------------------------------------------------------
+# Worker processes
+# ---------------------------------------------------------------------------
+
+# Schema checks of entity types, content modules and briefs are fanned out to
+# a process pool only when the files still to be checked add up to at least
+# this much YAML; below that, starting workers (each compiles the schemas and
+# parses its own files) costs more than checking serially.
+PARALLEL_VALIDATE_MIN_BYTES = 2048 * 1024
+
+_worker_corpus = None
+
+
+def _init_worker(data_dir: Path, use_cache: bool):
+    global _worker_corpus
+    if not use_cache:
+        cache.disable()
+    _worker_corpus = Corpus(data_dir)
+
+
+def _check_unit(task: tuple):
+    """Result of one unit of work, exactly as the serial pass computes it."""
+    kind, name, module_codes = task
+    corpus = _worker_corpus
+    if kind == "entity":
+        return check_entity_type(name, corpus)
+    if kind == "content":
+        path = corpus.content_dir / name
+        return check_content_file(path, corpus.content[path],
+                                  schema_validator(corpus, "content.schema.json"), module_codes)
+    path = corpus.briefs_dir / name
+    return brief_file_problems(path, lambda: corpus.source.load(path),
+                               schema_validator(corpus, "brief.schema.json"))
+
+
+def pending_units(corpus: Corpus, types_to_check: list, xref_only: bool,
+                  manifest: ValidationManifest) -> list:
+    """(unit, key, task, bytes) for every schema check the manifest has no result for."""
+    units = []
+    if not xref_only:
+        for entity_type in types_to_check:
+            if entity_type in ENTITY_MAP and corpus.exists(entity_type):
+                files = entity_files(corpus, entity_type)
+                units.append((f"entity:{entity_type}", entity_key(corpus, entity_type, manifest),
+                              ("entity", entity_type, None), files))
+    if corpus.source.exists(corpus.content_dir):
+        module_codes = entity_ids(corpus, "modules", manifest)
+        for path, key in content_keys(corpus, manifest, module_codes).items():
+            units.append((f"content:{path.name}", key, ("content", path.name, module_codes), [path]))
+    if corpus.source.exists(corpus.briefs_dir):
+        for path, key in brief_keys(corpus, manifest).items():
+            units.append((f"brief:{path.name}", key, ("brief", path.name, None), [path]))
+    return [(unit, key, task, sum(p.stat().st_size for p in files if p.exists()))
+            for unit, key, task, files in units if not manifest.is_current(unit, key)]
+
+
+def check_in_parallel(corpus: Corpus, types_to_check: list, xref_only: bool,
+                      manifest: ValidationManifest = None):
+    """Run the pending schema checks in worker processes, ahead of the serial passes.
+
+    Results are recorded in the manifest (an in-memory one if there is none),
+    and the passes then print them in their usual order. Returns the manifest
+    the passes should use.
+    """
+    workers = get_jobs()
+    if workers < 2 or corpus.source is not FILES:
+        return manifest
+    if (schema_validator(corpus, "content.schema.json") is None
+            or schema_validator(corpus, "brief.schema.json") is None):
+        return manifest  # the passes report the missing schema themselves
+    pending = manifest if manifest is not None else ValidationManifest(path=None)
+    units = pending_units(corpus, types_to_check, xref_only, pending)
+    if len(units) < 2 or sum(size for *_, size in units) < PARALLEL_VALIDATE_MIN_BYTES:
+        return manifest
+    # Largest first, so one big file doesn't finish last on its own
+    units.sort(key=lambda u: -u[3])
+    with ProcessPoolExecutor(max_workers=min(workers, len(units)), initializer=_init_worker,
+                             initargs=(corpus.data_dir, cache.is_enabled())) as pool:
+        results = pool.map(_check_unit, [task for _, _, task, _ in units])
+        for (unit, key, _, _), result in zip(units, results):
+            pending.record(unit, key, result)
+    return pending
+
+
+def open_manifest(corpus: Corpus, full: bool = False):
+    """Manifest for an incremental run, or None (cache disabled, or not the working tree)."""
+    if not cache.is_enabled() or corpus.source is not FILES:
+        return None
+    return ValidationManifest(full=full)
+
+
+def run(corpus: Corpus = None, types_to_check: list = None, xref_only: bool = False,
+        manifest: ValidationManifest = None, report: Report = None) -> tuple:
+    """Run every validation pass, printing results as it goes.
+
+    With a manifest, units whose inputs are unchanged since the last run
+    reuse their stored results (see manifest.py); output is the same.
+    Large enough sets of pending schema checks run in worker processes first
+    (see check_in_parallel). With a report, each entity type, content module,
+    brief and whole-corpus check is also recorded there (see report.py).
+
+    Returns (errors, total_entries).
+    """
+    corpus = corpus or Corpus()
+    types_to_check = types_to_check or list(ENTITY_MAP.keys())
+    manifest = check_in_parallel(corpus, types_to_check, xref_only, manifest)
 
     total_errors = []
     total_entries = 0
 
     if not xref_only:
         for entity_type in types_to_check:
-            data_file = ENTITY_MAP.get(entity_type, (None,))[0]
-            if data_file:
-                entries = load_yaml(DATA / data_file)
-                count = len(entries)
+            if entity_type in ENTITY_MAP:
+                if report is not None and corpus.exists(entity_type):
+                    corpus.document(entity_type)  # parse up front, so it is timed on its own
+                (errors, count), seconds, cached = timed(
+                    lambda: entity_result(entity_type, corpus, manifest), manifest)
+                if report is not None:
+                    report.add("entity", entity_type, errors, paths=entity_files(corpus, entity_type),
+                               validate=seconds, cached=cached)
                 total_entries += count
-                errors = validate_entity_type(entity_type)
                 if errors:
                     print(f"\n❌ {entity_type} ({count} entries): {len(errors)} error(s)")
                     for e in errors:
@@ -338,17 +536,43 @@ def main():
                 else:
                     print(f"✅ {entity_type} ({count} entries): OK")
 
-    xref_errors = check_cross_references()
+    xref_errors, seconds, _ = timed(lambda: check_cross_references(corpus, manifest))
     total_errors.extend(xref_errors)
+    if report is not None:
+        report.add("check", "cross-references", xref_errors, validate=seconds)
+
+    # Module dependency graph: warnings only (see depgraph.py)
+    dep_warnings, seconds, _ = timed(lambda: check_module_graph(corpus))
+    if report is not None:
+        report.add("check", "module-dependencies", warnings=dep_warnings, validate=seconds)
 
     # Validate content files (Phase 2)
-    content_errors = validate_content_files()
+    content_errors = validate_content_files(corpus, manifest, report)
     total_errors.extend(content_errors)
 
     # Validate brief files (Phase 3)
-    brief_errors = validate_brief_files()
+    brief_errors = validate_brief_files(corpus, manifest, report)
     total_errors.extend(brief_errors)
 
+    if manifest is not None:
+        manifest.save()
+    return total_errors, total_entries
+
+
+def main():
+    args, report_format = strip_report_flag(strip_jobs_flag(cache.strip_cache_flag(sys.argv[1:])))
+    xref_only = "--xref" in args
+    full = "--full" in args
+    args = [a for a in args if a not in ("--xref", "--full")]
+
+    types_to_check = args if args else list(ENTITY_MAP.keys())
+    corpus = Corpus()
+    report = Report("validate") if report_format else None
+    total_errors, total_entries = run(corpus, types_to_check, xref_only, open_manifest(corpus, full),
+                                      report)
+
+    if report is not None:
+        report.write(report_format)
     print(f"\n{'='*50}")
     if total_errors:
         print(f"VALIDATION FAILED: {len(total_errors)} error(s) across {total_entries} entries")
@@ -1,102 +1,65 @@
 #!/usr/bin/env python3
-"""Validate brief YAML files against brief.schema.json."""
+"""Validate brief YAML files against brief.schema.json.
+
+The checks are validate.py's brief pass (brief_results): briefs are read
+through the shared Corpus and checked once, and a brief unchanged since the
+last run of either script reuses its recorded result (--full rechecks all).
+
+Usage:
+    python validate_briefs.py           # PASS/FAIL per brief
+    python validate_briefs.py --full    # recheck briefs unchanged since the last run
+    python validate_briefs.py --no-cache
+"""
 
-import json
 import sys
 from pathlib import Path
 
-import jsonschema
-import yaml
-
+import cache
+from corpus import Corpus
+from validate import brief_results, schema_validator, open_manifest
 
 BASE = Path(__file__).resolve().parent.parent
-SCHEMA_PATH = BASE / "schemas" / "brief.schema.json"
 BRIEFS_DIR = BASE / "data" / "briefs"
 
 
-def load_schema():
-    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def validate_brief(filepath: Path, schema: dict) -> list[str]:
-    """Validate a single brief YAML. Returns list of error strings (empty = pass)."""
-    errors = []
-    try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
-    except yaml.YAMLError as e:
-        return [f"YAML parse error: {e}"]
-
-    if data is None:
-        return ["Empty YAML file"]
-
-    # Schema validation
-    validator = jsonschema.Draft7Validator(schema)
-    for err in sorted(validator.iter_errors(data), key=lambda e: list(e.path)):
-        path_str = " → ".join(str(p) for p in err.absolute_path) or "(root)"
-        errors.append(f"  [{path_str}] {err.message}")
-
-    # Cross-validation: brief_id consistency with filename
-    expected_prefix = filepath.stem.lower()
-    actual_id = data.get("brief_id", "").lower()
-    # b03 -> B03, eb01 -> EB01, etc.
-    if expected_prefix.startswith("b") and not expected_prefix.startswith("eb"):
-        expected_id = f"B{expected_prefix[1:].zfill(2)}"
-    elif expected_prefix.startswith("eb"):
-        expected_id = f"EB{expected_prefix[2:].zfill(2)}"
-    elif expected_prefix == "intro":
-        expected_id = "INTRO"
-    elif expected_prefix in ("es", "exec_summary"):
-        expected_id = "ES"
-    elif expected_prefix.startswith("supp_"):
-        expected_id = f"SUPP-{expected_prefix[5:].upper()}"
-    else:
-        expected_id = None
-
-    if expected_id and data.get("brief_id") != expected_id:
-        errors.append(f"  brief_id '{data.get('brief_id')}' does not match "
-                       f"filename '{filepath.stem}' (expected '{expected_id}')")
+def run(corpus: Corpus = None, full: bool = False) -> int:
+    """Print PASS/FAIL per brief and a summary. Returns an exit code."""
+    corpus = corpus or Corpus()
+    validator = schema_validator(corpus, "brief.schema.json")
+    if validator is None:
+        print("Brief schema not found: schemas/brief.schema.json")
+        return 1
+    if not list(corpus.source.glob(corpus.briefs_dir)):
+        print(f"No YAML files found in {corpus.briefs_dir}")
+        return 1
 
-    # Numbered brief must have number; non-numbered must have null
-    bid = data.get("brief_id", "")
-    num = data.get("number")
-    if bid.startswith("B") and not bid.startswith("B0") == False:
-        # It's a numbered brief if it matches B##
-        if bid.startswith("B") and len(bid) == 3 and bid[1:].isdigit():
-            if num is None:
-                errors.append(f"  Numbered brief {bid} must have 'number' set")
-
-    return errors
-
-
-def main():
-    schema = load_schema()
-    yaml_files = sorted(BRIEFS_DIR.glob("*.yaml"))
-
-    if not yaml_files:
-        print(f"No YAML files found in {BRIEFS_DIR}")
-        sys.exit(1)
+    manifest = open_manifest(corpus, full)
+    results = brief_results(corpus, validator, manifest)
+    if manifest is not None:
+        manifest.save()
 
     total_errors = 0
-    for fp in yaml_files:
-        errors = validate_brief(fp, schema)
+    for fp, errors in results.items():
         if errors:
             print(f"FAIL: {fp.name}")
             for e in errors:
-                print(e)
+                print(f"  {e}")
             total_errors += len(errors)
         else:
             print(f"PASS: {fp.name}")
 
     print(f"\n{'='*40}")
-    print(f"Files: {len(yaml_files)} | Errors: {total_errors}")
+    print(f"Files: {len(results)} | Errors: {total_errors}")
 
     if total_errors:
-        sys.exit(1)
-    else:
-        print("All briefs valid.")
-        sys.exit(0)
+        return 1
+    print("All briefs valid.")
+    return 0
+
+
+def main():
+    args = cache.strip_cache_flag(sys.argv[1:])
+    sys.exit(run(full="--full" in args))
 
 
 if __name__ == "__main__":
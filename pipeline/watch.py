@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+watch.py - Keep the corpus loaded and rebuild on file change (itp watch).
+
+Runs a full validate + build once, then watches data/, schemas/ and
+templates/ (inotify on Linux, polling elsewhere). Bursts of edits are
+debounced and coalesced into one update, and each update re-validates and
+re-renders only what the changed files feed:
+
+    data/<type>.yaml, data/<type>/*   that entity type + cross-references;
+                                      reports whose templates use it
+    data/content/*.yaml               that content module
+    data/briefs/*.yaml                that brief
+    data/index_meta.yaml              reports that use index_meta
+    schemas/*.json                    everything validated by that schema
+    templates/*                       outputs rendered by that template
+
+A content change that adds, removes or renumbers sections also re-renders
+every output that links "§" references (see anchors.py).
+
+Parsed documents, schemas and compiled templates stay in memory between
+updates. If validation fails, or a file can't be parsed or rendered, nothing
+is written; the next update after that validates and builds everything, so
+no change made in the meantime is lost.
+
+Usage:
+    python watch.py                     # inotify where available
+    python watch.py --poll              # force polling
+    python watch.py --interval 0.5      # polling interval in seconds
+    python itp.py watch                 # same, through the itp driver
+"""
+
+import io
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import contextlib
+from pathlib import Path
+
+from jinja2 import TemplateError, meta as jinja_meta
+from jsonschema import SchemaError
+
+import cache
+import build
+import validate
+from corpus import Corpus, ENTITY_MAP
+from loader import YAMLError, strip_jobs_flag
+
+BASE = Path(__file__).parent.parent
+DATA = BASE / "data"
+SCHEMAS = BASE / "schemas"
+TEMPLATES = BASE / "templates"
+WATCHED = (DATA, SCHEMAS, TEMPLATES)
+
+# Seconds without further events before an update starts
+DEBOUNCE = 0.15
+POLL_INTERVAL = 0.5
+
+
+def is_relevant(path: Path) -> bool:
+    """Skip editor swap/backup files and anything the pipeline doesn't read."""
+    name = path.name
+    if name.startswith(".") or name.endswith("~") or name.endswith(".swp"):
+        return False
+    if TEMPLATES in path.parents:
+        return True
+    if SCHEMAS in path.parents:
+        return path.suffix == ".json"
+    return path.suffix == ".yaml"
+
+
+# ---------------------------------------------------------------------------
+# File watchers
+# ---------------------------------------------------------------------------
+
+class PollingWatcher:
+    """Detects changes by comparing (mtime, size) of every file under the roots."""
+
+    def __init__(self, roots=WATCHED, interval: float = POLL_INTERVAL):
+        self.roots = roots
+        self.interval = interval
+        self.state = self._scan()
+
+    def _scan(self) -> dict:
+        state = {}
+        for root in self.roots:
+            for path in root.rglob("*"):
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                if not path.is_dir():
+                    state[path] = (st.st_mtime_ns, st.st_size)
+        return state
+
+    def wait(self, timeout: float = None) -> set:
+        """Changed paths, or an empty set once timeout seconds pass quietly."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._scan()
+            changed = {p for p in current.keys() | self.state.keys()
+                       if current.get(p) != self.state.get(p)}
+            self.state = current
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval if deadline is None
+                       else max(0.0, min(self.interval, deadline - time.monotonic())))
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify through ctypes (no third-party dependency)."""
+
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_FROM = 0x040
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_ISDIR = 0x40000000
+    MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, roots=WATCHED):
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}  # watch descriptor -> directory
+        for root in roots:
+            for directory in [root, *(p for p in root.rglob("*") if p.is_dir())]:
+                self._watch(directory)
+
+    def _watch(self, directory: Path):
+        wd = self._add_watch(self.fd, os.fsencode(directory), self.MASK)
+        if wd >= 0:
+            self.dirs[wd] = directory
+
+    def wait(self, timeout: float = None) -> set:
+        """Changed paths, or an empty set once timeout seconds pass quietly."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except OSError as e:
+            if e.errno == errno.EAGAIN:
+                return changed
+            raise
+        offset = 0
+        while offset < len(buf):
+            wd, mask, _, length = self.EVENT.unpack_from(buf, offset)
+            offset += self.EVENT.size
+            name = buf[offset:offset + length].rstrip(b"\0")
+            offset += length
+            directory = self.dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    self._watch(path)  # e.g. a new sharded entity directory
+                    changed.update(p for p in path.rglob("*") if p.is_file())
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher(poll: bool = False, interval: float = POLL_INTERVAL):
+    if not poll and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError) as e:
+            print(f"⚠️  inotify unavailable ({e}) — falling back to polling")
+    return PollingWatcher(interval=interval)
+
+
+# ---------------------------------------------------------------------------
+# Incremental validate + build
+# ---------------------------------------------------------------------------
+
+class WatchSession:
+    """A loaded corpus plus compiled templates, updated file by file."""
+
+    def __init__(self):
+        self.corpus = Corpus.load()
+        self.env = build.make_env()
+        self.brief_env = build.make_brief_env()
+        self.needs_full = True
+
+    def report_inputs(self, template_file: str) -> set:
+        """Context variables a report template reads (from its Jinja AST)."""
+        source = (TEMPLATES / template_file).read_text(encoding="utf-8")
+        return jinja_meta.find_undeclared_variables(self.env.parse(source))
+
+    def full(self) -> bool:
+        """Validate and build everything. Returns True if validation passed."""
+        errors, total_entries = validate.run(self.corpus)
+        if errors:
+            print(f"\n❌ {len(errors)} error(s) across {total_entries} entries — not building")
+            return False
+        print()
+        ctx = build.build_context(self.corpus)
+        build.OUTPUT.mkdir(exist_ok=True)
+        build.build_reports(self.env, ctx)
+        build.build_content_modules(self.env, ctx, self.corpus)
+        build.build_brief_files(self.corpus, brief_env=self.brief_env)
+        self.needs_full = False
+        return True
+
+    def update(self, changes: set):
+        """Re-validate and re-render what the changed files feed."""
+        start = time.perf_counter()
+        names = ", ".join(sorted(str(p.relative_to(BASE)) for p in changes))
+        print(f"\n── {time.strftime('%H:%M:%S')}  {names}")
+        try:
+            if self.needs_full:
+                for path in changes:
+                    self.corpus.invalidate(path)
+                self.full()
+            else:
+                self._update(changes)
+        except (YAMLError, OSError, ValueError, TemplateError, SchemaError) as e:
+            # ValueError covers json.JSONDecodeError from a half-saved schema
+            print(f"❌ {type(e).__name__}: {e}")
+            self.needs_full = True
+            return
+        print(f"⏱  {1000 * (time.perf_counter() - start):.0f} ms")
+
+    def _update(self, changes: set):
+        corpus = self.corpus
+        entity_types, content_paths, brief_paths = set(), set(), set()
+        ctx_keys = set()
+        all_content = all_briefs = False
+        report_names = set()
+        schema_files = set()
+        anchors = dict(corpus.sections.anchors)
+
+        for path in changes:
+            if SCHEMAS in path.parents:
+                schema_files.add(path.name)
+            elif TEMPLATES in path.parents:
+                name = path.name
+                if name == build.CONTENT_TEMPLATE:
+                    all_content = True
+                elif name in build.BRIEF_TEMPLATE_MAP.values():
+                    all_briefs = True
+                else:
+                    used = [r for r, (tmpl, _) in build.REPORTS.items() if tmpl == name]
+                    if not used:
+                        # Not a known top-level template: may be included anywhere
+                        report_names.update(build.REPORTS)
+                        all_content = all_briefs = True
+                    report_names.update(used)
+            else:
+                fed = corpus.invalidate(path)
+                if fed is None:
+                    continue
+                kind, what = fed
+                if kind == "entity":
+                    entity_types.add(what)
+                    ctx_keys.update((what, f"{what}_meta"))
+                elif kind == "index_meta":
+                    ctx_keys.add("index_meta")
+                elif kind == "content":
+                    content_paths.add(what)
+                elif kind == "brief":
+                    brief_paths.add(what)
+
+        if content_paths and corpus.sections.anchors != anchors:
+            # Sections moved: "§" links into them are rendered everywhere
+            ctx_keys.add("anchors")
+            all_content = True
+
+        # --- Validate -------------------------------------------------------
+        for entity_type, (_, schema_file, _) in ENTITY_MAP.items():
+            if schema_file in schema_files:
+                entity_types.add(entity_type)
+        check_content = content_paths | (set(corpus.content) if "content.schema.json" in schema_files
+                                         or "modules" in entity_types else set())
+        check_briefs = brief_paths | (set(corpus.briefs) if "brief.schema.json" in schema_files else set())
+
+        errors = []
+        for entity_type in sorted(entity_types):
+            errors.extend(validate.check_entity_type(entity_type, corpus)[0])
+        if entity_types:
+            with contextlib.redirect_stdout(io.StringIO()):
+                errors.extend(validate.check_cross_references(corpus))
+        if check_content:
+            validator = validate.schema_validator(corpus, "content.schema.json")
+            module_codes = {m.get("code", "") for m in corpus.entries("modules")}
+            for path in sorted(check_content):
+                if path in corpus.content:
+                    errors.extend(validate.check_content_file(path, corpus.content[path], validator, module_codes))
+        if check_briefs:
+            validator = validate.schema_validator(corpus, "brief.schema.json")
+            for path in sorted(check_briefs):
+                if path in corpus.briefs:
+                    errors.extend(f"  [brief] {path.name}: {problem}" for problem
+                                  in validate.brief_problems(path, corpus.briefs[path], validator))
+
+        if errors:
+            print(f"❌ {len(errors)} error(s) — not rebuilding")
+            for e in errors:
+                print(e)
+            # This batch's outputs were not rendered: rebuild everything once fixed
+            self.needs_full = True
+            return
+        checked = len(entity_types) + len(check_content) + len(check_briefs)
+        if checked:
+            print(f"✅ validated {checked} item(s)")
+
+        # --- Render -----------------------------------------------------------
+        if ctx_keys:
+            for name, (template_file, _) in build.REPORTS.items():
+                if self.report_inputs(template_file) & ctx_keys:
+                    report_names.add(name)
+        if "modules" in entity_types:
+            all_content = True  # output filenames come from the registry
+
+        ctx = build.build_context(corpus) if report_names or content_paths or all_content else None
+        if report_names:
+            build.build_reports(self.env, ctx, report_names)
+        if content_paths or all_content:
+            build.build_content_modules(self.env, ctx, corpus, None if all_content else content_paths)
+        if brief_paths or all_briefs:
+            build.build_brief_files(corpus, None if all_briefs else brief_paths, self.brief_env)
+        for path in sorted(content_paths | brief_paths):
+            if not path.exists():
+                print(f"⚠️  {path.relative_to(BASE)} was removed — its output in output/ was left in place")
+
+
+def run_watch(args: list) -> int:
+    """CLI for `watch.py` / `itp watch`. Returns an exit code."""
+    poll = "--poll" in args
+    interval = POLL_INTERVAL
+    if "--interval" in args:
+        i = args.index("--interval")
+        if i + 1 >= len(args):
+            print("--interval requires a value (seconds)")
+            return 2
+        try:
+            interval = float(args[i + 1])
+        except ValueError:
+            interval = 0.0
+        if not 0 < interval < float("inf"):
+            print(f"--interval requires a positive number of seconds, not {args[i + 1]!r}")
+            return 2
+
+    watcher = make_watcher(poll, interval)
+    session = WatchSession()
+    session.full()
+    kind = "polling" if isinstance(watcher, PollingWatcher) else "inotify"
+    print(f"\n👀 Watching data/, schemas/, templates/ ({kind}). Ctrl-C to stop.")
+    try:
+        while True:
+            changes = {p for p in watcher.wait() if is_relevant(p)}
+            # Debounce: keep collecting until the burst goes quiet
+            while True:
+                more = watcher.wait(DEBOUNCE)
+                if not more:
+                    break
+                changes.update(p for p in more if is_relevant(p))
+            if changes:
+                session.update(changes)
+    except KeyboardInterrupt:
+        print("\nStopped.")
+    finally:
+        watcher.close()
+    return 0
+
+
+def main():
+    sys.exit(run_watch(strip_jobs_flag(cache.strip_cache_flag(sys.argv[1:]))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+@echo off
+REM ITP Framework — One-process pipeline driver (Windows)
+REM
+REM Usage:
+REM   scripts\itp.bat validate build pdf    — full pipeline, data loaded once
+REM   scripts\itp.bat validate build        — validate then render markdown
+REM   scripts\itp.bat build content         — selected build targets
+REM   scripts\itp.bat pdf --briefs-only     — PDF options as in build_pdf.py
+setlocal
+
+set "REPO_ROOT=%~dp0.."
+set "VENV_DIR=%REPO_ROOT%\.venv"
+
+if not exist "%VENV_DIR%" (
+    echo Error: Virtual environment not found at .venv\
+    echo Run first:  scripts\setup.bat
+    exit /b 1
+)
+
+call "%VENV_DIR%\Scripts\activate.bat"
+cd /d "%REPO_ROOT%"
+
+python pipeline\itp.py %*
+if %errorlevel% neq 0 goto :fail
+goto :done
+
+:fail
+call deactivate
+endlocal
+exit /b 1
+
+:done
+call deactivate
+endlocal
@@ -0,0 +1,25 @@
+#!/usr/bin/env bash
+# ITP Framework — One-process pipeline driver (macOS / Linux)
+#
+# Usage:
+#   bash scripts/itp.sh validate build pdf    # full pipeline, data loaded once
+#   bash scripts/itp.sh validate build        # validate then render markdown
+#   bash scripts/itp.sh build content         # selected build targets
+#   bash scripts/itp.sh pdf --briefs-only     # PDF options as in build_pdf.py
+set -euo pipefail
+
+REPO_ROOT="$(cd "$(dirname "$0")/.." && pwd)"
+VENV_DIR="$REPO_ROOT/.venv"
+
+if [[ ! -d "$VENV_DIR" ]]; then
+    echo "Error: Virtual environment not found at .venv/"
+    echo "Run first:  bash scripts/setup.sh"
+    exit 1
+fi
+
+source "$VENV_DIR/bin/activate"
+cd "$REPO_ROOT"
+
+python pipeline/itp.py "$@"
+
+deactivate